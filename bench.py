@@ -0,0 +1,408 @@
+# bench.py
+# Benchmark harness for every main_demo_fixed.py operation, run against
+# in-process stand-ins so it needs no Atlas / Neo4j / Redis accounts:
+#   MongoDB -> mongomock (both clusters), Redis -> fakeredis,
+#   Neo4j   -> LocalGraph, an in-memory graph that answers the queries the
+#              menu issues (graph latency itself is not modeled)
+# Data comes from datagen.py, so every run with the same seed sees the same
+# documents. For each dataset size and operation it reports cold (caches
+# invalidated before every call) and warm latency percentiles plus
+# throughput as JSON, times the startup of a fresh menu process, and can
+# compare against a stored baseline.
+#
+# The stand-ins (and pytest for tests/) are in requirements-bench.txt
+# (pip install -r requirements-bench.txt).
+#
+#   python bench.py --sizes 1000,10000 --save-baseline bench_baseline.json
+#   python bench.py --sizes 1000,10000 --baseline bench_baseline.json --tolerance 0.25
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import datagen
+import fuzzy_search
+import leaderboards
+import neo4j_analytics
+import project_relations
+import query_cache
+import recommendations
+import search_index
+
+# Operations that need the Neo4j analytics queries are not benchmarked here;
+# "neo4j" analytics needs a real server.
+ANALYTICS_BACKENDS = ("sparse", "leaderboard")
+SEARCH_QUERIES = ('interest:AI AND dept:"Computer Science"', "interest:Genetics OR interest:Ecology",
+                  '"Machine Learning" NOT dept:Biology', "(interest:Robotics OR interest:Networks) interest:AI")
+
+# -----------------------------
+# MongoDB stand-in: mongomock, with bulk_write applied one UpdateOne at a
+# time (mongomock's own bulk_write rejects operations from newer pymongo)
+# -----------------------------
+class MockCollection:
+    def __init__(self, col):
+        self._col = col
+
+    def __getattr__(self, name):
+        return getattr(self._col, name)
+
+    def bulk_write(self, requests, ordered=True):
+        counts = {"upserted_count": 0, "matched_count": 0, "modified_count": 0}
+        for op in requests:
+            result = self._col.update_one(op._filter, op._doc, upsert=op._upsert)
+            counts["matched_count"] += result.matched_count
+            counts["modified_count"] += result.modified_count
+            counts["upserted_count"] += result.upserted_id is not None
+        return SimpleNamespace(**counts)
+
+class MockDatabase:
+    def __init__(self, db):
+        self._db = db
+        self._cols = {}
+
+    def __getitem__(self, name):
+        if name not in self._cols:
+            self._cols[name] = MockCollection(self._db[name])
+        return self._cols[name]
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+# -----------------------------
+# Neo4j stand-in
+# -----------------------------
+class LocalGraph:
+    def __init__(self):
+        self.departments = {}
+        self.projects = set()
+        self.worked_on = set()
+        self.relations = {}  # a -> {b: {types}}, canonical a < b like graph_loader / graph_sync
+
+    @classmethod
+    def from_dataset(cls, researchers, projects, publications):
+        graph = cls()
+        for r in researchers:
+            graph.departments[r["name"]] = r.get("department")
+        for p in projects:
+            graph.projects.add(p["title"])
+            members = p.get("participants", [])
+            graph.worked_on.update((name, p["title"]) for name in members)
+            graph._link(members, "TEAMMATE")
+        for pub in publications:
+            graph._link(pub.get("authors", []), "CO_AUTHOR")
+        return graph
+
+    def _link(self, names, rel):
+        names = sorted(set(names))
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                self.relations.setdefault(a, {}).setdefault(b, set()).add(rel)
+
+    def _relations_among(self, names, types):
+        names = set(names)
+        for a in names:
+            for b, rels in self.relations.get(a, {}).items():
+                if b in names:
+                    for rel in rels:
+                        if rel in types:
+                            yield a, rel, b
+
+    def run(self, query, **params):
+        if query == project_relations.BATCH_RELATIONS_QUERY:
+            return [{"title": p["title"], "a": a, "relation": rel, "b": b}
+                    for p in params["projects"]
+                    for a, rel, b in self._relations_among(p["names"], params["types"])]
+        text = " ".join(query.split())
+        if text.startswith("MERGE (r:Researcher"):
+            self.departments[params["name"]] = params.get("dept")
+            return []
+        if text.startswith("MERGE (p:Project"):
+            self.projects.add(params["title"])
+            return []
+        if "MERGE (r)-[:WORKED_ON]->(p)" in text:
+            if params["r"] in self.departments and params["t"] in self.projects:
+                self.worked_on.add((params["r"], params["t"]))
+            return []
+        raise NotImplementedError(f"LocalGraph does not answer: {text[:80]}")
+
+    def session(self, **kwargs):
+        return LocalGraphSession(self)
+
+    def close(self):
+        pass
+
+class LocalGraphSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return self.graph.run(query, **params)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(self, *args, **kwargs)
+
+# -----------------------------
+# Wiring main_demo_fixed to the stand-ins
+# -----------------------------
+LOCAL_ENV = {
+    "MONGO_URI_1": "mongodb://localhost:27017", "MONGO_URI_2": "mongodb://localhost:27017",
+    "NEO4J_URI": "bolt://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "bench",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_PASSWORD": "",
+    "METRICS_ENABLED": "0",
+    # mongomock has no transactions; the timed writes leave their events in the outbox
+    "OUTBOX_WORKER": "external", "OUTBOX_TRANSACTIONS": "0",
+}
+
+def import_app():
+    # Point every connection setting at localhost, so a client the stand-ins
+    # do not replace can never reach a real account.
+    os.environ.update(LOCAL_ENV)
+    import main_demo_fixed
+    return main_demo_fixed
+
+def install(app, size, seed, local_cache=False):
+    import fakeredis
+    import mongomock
+    from cache import ReadThroughCache, TwoTierCache
+
+    spec = datagen.DatasetSpec(researchers=size, projects=max(1, size // 5), seed=seed)
+    mongo = mongomock.MongoClient()
+    dbs = [MockDatabase(mongo[f"research_db_{n}"]) for n in (1, 2)]
+    datagen.write_chunked(dbs, datagen.generate_all(spec))
+
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    cache_client = fakeredis.FakeRedis(server=server)
+    leaderboards.rebuild(r, datagen.generate_researchers(spec), datagen.generate_projects(spec),
+                         datagen.generate_publications(spec))
+    recommendations.store(r, recommendations.Recommender(datagen.generate_researchers(spec),
+                                                         datagen.generate_projects(spec),
+                                                         datagen.generate_publications(spec)))
+    search_index.rebuild(r, datagen.generate_researchers(spec))
+    fuzzy_search.rebuild(r, (x["name"] for x in datagen.generate_researchers(spec)),
+                         (p["title"] for p in datagen.generate_projects(spec)),
+                         (pub["title"] for pub in datagen.generate_publications(spec)))
+
+    for n, db in ((1, dbs[0]), (2, dbs[1])):
+        app.connections.override(f"db:{n}", db)
+    graph = LocalGraph.from_dataset(datagen.generate_researchers(spec), datagen.generate_projects(spec),
+                                    datagen.generate_publications(spec))
+    app.connections.override("neo4j", query_cache.wrap(graph, cache_client))
+    app.connections.override("redis", r)
+    app.connections.override("redis:binary", cache_client)
+    app._collab_graph = None
+    neo4j_analytics._sparse = None
+    app._fuzzy = None
+    app.connections.override("cache", TwoTierCache(cache_client) if local_cache else ReadThroughCache(cache_client))
+    return spec
+
+# -----------------------------
+# Operations: name -> (call(i), cache entities to invalidate for a cold call)
+# -----------------------------
+def operations(app, spec, seed):
+    rng = random.Random(seed)
+    names = [datagen.researcher_name(i) for i in range(spec.researchers)]
+    titles = [p["title"] for p in datagen.generate_projects(spec)]
+    both = [app.cluster_collections(1), app.cluster_collections(2)]
+    run_id = int(time.time() * 1000)
+
+    ops = {
+        "show_all_researchers": (lambda i: app.show_all_researchers(interactive=False), ()),
+        "show_all_projects": (lambda i: app.show_all_projects(interactive=False), ()),
+        "show_all_publications": (lambda i: app.show_all_publications(interactive=False), ()),
+        "show_researcher_by_name": (lambda i: app.show_researcher_by_name(rng.choice(names)), ("researcher",)),
+        "show_project_by_title": (lambda i: app.show_project_by_title(rng.choice(titles)), ()),
+        "show_suggestions": (lambda i: app.show_suggestions(rng.choice(names)), ()),
+        "show_collaboration_path": (lambda i: app.show_collaboration_path(*rng.sample(names, 2)), ()),
+        "find_by_name": (lambda i: app.find_by_name("researcher", _typo(rng, rng.choice(names))), ()),
+        "search_researchers": (lambda i: app.search_researchers(rng.choice(SEARCH_QUERIES), interactive=False), ()),
+        "add_researcher": (lambda i: app.add_researcher(f"Bench Researcher {run_id}-{i}", "Computer Science",
+                                                        ["AI"], targets=both), ("researcher", "analytics")),
+        "add_project": (lambda i: app.add_project(f"Bench Project {run_id}-{i}", "Benchmark project",
+                                                  rng.sample(names, min(3, len(names))),
+                                                  [f"Bench Study {run_id}-{i}"], targets=both), ("analytics",)),
+    }
+    for backend in ANALYTICS_BACKENDS:
+        ops[f"show_analytics[{backend}]"] = (lambda i, b=backend: app.show_analytics(b), ("analytics",))
+    return ops
+
+def _typo(rng, text):
+    # One character swapped for a neighbour: a misspelled lookup
+    i = rng.randrange(len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def summarize(samples):
+    values = sorted(samples)
+    total = sum(values)
+    return {
+        "n": len(values),
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "mean_ms": total / len(values) * 1000 if values else 0.0,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+        "ops_per_sec": len(values) / total if total else 0.0,
+    }
+
+def measure(app, call, entities, cold, warm):
+    def timed(i):
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            call(i)
+        return time.perf_counter() - start_time
+
+    cold_samples = []
+    for i in range(cold):
+        for entity in entities:
+            app.connections.get_cache().invalidate(entity, "*")
+        cold_samples.append(timed(i))
+    warm_samples = [timed(cold + i) for i in range(warm)]
+    return {"cold": summarize(cold_samples), "warm": summarize(warm_samples)}
+
+def run(sizes, seed=42, cold=5, warm=30, only=None, local_cache=False, startup=5):
+    report = {
+        "meta": {"seed": seed, "cold": cold, "warm": warm, "local_cache": local_cache,
+                 "python": platform.python_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": {},
+    }
+    if startup:
+        report["startup"] = measure_startup(startup)
+    app = import_app()
+    for size in sizes:
+        start_time = time.perf_counter()
+        spec = install(app, size, seed, local_cache)
+        print(f"⏱️ {size} researchers: dataset ready in {time.perf_counter() - start_time:.1f}s", file=sys.stderr)
+        results = report["results"][str(size)] = {}
+        for name, (call, entities) in operations(app, spec, seed).items():
+            if only and name not in only:
+                continue
+            results[name] = measure(app, call, entities, cold, warm)
+            print(f"   {name}: warm p50 {results[name]['warm']['p50_ms']:.3f} ms", file=sys.stderr)
+        if local_cache:
+            app.connections.get_cache().close()
+    return report
+
+# -----------------------------
+# Startup: wall time of a fresh process until the menu has been shown and left
+# ("python" is the interpreter alone, for reference)
+# -----------------------------
+STARTUP_COMMANDS = {
+    "python": (["-c", "pass"], ""),
+    "main_demo_fixed": (["main_demo_fixed.py"], "0\n"),
+}
+
+def measure_startup(runs):
+    env = dict(os.environ, **LOCAL_ENV)
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, (argv, stdin) in STARTUP_COMMANDS.items():
+        samples = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            subprocess.run([sys.executable] + argv, input=stdin, text=True, cwd=here, env=env,
+                           stdout=subprocess.DEVNULL, check=True)
+            samples.append(time.perf_counter() - start_time)
+        results[name] = summarize(samples)
+        print(f"   startup {name}: p50 {results[name]['p50_ms']:.1f} ms", file=sys.stderr)
+    return results
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+def compare(report, baseline, tolerance=0.25, metrics=("p50_ms", "p95_ms")):
+    # A metric regresses when it is more than `tolerance` slower than the baseline
+    regressions = []
+    for size, ops in report["results"].items():
+        for name, phases in ops.items():
+            base_phases = baseline.get("results", {}).get(size, {}).get(name)
+            if not base_phases:
+                continue
+            for phase in ("cold", "warm"):
+                for metric in metrics:
+                    current, previous = phases[phase][metric], base_phases[phase][metric]
+                    if previous > 0 and current > previous * (1 + tolerance):
+                        regressions.append({"size": int(size), "operation": name, "phase": phase, "metric": metric,
+                                            "baseline": previous, "current": current,
+                                            "change": current / previous - 1})
+    for name, current_stats in report.get("startup", {}).items():
+        base_stats = baseline.get("startup", {}).get(name)
+        if not base_stats:
+            continue
+        for metric in metrics:
+            current, previous = current_stats[metric], base_stats[metric]
+            if previous > 0 and current > previous * (1 + tolerance):
+                regressions.append({"size": 0, "operation": f"startup {name}", "phase": "process", "metric": metric,
+                                    "baseline": previous, "current": current, "change": current / previous - 1})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark main_demo_fixed operations against local stand-ins")
+    parser.add_argument("--sizes", default="1000,5000", help="comma separated researcher counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cold", type=int, default=5, help="samples with caches invalidated before each call")
+    parser.add_argument("--warm", type=int, default=30, help="samples with warm caches")
+    parser.add_argument("--only", help="comma separated operation names")
+    parser.add_argument("--local-cache", action="store_true", help="use the two-tier cache (LOCAL_CACHE=1)")
+    parser.add_argument("--startup", type=int, default=5, help="fresh processes timed for startup (0 = skip)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="compare against this stored report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = set(args.only.split(",")) if args.only else None
+    report = run(sizes, args.seed, args.cold, args.warm, only, args.local_cache, args.startup)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for reg in regressions:
+            print(f"❌ {reg['operation']} @ {reg['size']} {reg['phase']} {reg['metric']}: "
+                  f"{reg['baseline']:.3f} -> {reg['current']:.3f} ms (+{reg['change']:.0%})", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"✅ No regressions beyond {args.tolerance:.0%} of the baseline", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(output)
+    sys.exit(exit_code)
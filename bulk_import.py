@@ -0,0 +1,269 @@
+# bulk_import.py
+# Streaming bulk import of researchers, projects and publications from CSV or
+# JSONL files into the selected MongoDB cluster(s) and Neo4j in one pass.
+#  - files are read row by row (never loaded whole)
+#  - rows are validated and normalized; bad rows go to <file>.rejects.jsonl
+#  - every batch is upserted to MongoDB (replicated_writer; the file's
+#    publications replace stored ones, year included), then what MongoDB
+#    stored is applied to Neo4j the way graph_sync applies a change batch, so
+#    re-running a batch is harmless
+#  - after each batch the byte offset is checkpointed, so an interrupted
+#    import resumes at the first unfinished batch; a batch counts as done only
+#    once every selected cluster has it
+#  - at the end the Redis leaderboards, search index and fuzzy index are
+#    rebuilt from MongoDB (the import does not go through the outbox)
+#
+# CSV columns (list fields separated by ";"):
+#   researchers:  name, department, interests
+#   projects:     title, description, participants
+#   publications: title, project, authors, year
+# JSONL: one object per line with the same fields (lists as JSON arrays).
+#
+#   python bulk_import.py --researchers r.csv --projects p.jsonl --publications pubs.csv --clusters 1,2
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import time
+
+import fuzzy_search
+import leaderboards
+import search_index
+from graph_sync import apply_changes, load_state, save_state
+from replicated_writer import replicated_write
+
+DEFAULT_STATE_FILE = ".bulk_import_state.json"
+DEFAULT_BATCH_SIZE = 1000
+LIST_SEPARATOR = ";"
+
+# kind -> (key field, list fields); researchers first so relationships find their nodes
+KINDS = {
+    "researchers": ("name", ("interests",)),
+    "projects": ("title", ("participants",)),
+    "publications": ("title", ("authors",)),
+}
+
+# -----------------------------
+# Readers: yield (offset after the row, row dict) from a byte offset
+# -----------------------------
+def _lines(f, offset):
+    f.seek(offset)
+    for line in f:
+        offset += len(line)
+        yield offset, line
+
+def read_jsonl(path, offset=0):
+    with open(path, "rb") as f:
+        for end, line in _lines(f, offset):
+            if line.strip():
+                try:
+                    yield end, json.loads(line)
+                except ValueError as e:
+                    yield end, ValueError(f"invalid JSON: {e}")
+
+def read_csv(path, offset=0):
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode("utf-8-sig")]))
+        record = b""
+        for end, line in _lines(f, max(offset, len(header_line))):
+            record += line
+            # A quoted field may span lines: wait until the quotes are balanced
+            if record.count(b'"') % 2:
+                continue
+            text = record.decode("utf-8")
+            record = b""
+            if not text.strip():
+                continue
+            values = next(csv.reader(io.StringIO(text)))
+            yield end, dict(zip(header, values))
+
+def reader_for(path):
+    return read_jsonl if path.endswith((".jsonl", ".ndjson", ".json")) else read_csv
+
+# -----------------------------
+# Validation / normalization
+# -----------------------------
+def _clean(value):
+    return re.sub(r"\s+", " ", str(value)).strip() if value is not None else ""
+
+def _clean_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    return list(dict.fromkeys(v for v in (_clean(v) for v in value) if v))
+
+def normalize(kind, row):
+    # Returns the normalized document or raises ValueError
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    key, list_fields = KINDS[kind]
+    doc = {key: _clean(row.get(key))}
+    if not doc[key]:
+        raise ValueError(f"missing {key}")
+    for field in list_fields:
+        doc[field] = _clean_list(row.get(field))
+
+    if kind == "researchers":
+        doc["department"] = _clean(row.get("department")) or None
+    elif kind == "projects":
+        if row.get("description") not in (None, ""):
+            doc["description"] = _clean(row["description"])
+    else:
+        doc["project"] = _clean(row.get("project")) or None
+        year = row.get("year")
+        if year not in (None, ""):
+            try:
+                year = int(year)
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid year {year!r}")
+            if not 1900 <= year <= 2100:
+                raise ValueError(f"year {year} out of range")
+            doc["year"] = year
+    return doc
+
+# -----------------------------
+# One batch: MongoDB (all selected clusters) then Neo4j
+# -----------------------------
+def write_batch(kind, docs, targets, session=None):
+    # The file is the source: publications are overwritten (year included), not insert-only
+    result = replicated_write(targets, overwrite_publications=True, **{kind: docs})
+    if not result["ok"]:
+        # Stop before the checkpoint moves: resuming re-sends the batch, and the
+        # upserts are harmless on the clusters that already took it
+        errors = "; ".join(f"{rep['cluster']}: {rep['error']}" for rep in result["clusters"] if not rep["ok"])
+        raise RuntimeError(f"MongoDB write failed ({errors})")
+
+    if session is not None:
+        # Neo4j gets what MongoDB stored (first cluster, what graph_sync watches), applied
+        # like a change stream batch: stale edges dropped, TEAMMATE / CO_AUTHOR derived again
+        key = KINDS[kind][0]
+        label, r_col, p_col, pub_col = targets[0]
+        col = {"researchers": r_col, "projects": p_col, "publications": pub_col}[kind]
+        events = [{"operationType": "update", "ns": {"coll": kind}, "documentKey": {"_id": d["_id"]}, "fullDocument": d}
+                  for d in col.find({key: {"$in": [d[key] for d in docs]}})]
+        apply_changes(session, events, p_col, pub_col, len(docs) or 1)
+    return result
+
+# -----------------------------
+# Redis structures the outbox keeps current for single writes
+# -----------------------------
+def rebuild_redis(client, mongo_db):
+    def researchers():
+        return mongo_db["researchers"].find({}, {"_id": 0, "name": 1, "department": 1, "interests": 1})
+
+    def projects():
+        return mongo_db["projects"].find({}, {"_id": 0, "title": 1, "participants": 1})
+
+    def publications():
+        return mongo_db["publications"].find({}, {"_id": 0, "title": 1, "authors": 1})
+
+    leaderboards.rebuild(client, researchers(), projects(), publications())
+    search_index.rebuild(client, researchers())
+    fuzzy_search.rebuild(client, (r["name"] for r in researchers()), (p["title"] for p in projects()),
+                         (pub["title"] for pub in publications()))
+
+# -----------------------------
+# One file, resumable
+# -----------------------------
+def import_file(kind, path, targets, session=None, batch_size=DEFAULT_BATCH_SIZE,
+                state_path=DEFAULT_STATE_FILE, restart=False):
+    path = os.path.abspath(path)
+    state = load_state(state_path)
+    entry = state.get(path)
+    size = os.path.getsize(path)
+    if restart or entry is None or entry.get("kind") != kind or entry["offset"] > size:
+        entry = {"kind": kind, "offset": 0, "rows": 0, "rejected": 0, "done": False}
+    if entry["done"] and entry["offset"] == size:
+        print(f"✅ {kind}: {path} already imported ({entry['rows']} rows), use --restart to import again")
+        return entry
+    if entry["offset"]:
+        print(f"↩️ {kind}: resuming {path} at byte {entry['offset']:,} ({entry['rows']} rows done)")
+
+    rejects_path = path + ".rejects.jsonl"
+    start_time = time.perf_counter()
+    imported = 0
+    batch, batch_end = [], entry["offset"]
+
+    def flush():
+        nonlocal batch, imported
+        if batch:
+            write_batch(kind, batch, targets, session)
+            imported += len(batch)
+            entry["rows"] += len(batch)
+        # Only now is everything before batch_end in every store
+        entry["offset"] = batch_end
+        state[path] = entry
+        save_state(state, state_path)
+        elapsed = time.perf_counter() - start_time
+        print(f"   {kind}: {entry['rows']} rows, {entry['rejected']} rejected, byte {batch_end:,}/{size:,} "
+              f"({imported / elapsed if elapsed else 0:,.0f} rows/s)")
+        batch = []
+
+    with open(rejects_path, "a", encoding="utf-8") as rejects:
+        for end, row in reader_for(path)(path, entry["offset"]):
+            try:
+                batch.append(normalize(kind, row))
+            except ValueError as e:
+                entry["rejected"] += 1
+                rejects.write(json.dumps({"offset": batch_end, "error": str(e),
+                                          "row": row if isinstance(row, dict) else None}, default=str) + "\n")
+            batch_end = end
+            if len(batch) >= batch_size:
+                rejects.flush()
+                flush()
+        rejects.flush()
+        flush()
+
+    entry["done"] = True
+    state[path] = entry
+    save_state(state, state_path)
+    print(f"✅ {kind}: {path} imported, {entry['rows']} rows ({entry['rejected']} rejected) "
+          f"in {time.perf_counter() - start_time:.1f} seconds")
+    return entry
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Resumable bulk import from CSV / JSONL files")
+    for kind in KINDS:
+        parser.add_argument(f"--{kind}", metavar="FILE", help=f"{kind} file (.csv or .jsonl)")
+    parser.add_argument("--clusters", default="1,2", help="MongoDB accounts to write to, e.g. 1 or 1,2")
+    parser.add_argument("--no-neo4j", action="store_true", help="write MongoDB only")
+    parser.add_argument("--no-redis", action="store_true",
+                        help="skip rebuilding the leaderboards, search index and fuzzy index")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE)
+    parser.add_argument("--restart", action="store_true", help="ignore checkpoints and import from the start")
+    args = parser.parse_args()
+
+    targets, dbs = [], []
+    for c in (c.strip() for c in args.clusters.split(",") if c.strip()):
+        db = connections.get_db(c)
+        dbs.append(db)
+        targets.append((f"Cluster {c}", db["researchers"], db["projects"], db["publications"]))
+
+    session = None if args.no_neo4j else connections.get_neo4j().session()
+    try:
+        for kind in KINDS:
+            path = getattr(args, kind)
+            if path:
+                import_file(kind, path, targets, session, args.batch_size, args.state_file, args.restart)
+    finally:
+        if session is not None:
+            session.close()
+
+    if not args.no_redis:
+        start_time = time.perf_counter()
+        rebuild_redis(connections.get_redis(), dbs[0])
+        connections.get_cache().invalidate("analytics", "*")
+        print(f"✅ Leaderboards, search index and fuzzy index rebuilt in {time.perf_counter() - start_time:.1f} seconds")
@@ -0,0 +1,254 @@
+# cache.py
+# Shared Redis read-through cache used by every cache_researcher / analytics cache.
+#  - pluggable serializer (msgpack when installed, JSON otherwise)
+#  - versioned key namespace: {namespace}:v{version}:{serializer}:{entity}:{id}
+#  - per-entity TTL policy, with jitter so hot keys don't all expire together
+#  - single-flight: when a key is missing only one caller (across processes)
+#    runs the loader, the others wait for its result instead of hitting
+#    MongoDB / Neo4j at the same time
+#  - optional in-process LRU/TTL tier in front of Redis (TwoTierCache),
+#    kept consistent across processes through a Redis pub/sub channel
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from redis.exceptions import WatchError
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+CACHE_NAMESPACE = "rc"
+CACHE_VERSION = 1
+INVALIDATION_CHANNEL = f"{CACHE_NAMESPACE}:invalidate"
+
+# Seconds per entity type; anything not listed uses "default"
+DEFAULT_TTLS = {"researcher": 300, "project": 300, "analytics": 60, "default": 60}
+
+# -----------------------------
+# Serializers
+# -----------------------------
+class JsonSerializer:
+    name = "json"
+
+    def dumps(self, value):
+        return json.dumps(value, default=str).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+class MsgpackSerializer:
+    name = "msgpack"
+
+    def dumps(self, value):
+        return msgpack.packb(value, use_bin_type=True, default=str)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+def default_serializer():
+    return MsgpackSerializer() if msgpack is not None else JsonSerializer()
+
+# -----------------------------
+# Read-through cache
+# client must be a binary Redis client (decode_responses=False)
+# -----------------------------
+class ReadThroughCache:
+    def __init__(self, client, serializer=None, namespace=CACHE_NAMESPACE, version=CACHE_VERSION,
+                 ttls=None, jitter=0.1, lock_ttl=10.0, wait_timeout=5.0):
+        self.client = client
+        self.serializer = serializer or default_serializer()
+        self.namespace = namespace
+        self.version = version
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.jitter = jitter
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+
+    def key(self, entity, ident):
+        return f"{self.namespace}:v{self.version}:{self.serializer.name}:{entity}:{ident}"
+
+    def ttl(self, entity):
+        base = self.ttls.get(entity, self.ttls["default"])
+        return max(1, int(base * (1 + random.uniform(0, self.jitter))))
+
+    def get(self, entity, ident):
+        data = self.client.get(self.key(entity, ident))
+        return None if data is None else self.serializer.loads(data)
+
+    def set(self, entity, ident, value):
+        self.client.set(self.key(entity, ident), self.serializer.dumps(value), ex=self.ttl(entity))
+
+    def invalidate(self, entity, ident):
+        # ident "*" drops every key of the entity type
+        key = self.key(entity, ident)
+        if ident == "*":
+            for k in self.client.scan_iter(match=key):
+                self.client.delete(k)
+        else:
+            self.client.delete(key)
+
+    def _release(self, lock_key, token):
+        # Delete the lock only if we still own it (it may have expired and been re-taken)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+            except WatchError:
+                pass
+
+    def get_or_load(self, entity, ident, loader):
+        # Returns (value, source) with source "cache", "loaded" or "waited"
+        key = self.key(entity, ident)
+        data = self.client.get(key)
+        if data is not None:
+            return self.serializer.loads(data), "cache"
+        return self._load(entity, key, loader)
+
+    def _load(self, entity, key, loader):
+        # Miss in Redis (already checked by the caller): one loader per key, the others wait
+        lock_key = key + ":lock"
+        token = uuid.uuid4().hex
+        if self.client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+            try:
+                value = loader()
+                if value is not None:
+                    self.client.set(key, self.serializer.dumps(value), ex=self.ttl(entity))
+                return value, "loaded"
+            finally:
+                self._release(lock_key, token)
+
+        # Someone else is loading this key: wait for their result
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            data = self.client.get(key)
+            if data is not None:
+                return self.serializer.loads(data), "waited"
+            if not self.client.exists(lock_key):
+                # The loader finished without a value (e.g. not found) or died
+                break
+        return loader(), "loaded"
+
+# -----------------------------
+# In-process tier: LRU with per-entry TTL and a memory bound
+# (size = length of the serialized value)
+# -----------------------------
+class LocalLRU:
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.used = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.used += size
+            while self.used > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._drop(key)
+
+    def _drop(self, key):
+        self.used -= self._entries.pop(key)[1]
+
+# -----------------------------
+# Two-tier cache: LocalLRU -> Redis -> loader
+# Writers call invalidate(); the key is deleted in Redis and a message on
+# INVALIDATION_CHANNEL tells every process to drop its local copy.
+# An ident of "*" invalidates a whole entity type.
+# -----------------------------
+class TwoTierCache(ReadThroughCache):
+    def __init__(self, client, local_max_bytes=16 * 1024 * 1024, local_ttl=5.0, **kwargs):
+        super().__init__(client, **kwargs)
+        self.local = LocalLRU(local_max_bytes, local_ttl)
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidate})
+        self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_invalidate(self, message):
+        key = message["data"].decode() if isinstance(message["data"], bytes) else message["data"]
+        if key.endswith(":*"):
+            self.local.delete_prefix(key[:-1])
+        else:
+            self.local.delete(key)
+
+    def get(self, entity, ident):
+        key = self.key(entity, ident)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        data = self.client.get(key)
+        if data is None:
+            return None
+        value = self.serializer.loads(data)
+        self.local.set(key, value, len(data))
+        return value
+
+    def set(self, entity, ident, value):
+        data = self.serializer.dumps(value)
+        key = self.key(entity, ident)
+        self.client.set(key, data, ex=self.ttl(entity))
+        self.local.set(key, value, len(data))
+
+    def invalidate(self, entity, ident):
+        super().invalidate(entity, ident)
+        key = self.key(entity, ident)
+        self._on_invalidate({"data": key})
+        self.client.publish(INVALIDATION_CHANNEL, key)
+
+    def get_or_load(self, entity, ident, loader):
+        key = self.key(entity, ident)
+        value = self.local.get(key)
+        if value is not None:
+            return value, "local"
+        # One Redis GET on a local miss: the Redis miss goes straight to the load
+        data = self.client.get(key)
+        if data is not None:
+            value = self.serializer.loads(data)
+            self.local.set(key, value, len(data))
+            return value, "cache"
+        value, source = self._load(entity, key, loader)
+        if value is not None:
+            self.local.set(key, value, len(self.serializer.dumps(value)))
+        return value, source
+
+    def close(self):
+        self._listener.stop()
+        self._pubsub.close()
@@ -0,0 +1,79 @@
+# cluster_reads.py
+# Cluster-aware read layer: the same read runs on both MongoDB accounts at
+# once (thread pool) instead of one after the other.
+#   first_non_empty -> point lookups, the first cluster with a result wins
+#   merged          -> list queries, results merged and de-duplicated
+# Every call also returns per-cluster timings so a slow account is visible.
+# Tasks run in the caller's context, so metrics keep the menu action tag.
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cluster-read")
+
+# -----------------------------
+# Timing helpers
+# -----------------------------
+def _timed(label, fn, col):
+    start_time = time.perf_counter()
+    try:
+        result, error = fn(col), None
+    except Exception as e:
+        result, error = None, e
+    return {"cluster": label, "result": result, "seconds": time.perf_counter() - start_time, "error": error}
+
+def print_timings(timings):
+    parts = []
+    for t in timings:
+        if t.get("pending"):
+            parts.append(f"{t['cluster']}: not needed")
+        elif t["error"] is not None:
+            parts.append(f"{t['cluster']}: failed after {t['seconds']:.6f}s ({t['error']})")
+        else:
+            parts.append(f"{t['cluster']}: {t['seconds']:.6f}s")
+    print("⏱️ " + " | ".join(parts))
+
+def raise_if_all_failed(timings):
+    errors = [t["error"] for t in timings if t.get("error") is not None]
+    if timings and len(errors) == len(timings):
+        raise errors[0]
+
+# -----------------------------
+# Fan-out primitives
+# clusters: [(label, collection), ...]; fn(collection) -> result
+# -----------------------------
+def fan_out(clusters, fn):
+    futures = [_executor.submit(contextvars.copy_context().run, _timed, label, fn, col) for label, col in clusters]
+    return [f.result() for f in futures]
+
+def first_non_empty(clusters, fn):
+    futures = {_executor.submit(contextvars.copy_context().run, _timed, label, fn, col): label for label, col in clusters}
+    pending = set(futures)
+    done_timings = []
+    result = None
+    while pending and result is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            t = f.result()
+            done_timings.append(t)
+            if result is None and t["error"] is None and t["result"]:
+                result = t["result"]
+    # Slower clusters keep running in the pool; their answer is not needed
+    timings = done_timings + [{"cluster": futures[f], "pending": True} for f in pending]
+    if result is None:
+        raise_if_all_failed(timings)
+    return result, timings
+
+def merged(clusters, fn, key):
+    timings = fan_out(clusters, fn)
+    raise_if_all_failed(timings)
+    seen = set()
+    rows = []
+    for t in timings:
+        for doc in t["result"] or []:
+            k = key(doc)
+            if k not in seen:
+                seen.add(k)
+                rows.append(doc)
+    return rows, timings
@@ -0,0 +1,232 @@
+# collab_path.py
+# "How are researchers A and B connected?": shortest collaboration path over
+# WORKED_ON (shared project -> TEAMMATE) and AUTHORED (shared publication ->
+# CO_AUTHOR) links, without an unbounded Cypher path query.
+#  - the graph is researcher <-> project / publication (bipartite), held as
+#    CSR arrays (indptr + indices, int32): one entry per membership, instead of
+#    one per researcher pair
+#  - bidirectional BFS from both ends, always growing the smaller frontier
+#    (a whole frontier per numpy step), stopped at max_hops
+#    researcher-to-researcher hops
+#  - answers are kept in an LRU; add_group() records new projects /
+#    publications on top of the arrays and clears it
+# Built from MongoDB (`participants`, `authors`) or from Neo4j.
+#
+#   python collab_path.py "Eman Ali" "Ali Zaid" --source mongo --max-hops 6
+
+import argparse
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_HOPS = 6
+DEFAULT_CACHE_SIZE = 10000
+RELATION = {"project": "TEAMMATE", "publication": "CO_AUTHOR"}
+
+NEO4J_MEMBERSHIP_QUERY = """
+MATCH (r:Researcher)-[:WORKED_ON]->(p:Project)
+RETURN 'project' AS kind, p.title AS title, collect(DISTINCT r.name) AS members
+UNION ALL
+MATCH (r:Researcher)-[:AUTHORED]->(pub:Publication)
+RETURN 'publication' AS kind, pub.title AS title, collect(DISTINCT r.name) AS members
+"""
+
+class CollaborationGraph:
+    def __init__(self, groups, researchers=None):
+        # groups: iterable of (kind, title, member names), kind "project" or "publication";
+        # researchers: names to keep (None = everyone mentioned)
+        known = set(researchers) if researchers is not None else None
+        self.nodes = []    # node id -> (kind, name); researchers are kind "researcher"
+        self.ids = {}      # (kind, name) -> node id
+        src, dst = [], []
+        for kind, title, members in groups:
+            members = [m for m in dict.fromkeys(members or []) if known is None or m in known]
+            if not members:
+                continue
+            g = self._node(kind, title)
+            for name in members:
+                src.append(self._node("researcher", name))
+                dst.append(g)
+        for name in known or ():
+            self._node("researcher", name)
+
+        # Both directions: researcher -> group and group -> researcher
+        members, group_ids = np.asarray(src, dtype=np.int32), np.asarray(dst, dtype=np.int32)
+        src, dst = np.concatenate([members, group_ids]), np.concatenate([group_ids, members])
+        order = np.argsort(src, kind="stable")
+        self.indices = dst[order]
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(self.nodes)), out=self.indptr[1:])
+        self.extra = {}    # node id -> neighbours added after the arrays were built
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self.cache_size = DEFAULT_CACHE_SIZE
+
+    def _node(self, kind, name):
+        key = (kind, name)
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.nodes)
+            self.nodes.append(key)
+        return node
+
+    @classmethod
+    def from_mongo(cls, mongo_db):
+        groups = [("project", p["title"], p.get("participants", []))
+                  for p in mongo_db["projects"].find({}, {"_id": 0, "title": 1, "participants": 1})]
+        groups += [("publication", pub["title"], pub.get("authors", []))
+                   for pub in mongo_db["publications"].find({}, {"_id": 0, "title": 1, "authors": 1})]
+        researchers = [r["name"] for r in mongo_db["researchers"].find({}, {"_id": 0, "name": 1})]
+        return cls(groups, researchers)
+
+    @classmethod
+    def from_neo4j(cls, driver):
+        with driver.session(database="neo4j") as session:
+            groups = [(rec["kind"], rec["title"], rec["members"]) for rec in session.run(NEO4J_MEMBERSHIP_QUERY)]
+            researchers = [rec["name"] for rec in session.run("MATCH (r:Researcher) RETURN r.name AS name")]
+        return cls(groups, researchers)
+
+    # -----------------------------
+    # Updates after the build (add_project / add_researcher)
+    # -----------------------------
+    def add_group(self, kind, title, members):
+        with self._lock:
+            g = self._node(kind, title)
+            for name in dict.fromkeys(members):
+                r = self._node("researcher", name)
+                self.extra.setdefault(r, []).append(g)
+                self.extra.setdefault(g, []).append(r)
+            self._cache.clear()
+
+    def add_researcher(self, name):
+        with self._lock:
+            self._node("researcher", name)
+
+    # -----------------------------
+    # Bidirectional BFS, one whole frontier per numpy step
+    # -----------------------------
+    def _expand(self, frontier):
+        # frontier node ids -> (source, neighbour) arrays over every link of those nodes
+        built = frontier[frontier < len(self.indptr) - 1]
+        starts = self.indptr[built]
+        lengths = self.indptr[built + 1] - starts
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        sources, neighbours = np.repeat(built, lengths), self.indices[offsets].astype(np.int64)
+        if self.extra:
+            added = [(u, v) for u in frontier.tolist() for v in self.extra.get(u, ())]
+            if added:
+                more = np.asarray(added, dtype=np.int64)
+                sources, neighbours = np.concatenate([sources, more[:, 0]]), np.concatenate([neighbours, more[:, 1]])
+        return sources, neighbours
+
+    def _scratch(self):
+        # Per-thread visit arrays, reused between searches: a node is visited
+        # in this search when its stamp equals the current generation
+        local = self._local
+        size = len(self.nodes)
+        if getattr(local, "size", 0) < size:
+            local.size = size + 1024
+            local.stamp = np.zeros((2, local.size), dtype=np.int64)
+            local.parent = np.full((2, local.size), -1, dtype=np.int64)
+            local.distance = np.zeros((2, local.size), dtype=np.int32)
+            local.generation = 0
+        local.generation += 1
+        return local
+
+    def _search(self, a, b, max_depth):
+        # Node ids -> node path a..b, or None when farther than max_depth links
+        scratch = self._scratch()
+        g, stamp, parent, distance = scratch.generation, scratch.stamp, scratch.parent, scratch.distance
+        for side, node in ((0, a), (1, b)):
+            stamp[side, node], parent[side, node], distance[side, node] = g, -1, 0
+        frontiers = [np.array([a], dtype=np.int64), np.array([b], dtype=np.int64)]
+        levels = [0, 0]
+        depth = 0
+        while len(frontiers[0]) and len(frontiers[1]) and depth < max_depth:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            sources, neighbours = self._expand(frontiers[side])
+            fresh = stamp[side, neighbours] != g
+            sources, neighbours = sources[fresh], neighbours[fresh]
+            # A node reached from several sources keeps one of them (the last write);
+            # comparing against it leaves each new node exactly once, without sorting
+            parent[side, neighbours] = sources
+            neighbours = neighbours[parent[side, neighbours] == sources]
+            levels[side] += 1
+            stamp[side, neighbours] = g
+            distance[side, neighbours] = levels[side]
+            meets = neighbours[stamp[1 - side, neighbours] == g]
+            if len(meets):
+                # All meeting points are levels[side] away on this side: take the one closest to the other end
+                return self._join(int(meets[np.argmin(distance[1 - side, meets])]), parent)
+            frontiers[side] = neighbours
+            depth += 1
+        return None
+
+    def _join(self, meet, parent):
+        path, node = [], meet
+        while node != -1:
+            path.append(node)
+            node = int(parent[0, node])
+        path.reverse()
+        node = int(parent[1, meet])
+        while node != -1:
+            path.append(node)
+            node = int(parent[1, node])
+        return path
+
+    def shortest_path(self, a, b, max_hops=DEFAULT_MAX_HOPS):
+        # -> {"hops", "path": [{"type", "name"}...], "steps": [{"from", "to", "relation", "via"}...]}
+        # or None (unknown researcher, or not connected within max_hops)
+        key = (a, b, max_hops)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        start, goal = self.ids.get(("researcher", a)), self.ids.get(("researcher", b))
+        if start is None or goal is None:
+            return None
+        nodes = [start] if start == goal else self._search(start, goal, 2 * max_hops)
+        result = None
+        if nodes is not None:
+            path = [{"type": self.nodes[n][0], "name": self.nodes[n][1]} for n in nodes]
+            steps = [{"from": path[i]["name"], "to": path[i + 2]["name"],
+                      "relation": RELATION[path[i + 1]["type"]], "via": path[i + 1]["name"]}
+                     for i in range(0, len(path) - 2, 2)]
+            result = {"hops": len(steps), "path": path, "steps": steps}
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+def print_path(a, b, result, elapsed=None):
+    took = f" in {elapsed * 1000:.3f} ms" if elapsed is not None else ""
+    if result is None:
+        print(f"No collaboration path between '{a}' and '{b}'{took}")
+        return
+    print(f"✅ {a} → {b}: {result['hops']} hop(s){took}")
+    for step in result["steps"]:
+        print(f"   {step['from']} -[{step['relation']}: {step['via']}]- {step['to']}")
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Shortest collaboration path between two researchers")
+    parser.add_argument("source_name")
+    parser.add_argument("target_name")
+    parser.add_argument("--source", choices=("mongo", "neo4j"), default="mongo", help="where the graph is read from")
+    parser.add_argument("--max-hops", type=int, default=DEFAULT_MAX_HOPS)
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    graph = (CollaborationGraph.from_neo4j(connections.get_neo4j()) if args.source == "neo4j"
+             else CollaborationGraph.from_mongo(connections.get_db(1)))
+    print(f"✅ Graph loaded from {args.source}: {len(graph.nodes)} nodes, {len(graph.indices)} links "
+          f"in {time.perf_counter() - start_time:.2f} seconds")
+    start_time = time.perf_counter()
+    found = graph.shortest_path(args.source_name, args.target_name, args.max_hops)
+    print_path(args.source_name, args.target_name, found, time.perf_counter() - start_time)
@@ -0,0 +1,158 @@
+# connections.py
+# Shared connection registry for the menu and the one-off scripts.
+#  - settings come from .env (MONGO_URI_n, NEO4J_*, REDIS_*, *_POOL_SIZE)
+#  - nothing is imported or opened at import time: each client (and its
+#    driver package) is created on first use, then reused by every operation
+#    through the driver's own connection pool
+#  - everything that was opened is closed once, at exit (or by close_all())
+#  - startup time: record_startup(script) stores the time from process
+#    start to "ready" as a metric and, with STARTUP_LOG set, as a JSONL line
+#
+#   db = connections.get_db(1)            # MongoDB cluster 1, research_db
+#   driver = connections.get_neo4j()       # reads cached by query_cache.py
+#   r = connections.get_redis()           # decode_responses=True
+#   cache = connections.get_cache()       # read-through cache (LOCAL_CACHE=1: two tiers)
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+MONGO_POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "50"))
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", "50"))
+DATABASE = "research_db"
+STARTUP_LOG = os.getenv("STARTUP_LOG")
+_IMPORTED_AT = time.perf_counter()
+
+_lock = threading.RLock()
+_clients = {}     # name -> client, in creation order
+_owned = set()    # names created here (closed at exit); overrides belong to the caller
+
+# -----------------------------
+# Factories (the driver package is imported here, not at module level)
+# -----------------------------
+def _mongo_client(n):
+    from pymongo import MongoClient
+    label = f"Cluster {n}"
+    return MongoClient(os.getenv(f"MONGO_URI_{n}"), maxPoolSize=MONGO_POOL_SIZE,
+                       event_listeners=metrics.mongo_listeners(label))
+
+def _neo4j_driver():
+    from neo4j import GraphDatabase
+    import query_cache
+    driver = metrics.instrument_neo4j(GraphDatabase.driver(
+        os.getenv("NEO4J_URI"),
+        auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")),
+        max_connection_pool_size=NEO4J_POOL_SIZE,
+    ))
+    # Reads answered from Redis until a write through this driver touches their labels (QUERY_CACHE=0: off)
+    return query_cache.wrap(driver, get_redis(binary=True))
+
+def _redis_client(binary):
+    import redis
+    client = redis.Redis(
+        host=os.getenv("REDIS_HOST"),
+        port=int(os.getenv("REDIS_PORT")),
+        password=os.getenv("REDIS_PASSWORD"),
+        decode_responses=not binary,
+        max_connections=REDIS_POOL_SIZE,
+    )
+    return metrics.instrument_redis(client, target="Redis cache" if binary else "Redis")
+
+def _cache():
+    from cache import ReadThroughCache, TwoTierCache
+    client = get_redis(binary=True)
+    return metrics.instrument_cache(
+        TwoTierCache(client) if os.getenv("LOCAL_CACHE") == "1" else ReadThroughCache(client)
+    )
+
+def _get(name, factory):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory()
+            _owned.add(name)
+        return _clients[name]
+
+# -----------------------------
+# Accessors
+# -----------------------------
+def get_mongo(n=1):
+    return _get(f"mongo:{n}", lambda: _mongo_client(n))
+
+def get_db(n=1):
+    return _get(f"db:{n}", lambda: get_mongo(n)[DATABASE])
+
+def get_neo4j():
+    return _get("neo4j", _neo4j_driver)
+
+def get_redis(binary=False):
+    # binary=True: raw bytes, for the msgpack cache serializer
+    return _get("redis:binary" if binary else "redis", lambda: _redis_client(binary))
+
+def get_cache():
+    return _get("cache", _cache)
+
+def override(name, client):
+    # Use an existing object instead of creating one (bench.py stand-ins).
+    # name: "db:1", "db:2", "neo4j", "redis", "redis:binary" or "cache"
+    with _lock:
+        _clients[name] = client
+        _owned.discard(name)
+
+# -----------------------------
+# Cleanup
+# -----------------------------
+def _close(client):
+    close = getattr(client, "close", None)
+    if close is not None:
+        close()
+
+def close_all():
+    with _lock:
+        items = list(_clients.items())
+        owned = set(_owned)
+        _clients.clear()
+        _owned.clear()
+    # Newest first: the cache goes before the Redis client it uses
+    for name, client in reversed(items):
+        if name in owned and not name.startswith("db:"):
+            try:
+                _close(client)
+            except Exception as e:
+                print(f"⚠️ closing {name} failed: {e}")
+
+atexit.register(close_all)
+
+# -----------------------------
+# Startup time
+# -----------------------------
+def process_uptime():
+    # Seconds since the interpreter started (Linux /proc; elsewhere since this module was imported)
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED_AT
+
+def record_startup(script):
+    seconds = process_uptime()
+    metrics.registry.observe(metrics.STARTUP_SECONDS, {"script": script}, seconds)
+    if STARTUP_LOG:
+        with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"script": script, "seconds": round(seconds, 4),
+                                "at": time.strftime("%Y-%m-%dT%H:%M:%S")}) + "\n")
+    return seconds
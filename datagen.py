@@ -0,0 +1,200 @@
+# datagen.py
+# Deterministic synthetic dataset at production volumes.
+#  - researchers with a department and interests (same vocabulary as mongo_setup_complete.py)
+#  - projects with a heavy-tailed team size; popular researchers join many projects (Zipf)
+#  - publications per project, authored by a skewed subset of the team
+# Everything is a generator, so documents are streamed to MongoDB in bounded
+# chunks and memory stays flat. The same seed always gives the same data,
+# including the _id values, so the Neo4j loader and the benchmarks can
+# regenerate it instead of reading it back.
+# Afterwards the Redis leaderboards, search index and fuzzy index are rebuilt
+# from MongoDB (as bulk_import.py does; skip with --no-redis).
+#
+#   python datagen.py --researchers 1000000 --projects 200000 --clusters 1,2 --clear --neo4j
+
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from bson import ObjectId
+
+DEPARTMENTS = {
+    "Computer Science": ["AI", "Data Science", "Cybersecurity", "Networks", "Robotics",
+                         "Software Engineering", "Databases", "Machine Learning"],
+    "Biology": ["Genetics", "Microbiology", "Ecology", "Immunology", "Botany"],
+    "Physics": ["Quantum Mechanics", "Astrophysics", "Thermodynamics", "Particle Physics", "Optics"],
+    "Chemistry": ["Organic Chemistry", "Nanomaterials", "Analytical Chemistry", "Polymer Chemistry", "Biochemistry"],
+    "Mathematics": ["Algebra", "Topology", "Number Theory", "Combinatorics", "Statistics", "Calculus"],
+}
+DEPARTMENT_NAMES = list(DEPARTMENTS)
+
+FIRST_NAMES = ["Eman", "Sara", "Hajar", "Tariq", "Mona", "Ali", "Dina", "Salma", "Khaled", "Rana",
+               "Omar", "Laila", "Youssef", "Amira", "Adel", "Nour", "Fatma", "Karim", "Mariam", "Tamer",
+               "Rania", "Mahmoud", "Heba", "Mohamed", "Noha", "Hany", "Lina", "Amr", "Aya", "Dalia",
+               "Hossam", "Yara", "Ahmed", "Huda", "Nada", "Fadi", "Hassan", "Lamia", "Salwa", "Ziad"]
+LAST_NAMES = ["Ali", "Ahmad", "Hassan", "Youssef", "Zaid", "Omar", "Tarek", "Mahmoud", "Sami", "Amin",
+              "Nabil", "Khalid", "Fathy", "Adel", "Salah", "Nader", "Mostafa", "Khaled", "Fawzy", "Samir",
+              "Khalil", "Fathi", "Jaber", "Mahdi", "Nasser", "Hani", "Fadi", "Said", "Kamal", "Rashed"]
+
+# _id prefixes, so generated ids are deterministic and never collide across kinds
+_KIND = {"researchers": 1, "projects": 2, "publications": 3}
+
+class DatasetSpec:
+    def __init__(self, researchers=1000, projects=200, pubs_per_project=2.0, seed=42,
+                 team_alpha=1.6, max_team=50, popularity_skew=1.1):
+        self.researchers = researchers
+        self.projects = projects
+        self.pubs_per_project = pubs_per_project
+        self.seed = seed
+        self.team_alpha = team_alpha          # Pareto shape of the team size
+        self.max_team = max_team
+        self.popularity_skew = popularity_skew  # Zipf exponent of project membership
+
+# -----------------------------
+# Deterministic identities
+# -----------------------------
+def object_id(kind, seed, i):
+    return ObjectId(f"{_KIND[kind]:02x}{seed % 2 ** 32:08x}{i:014x}")
+
+def researcher_name(i):
+    base = len(FIRST_NAMES) * len(LAST_NAMES)
+    name = f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+    return name if i < base else f"{name} {i // base + 1}"
+
+# -----------------------------
+# Generators
+# -----------------------------
+def generate_researchers(spec):
+    rng = random.Random(f"{spec.seed}:researchers")
+    for i in range(spec.researchers):
+        department = rng.choice(DEPARTMENT_NAMES)
+        interests = rng.sample(DEPARTMENTS[department], k=min(2, len(DEPARTMENTS[department])))
+        yield {"_id": object_id("researchers", spec.seed, i), "name": researcher_name(i),
+               "department": department, "interests": interests}
+
+def _team_size(rng, spec):
+    return min(spec.max_team, spec.researchers, 1 + int(rng.paretovariate(spec.team_alpha)))
+
+def generate_projects_and_publications(spec):
+    # Yields ("projects", doc) and ("publications", doc) in one pass
+    rng = random.Random(f"{spec.seed}:projects")
+    # Zipf popularity over researcher indices (O(researchers) floats, not documents)
+    cum_weights = list(accumulate(1.0 / (k + 1) ** spec.popularity_skew for k in range(spec.researchers)))
+    population = range(spec.researchers)
+    pub_index = 0
+    for j in range(spec.projects):
+        size = _team_size(rng, spec)
+        members = []
+        while len(members) < size:
+            for idx in rng.choices(population, cum_weights=cum_weights, k=size - len(members)):
+                if idx not in members:
+                    members.append(idx)
+        participants = [researcher_name(i) for i in members]
+        topic = rng.choice(DEPARTMENTS[rng.choice(DEPARTMENT_NAMES)])
+        title = f"{topic} Project {j + 1}"
+
+        n_pubs = int(rng.expovariate(1.0 / spec.pubs_per_project)) if spec.pubs_per_project > 0 else 0
+        pub_titles = []
+        for k in range(n_pubs):
+            pub_titles.append(f"{topic} Study {j + 1}.{k + 1}")
+        yield "projects", {"_id": object_id("projects", spec.seed, j), "title": title,
+                           "description": f"Synthetic {topic} project", "participants": participants,
+                           "publications": pub_titles}
+
+        for pub_title in pub_titles:
+            # Lead author plus each other member with a decaying probability
+            authors = [participants[0]] + [p for n, p in enumerate(participants[1:], start=1)
+                                           if rng.random() < 1.0 / math.sqrt(n + 1)]
+            yield "publications", {"_id": object_id("publications", spec.seed, pub_index), "title": pub_title,
+                                   "project": title, "authors": authors, "year": rng.randint(2015, 2026)}
+            pub_index += 1
+
+def generate_projects(spec):
+    return (doc for kind, doc in generate_projects_and_publications(spec) if kind == "projects")
+
+def generate_publications(spec):
+    return (doc for kind, doc in generate_projects_and_publications(spec) if kind == "publications")
+
+def generate_all(spec):
+    for doc in generate_researchers(spec):
+        yield "researchers", doc
+    yield from generate_projects_and_publications(spec)
+
+# -----------------------------
+# Streaming writer: bounded chunks, same chunk to every cluster in parallel
+# -----------------------------
+def write_chunked(dbs, stream, chunk_size=5000):
+    counts = {kind: 0 for kind in _KIND}
+    buffers = {kind: [] for kind in _KIND}
+    with ThreadPoolExecutor(max_workers=max(1, len(dbs))) as pool:
+        def flush(kind):
+            chunk = buffers[kind]
+            if chunk:
+                list(pool.map(lambda db: db[kind].insert_many(chunk, ordered=False), dbs))
+                counts[kind] += len(chunk)
+                buffers[kind] = []
+
+        for kind, doc in stream:
+            buffers[kind].append(doc)
+            if len(buffers[kind]) >= chunk_size:
+                flush(kind)
+        for kind in _KIND:
+            flush(kind)
+    return counts
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Generate and load a synthetic research dataset")
+    parser.add_argument("--researchers", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--pubs-per-project", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--clusters", default="1,2", help="MongoDB accounts to write to, e.g. 1 or 1,2")
+    parser.add_argument("--clear", action="store_true", help="delete existing documents first")
+    parser.add_argument("--neo4j", action="store_true", help="also load the graph with the batched loader")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-redis", action="store_true",
+                        help="skip rebuilding the leaderboards, search index and fuzzy index")
+    args = parser.parse_args()
+
+    spec = DatasetSpec(args.researchers, args.projects, args.pubs_per_project, args.seed)
+    dbs = [connections.get_db(c.strip()) for c in args.clusters.split(",") if c.strip()]
+
+    if args.clear:
+        for db in dbs:
+            for kind in _KIND:
+                db[kind].delete_many({})
+        print("✅ Existing documents deleted")
+
+    start_time = time.perf_counter()
+    counts = write_chunked(dbs, generate_all(spec), args.chunk_size)
+    elapsed = time.perf_counter() - start_time
+    total = sum(counts.values())
+    print(f"✅ Wrote {counts['researchers']} researchers, {counts['projects']} projects, "
+          f"{counts['publications']} publications to {len(dbs)} cluster(s) "
+          f"in {elapsed:.1f} seconds ({total / elapsed if elapsed else 0:,.0f} docs/s)")
+
+    if not args.no_redis:
+        from bulk_import import rebuild_redis
+        start_time = time.perf_counter()
+        rebuild_redis(connections.get_redis(), dbs[0])
+        connections.get_cache().invalidate("analytics", "*")
+        print(f"✅ Leaderboards, search index and fuzzy index rebuilt in {time.perf_counter() - start_time:.1f} seconds")
+
+    if args.neo4j:
+        from graph_loader import load_graph
+        from schema import apply_neo4j_schema
+
+        driver = connections.get_neo4j()
+        apply_neo4j_schema(driver)
+        with driver.session() as session:
+            load_graph(session,
+                       researchers=lambda: generate_researchers(spec),
+                       projects=lambda: generate_projects(spec),
+                       publications=lambda: generate_publications(spec),
+                       batch_size=args.batch_size)
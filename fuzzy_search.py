@@ -0,0 +1,310 @@
+# fuzzy_search.py
+# Autocomplete and "did you mean" for researcher names and project /
+# publication titles, so a typo gets candidates instead of a failed lookup.
+#  - Redis holds what every process shares, built at seed time (main.py,
+#    mongo_setup_complete.py or --rebuild):
+#      fz:v1:<kind>:names   set of every name / title (kind: researcher, project, publication)
+#      fz:v1:<kind>:log     list of the names added since the build, in order
+#      fz:v1:meta           hash: build id, build time, count per kind
+#  - each process loads them once into an in-memory index: sorted normalized
+#    names for prefix matches (bisect) and trigram postings as CSR arrays for
+#    fuzzy matches (one numpy pass, no Redis round trip per lookup)
+#  - add() records a new name in Redis and in the local index; other
+#    processes pick it up from the log at most `refresh` seconds later
+#    (a new build id means a full reload)
+# Fuzzy score: trigram similarity, shared / union of the normalized forms'
+# trigrams ("  ali zaid ").
+#
+#   python fuzzy_search.py --rebuild
+#   python fuzzy_search.py researcher "eman aly"
+
+import argparse
+import bisect
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+
+PREFIX = "fz:v1"
+META = f"{PREFIX}:meta"
+KINDS = ("researcher", "project", "publication")
+DEFAULT_LIMIT = 5
+DEFAULT_REFRESH = 5.0    # seconds between checks for names added by other processes
+MIN_SIMILARITY = 0.3
+
+def normalize(text):
+    return re.sub(r"\s+", " ", str(text)).strip().casefold()
+
+def trigrams(text):
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def names_key(kind):
+    return f"{PREFIX}:{kind}:names"
+
+def log_key(kind):
+    return f"{PREFIX}:{kind}:log"
+
+def _check(kind):
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind '{kind}' (use {', '.join(KINDS)})")
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+# -----------------------------
+# In-memory index for one kind
+# -----------------------------
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = []       # id -> name
+        self.ids = {}         # name -> id
+        self.sorted = []      # (normalized, id), for prefix matches
+        self.grams = {}       # trigram -> gram id
+        gram_rows, name_ids, sizes = [], [], []
+        for name in names:
+            name = str(name).strip()
+            if not normalize(name) or name in self.ids:
+                continue
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.sorted.append((normalize(name), i))
+            grams = trigrams(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                gram_rows.append(self.grams.setdefault(gram, len(self.grams)))
+                name_ids.append(i)
+        self.sorted.sort()
+        self.sizes = np.asarray(sizes, dtype=np.int32)
+        # Postings: gram id -> name ids (CSR)
+        gram_rows = np.asarray(gram_rows, dtype=np.int64)
+        order = np.argsort(gram_rows, kind="stable")
+        self.postings = np.asarray(name_ids, dtype=np.int32)[order]
+        self.indptr = np.zeros(len(self.grams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_rows, minlength=len(self.grams)), out=self.indptr[1:])
+        self.extra = {}       # gram id -> name ids added after the arrays were built
+
+    def add(self, name):
+        name = str(name).strip()
+        if not normalize(name) or name in self.ids:
+            return False
+        i = self.ids[name] = len(self.names)
+        self.names.append(name)
+        bisect.insort(self.sorted, (normalize(name), i))
+        grams = trigrams(name)
+        self.sizes = np.append(self.sizes, np.int32(len(grams)))
+        for gram in grams:
+            self.extra.setdefault(self.grams.setdefault(gram, len(self.grams)), []).append(i)
+        return True
+
+    def prefix(self, text, limit):
+        text = normalize(text)
+        start = bisect.bisect_left(self.sorted, (text, -1))
+        found = []
+        for normalized, i in self.sorted[start:start + limit]:
+            if not normalized.startswith(text):
+                break
+            found.append(self.names[i])
+        return found
+
+    def fuzzy(self, text, limit, min_similarity=MIN_SIMILARITY, exclude=()):
+        # -> [(name, similarity)], best first, ties by name
+        grams = [self.grams[g] for g in trigrams(text) if g in self.grams]
+        if not grams or limit <= 0:
+            return []
+        built = [g for g in grams if g < len(self.indptr) - 1]
+        parts = [self.postings[self.indptr[g]:self.indptr[g + 1]] for g in built]
+        parts += [np.asarray(self.extra[g], dtype=np.int32) for g in grams if g in self.extra]
+        candidates, shared = np.unique(np.concatenate(parts), return_counts=True)
+        similarity = shared / (len(trigrams(text)) + self.sizes[candidates] - shared)
+        keep = similarity >= min_similarity
+        candidates, similarity = candidates[keep], similarity[keep]
+        if len(candidates) > limit + len(exclude):
+            top = np.argpartition(-similarity, limit + len(exclude))[:limit + len(exclude)]
+            candidates, similarity = candidates[top], similarity[top]
+        ranked = sorted(((-s, self.names[i]) for i, s in zip(candidates.tolist(), similarity.tolist())))
+        return [(name, -s) for s, name in ranked if name not in exclude][:limit]
+
+# -----------------------------
+# Matcher: the three kinds, loaded from Redis and kept current
+# -----------------------------
+class FuzzyMatcher:
+    def __init__(self, client, refresh=DEFAULT_REFRESH):
+        self.client = client
+        self.refresh = refresh
+        self.indexes = {}     # kind -> NameIndex
+        self.build = None     # build id the indexes were loaded from
+        self.offsets = {}     # kind -> log entries already applied
+        self.checked = 0.0
+        self._lock = threading.Lock()
+
+    # ---- loading (commands queued on a sync or async pipeline) ----
+    def _queue_load(self, pipe):
+        pipe.hget(META, "build")
+        for kind in KINDS:
+            pipe.smembers(names_key(kind))
+            pipe.lrange(log_key(kind), 0, -1)
+
+    def _apply_load(self, replies):
+        build, rest = replies[0], replies[1:]
+        indexes, offsets = {}, {}
+        for n, kind in enumerate(KINDS):
+            members, log = rest[2 * n], rest[2 * n + 1]
+            # Set members in a fixed order, then the log in insertion order
+            indexes[kind] = NameIndex(sorted(_decode(m) for m in members) + [_decode(m) for m in log])
+            offsets[kind] = len(log)
+        with self._lock:
+            self.indexes, self.offsets, self.build = indexes, offsets, _decode(build)
+            self.checked = time.monotonic()
+
+    def _queue_poll(self, pipe):
+        pipe.hget(META, "build")
+        for kind in KINDS:
+            pipe.lrange(log_key(kind), self.offsets.get(kind, 0), -1)
+
+    def _apply_poll(self, replies):
+        # False when the index was rebuilt since the load (a full reload is needed)
+        if _decode(replies[0]) != self.build:
+            return False
+        with self._lock:
+            for kind, added in zip(KINDS, replies[1:]):
+                for name in added:
+                    self.indexes[kind].add(_decode(name))
+                self.offsets[kind] = self.offsets.get(kind, 0) + len(added)
+            self.checked = time.monotonic()
+        return True
+
+    def _due(self):
+        return not self.indexes or time.monotonic() - self.checked >= self.refresh
+
+    def sync(self):
+        if not self._due():
+            return
+        if self.indexes:
+            pipe = self.client.pipeline(transaction=False)
+            self._queue_poll(pipe)
+            if self._apply_poll(pipe.execute()):
+                return
+        pipe = self.client.pipeline(transaction=False)
+        self._queue_load(pipe)
+        self._apply_load(pipe.execute())
+
+    async def async_sync(self):
+        if not self._due():
+            return
+        if self.indexes:
+            pipe = self.client.pipeline(transaction=False)
+            self._queue_poll(pipe)
+            if self._apply_poll(await pipe.execute()):
+                return
+        pipe = self.client.pipeline(transaction=False)
+        self._queue_load(pipe)
+        self._apply_load(await pipe.execute())
+
+    # ---- lookups ----
+    def _suggest(self, kind, text, limit, min_similarity):
+        # -> [{"name", "score", "match"}]: prefix matches first, then fuzzy ones
+        _check(kind)
+        if not normalize(text):
+            return []
+        index = self.indexes[kind]
+        prefixed = index.prefix(text, limit)
+        found = [{"name": name, "score": 1.0, "match": "prefix"} for name in prefixed]
+        for name, similarity in index.fuzzy(text, limit - len(found), min_similarity, set(prefixed)):
+            found.append({"name": name, "score": round(similarity, 3), "match": "fuzzy"})
+        return found
+
+    def suggest(self, kind, text, limit=DEFAULT_LIMIT, min_similarity=MIN_SIMILARITY):
+        self.sync()
+        return self._suggest(kind, text, limit, min_similarity)
+
+    async def asuggest(self, kind, text, limit=DEFAULT_LIMIT, min_similarity=MIN_SIMILARITY):
+        await self.async_sync()
+        return self._suggest(kind, text, limit, min_similarity)
+
+    # ---- inserts ----
+    def _queue_add(self, pipe, kind, names):
+        _check(kind)
+        names = [str(n).strip() for n in names if normalize(n)]
+        if names:
+            pipe.sadd(names_key(kind), *names)
+            pipe.rpush(log_key(kind), *names)
+        return names
+
+    def _apply_add(self, kind, names):
+        with self._lock:
+            if kind in self.indexes:
+                for name in names:
+                    self.indexes[kind].add(name)
+
+    def add(self, kind, *names):
+        pipe = self.client.pipeline(transaction=False)
+        names = self._queue_add(pipe, kind, names)
+        pipe.execute()
+        self._apply_add(kind, names)
+
+    async def aadd(self, kind, *names):
+        pipe = self.client.pipeline(transaction=False)
+        names = self._queue_add(pipe, kind, names)
+        await pipe.execute()
+        self._apply_add(kind, names)
+
+# -----------------------------
+# Build (seed time)
+# -----------------------------
+def rebuild(client, researchers=(), projects=(), publications=(), batch_size=1000):
+    # names / titles per kind (plain strings); replaces the whole index
+    pipe = client.pipeline(transaction=False)
+    pipe.delete(META, *(key for kind in KINDS for key in (names_key(kind), log_key(kind))))
+    counts = {}
+    for kind, names in zip(KINDS, (researchers, projects, publications)):
+        batch = []
+        for name in names:
+            if normalize(name):
+                batch.append(str(name).strip())
+            if len(batch) == batch_size:
+                pipe.sadd(names_key(kind), *batch)
+                pipe.execute()
+                batch = []
+        if batch:
+            pipe.sadd(names_key(kind), *batch)
+        pipe.scard(names_key(kind))
+        counts[kind] = pipe.execute()[-1]
+    pipe.hset(META, mapping=dict(counts, build=uuid.uuid4().hex, built_at=time.strftime("%Y-%m-%dT%H:%M:%S")))
+    pipe.execute()
+    return counts
+
+def print_suggestions(found):
+    if found:
+        print("Did you mean: " + ", ".join(f"'{s['name']}'" for s in found) + "?")
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Autocomplete / fuzzy match researcher names and titles")
+    parser.add_argument("kind", nargs="?", choices=KINDS)
+    parser.add_argument("text", nargs="?")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from MongoDB (cluster 1)")
+    args = parser.parse_args()
+
+    r = connections.get_redis()
+    if args.rebuild:
+        db = connections.get_db(1)
+        counts = rebuild(r, (d["name"] for d in db["researchers"].find({}, {"_id": 0, "name": 1})),
+                         (d["title"] for d in db["projects"].find({}, {"_id": 0, "title": 1})),
+                         (d["title"] for d in db["publications"].find({}, {"_id": 0, "title": 1})))
+        print("✅ Fuzzy index rebuilt: " + ", ".join(f"{n} {kind}s" for kind, n in counts.items()))
+    if args.kind and args.text:
+        matcher = FuzzyMatcher(r)
+        start_time = time.perf_counter()
+        matcher.sync()
+        print(f"✅ Index loaded in {time.perf_counter() - start_time:.3f} seconds")
+        start_time = time.perf_counter()
+        found = matcher.suggest(args.kind, args.text, args.limit)
+        print(f"{len(found)} candidates in {(time.perf_counter() - start_time) * 1000:.3f} ms")
+        for s in found:
+            print(f"{s['name']} ({s['match']}, {s['score']})")
@@ -0,0 +1,158 @@
+# graph_loader.py
+# Batched Neo4j loader: every node label and relationship type is written
+# with one UNWIND $rows statement per batch instead of one tx.run per row.
+
+import time
+from itertools import islice
+
+DEFAULT_BATCH_SIZE = 1000
+
+# -----------------------------
+# Cypher statements (one per label / relationship type)
+# -----------------------------
+RESEARCHER_QUERY = """
+UNWIND $rows AS row
+MERGE (r:Researcher {name: row.name})
+SET r.department = row.department, r.interests = row.interests, r.mongo_id = coalesce(row.mongo_id, r.mongo_id)
+"""
+
+PROJECT_QUERY = """
+UNWIND $rows AS row
+MERGE (p:Project {title: row.title})
+SET p.mongo_id = coalesce(row.mongo_id, p.mongo_id)
+"""
+
+PUBLICATION_QUERY = """
+UNWIND $rows AS row
+MERGE (pub:Publication {title: row.title})
+SET pub.mongo_id = coalesce(row.mongo_id, pub.mongo_id)
+"""
+
+WORKED_ON_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Researcher {name: row.researcher}), (p:Project {title: row.project})
+MERGE (r)-[:WORKED_ON]->(p)
+"""
+
+HAS_PUBLICATION_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Project {title: row.project}), (pub:Publication {title: row.publication})
+MERGE (p)-[:HAS_PUBLICATION]->(pub)
+"""
+
+AUTHORED_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Researcher {name: row.researcher}), (pub:Publication {title: row.publication})
+MERGE (r)-[:AUTHORED]->(pub)
+"""
+
+CO_AUTHOR_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Researcher {name: row.a}), (b:Researcher {name: row.b})
+MERGE (a)-[:CO_AUTHOR]->(b)
+"""
+
+TEAMMATE_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Researcher {name: row.a}), (b:Researcher {name: row.b})
+MERGE (a)-[:TEAMMATE]->(b)
+"""
+
+# -----------------------------
+# Row builders (MongoDB documents -> parameter rows)
+# mongo_id lets the incremental sync find nodes again when a document is deleted;
+# a row without one (document not found) keeps the id the node already has
+# -----------------------------
+def mongo_id(doc):
+    return str(doc["_id"]) if "_id" in doc else None
+
+def researcher_rows(researchers):
+    for r in researchers:
+        yield {"name": r["name"], "department": r.get("department"), "interests": r.get("interests", []),
+               "mongo_id": mongo_id(r)}
+
+def project_rows(projects):
+    for p in projects:
+        yield {"title": p["title"], "mongo_id": mongo_id(p)}
+
+def publication_rows(publications):
+    for pub in publications:
+        yield {"title": pub["title"], "mongo_id": mongo_id(pub)}
+
+def worked_on_rows(projects):
+    for p in projects:
+        for name in p.get("participants", []):
+            yield {"researcher": name, "project": p["title"]}
+
+def has_publication_rows(publications):
+    for pub in publications:
+        if pub.get("project"):
+            yield {"project": pub["project"], "publication": pub["title"]}
+
+def authored_rows(publications):
+    for pub in publications:
+        for name in pub.get("authors", []):
+            yield {"researcher": name, "publication": pub["title"]}
+
+def pair_rows(groups):
+    # TEAMMATE / CO_AUTHOR always point from the smaller name to the larger one
+    # (a.name < b.name), like graph_sync.DERIVE_QUERY, so directed readers see
+    # the same edges whichever loader wrote them
+    for members in groups:
+        members = sorted(set(members))
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                yield {"a": members[i], "b": members[j]}
+
+def co_author_rows(publications):
+    return pair_rows(pub.get("authors", []) for pub in publications)
+
+def teammate_rows(projects):
+    return pair_rows(p.get("participants", []) for p in projects)
+
+# -----------------------------
+# Batch writer
+# -----------------------------
+def batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _write_batch(tx, query, rows):
+    tx.run(query, rows=rows).consume()
+
+def write_rows(session, query, rows, batch_size=DEFAULT_BATCH_SIZE):
+    total = 0
+    for batch in batches(rows, batch_size):
+        session.execute_write(_write_batch, query, batch)
+        total += len(batch)
+    return total
+
+def run_phase(session, label, query, rows, batch_size=DEFAULT_BATCH_SIZE):
+    start_time = time.perf_counter()
+    total = write_rows(session, query, rows, batch_size)
+    elapsed = time.perf_counter() - start_time
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {label}: {total} rows in {elapsed:.3f} seconds ({rate:,.0f} rows/s)")
+    return {"phase": label, "rows": total, "seconds": elapsed, "rows_per_second": rate}
+
+# -----------------------------
+# Full load
+# sources are zero-argument callables returning a fresh iterable of documents
+# (e.g. lambda: projects_col.find()), because several phases re-read them.
+# -----------------------------
+def load_graph(session, researchers, projects, publications, batch_size=DEFAULT_BATCH_SIZE):
+    phases = [
+        ("Researcher nodes", RESEARCHER_QUERY, lambda: researcher_rows(researchers())),
+        ("Project nodes", PROJECT_QUERY, lambda: project_rows(projects())),
+        ("Publication nodes", PUBLICATION_QUERY, lambda: publication_rows(publications())),
+        ("WORKED_ON", WORKED_ON_QUERY, lambda: worked_on_rows(projects())),
+        ("HAS_PUBLICATION", HAS_PUBLICATION_QUERY, lambda: has_publication_rows(publications())),
+        ("AUTHORED", AUTHORED_QUERY, lambda: authored_rows(publications())),
+        ("CO_AUTHOR", CO_AUTHOR_QUERY, lambda: co_author_rows(publications())),
+        ("TEAMMATE", TEAMMATE_QUERY, lambda: teammate_rows(projects())),
+    ]
+    return [run_phase(session, label, query, rows(), batch_size) for label, query, rows in phases]
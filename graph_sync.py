@@ -0,0 +1,307 @@
+# graph_sync.py
+# Incremental MongoDB -> Neo4j sync.
+# Reads changes from a MongoDB change stream (or a local JSONL replay log for
+# testing) and applies only the inserted / updated / deleted researchers,
+# projects and publications to Neo4j as batched upserts and edge removals.
+# The change-stream resume token (or replay-log line number) is the
+# high-water mark and is stored in a small JSON state file after each batch.
+
+import json
+import os
+import time
+
+from graph_loader import (
+    DEFAULT_BATCH_SIZE, RESEARCHER_QUERY, PROJECT_QUERY, PUBLICATION_QUERY,
+    WORKED_ON_QUERY, HAS_PUBLICATION_QUERY, AUTHORED_QUERY,
+    researcher_rows, project_rows, publication_rows,
+    worked_on_rows, has_publication_rows, authored_rows,
+    write_rows, load_graph,
+)
+
+DEFAULT_STATE_FILE = ".graph_sync_state.json"
+COLLECTIONS = ("researchers", "projects", "publications")
+
+# -----------------------------
+# Cypher statements for deletes and edge maintenance
+# -----------------------------
+DROP_RENAMED_QUERY = """
+UNWIND $rows AS row
+MATCH (n:{label} {{mongo_id: row.mongo_id}})
+WHERE n.{key} <> row.{key}
+DETACH DELETE n
+"""
+
+DELETE_RESEARCHERS_QUERY = """
+UNWIND $ids AS id
+MATCH (r:Researcher {mongo_id: id})
+DETACH DELETE r
+"""
+
+DELETE_PROJECTS_QUERY = """
+UNWIND $ids AS id
+MATCH (p:Project {mongo_id: id})
+OPTIONAL MATCH (r:Researcher)-[:WORKED_ON]->(p)
+WITH p, collect(r.name) AS members
+DETACH DELETE p
+RETURN members
+"""
+
+DELETE_PUBLICATIONS_QUERY = """
+UNWIND $ids AS id
+MATCH (pub:Publication {mongo_id: id})
+OPTIONAL MATCH (r:Researcher)-[:AUTHORED]->(pub)
+WITH pub, collect(r.name) AS members
+DETACH DELETE pub
+RETURN members
+"""
+
+STALE_WORKED_ON_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Researcher)-[w:WORKED_ON]->(:Project {title: row.title})
+WHERE NOT r.name IN row.participants
+DELETE w
+RETURN r.name AS name
+"""
+
+STALE_AUTHORED_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Researcher)-[a:AUTHORED]->(:Publication {title: row.title})
+WHERE NOT r.name IN row.authors
+DELETE a
+RETURN r.name AS name
+"""
+
+STALE_HAS_PUBLICATION_QUERY = """
+UNWIND $rows AS row
+MATCH (p:Project)-[h:HAS_PUBLICATION]->(:Publication {title: row.title})
+WHERE p.title <> coalesce(row.project, "")
+DELETE h
+"""
+
+# TEAMMATE / CO_AUTHOR are derived edges: drop them for the affected
+# researchers and derive them again from WORKED_ON / AUTHORED, pointing
+# from the smaller name to the larger one like graph_loader.pair_rows.
+DROP_DERIVED_QUERY = """
+UNWIND $names AS name
+MATCH (:Researcher {{name: name}})-[e:{rel}]-(:Researcher)
+DELETE e
+"""
+
+DERIVE_QUERY = """
+UNWIND $names AS name
+MATCH (a:Researcher {{name: name}})-[:{via}]->()<-[:{via}]-(b:Researcher)
+WHERE a <> b
+WITH DISTINCT CASE WHEN a.name < b.name THEN a ELSE b END AS x,
+              CASE WHEN a.name < b.name THEN b ELSE a END AS y
+MERGE (x)-[:{rel}]->(y)
+"""
+
+# -----------------------------
+# High-water mark state
+# -----------------------------
+def load_state(path=DEFAULT_STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state, path=DEFAULT_STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+# -----------------------------
+# Change sources
+# Both yield change-stream shaped events:
+# {"operationType", "ns": {"coll"}, "documentKey": {"_id"}, "fullDocument"}
+# -----------------------------
+def change_stream_batches(mongo_db, resume_token, batch_size, follow=False):
+    pipeline = [{"$match": {"ns.coll": {"$in": list(COLLECTIONS)}}}]
+    with mongo_db.watch(pipeline, full_document="updateLookup", resume_after=resume_token,
+                        max_await_time_ms=1000) as stream:
+        batch = []
+        while stream.alive:
+            change = stream.try_next()
+            if change is not None:
+                batch.append(change)
+                if len(batch) < batch_size:
+                    continue
+            if batch:
+                yield batch, stream.resume_token
+                batch = []
+            elif not follow:
+                return
+
+def replay_log_batches(path, offset, batch_size):
+    batch = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if line_no <= offset or not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch, line_no
+                batch = []
+        if batch:
+            yield batch, line_no
+
+# -----------------------------
+# Applying a batch of changes
+# -----------------------------
+def _collapse(events):
+    # Last event per document wins: {coll: {id: doc or None}}
+    changes = {coll: {} for coll in COLLECTIONS}
+    for event in events:
+        coll = event["ns"]["coll"]
+        if coll not in changes:
+            continue
+        doc_id = str(event["documentKey"]["_id"])
+        if event["operationType"] == "delete":
+            changes[coll][doc_id] = None
+        elif event.get("fullDocument") is not None:
+            doc = dict(event["fullDocument"])
+            doc["_id"] = doc_id
+            changes[coll][doc_id] = doc
+    return changes
+
+def _read_names(session, query, **params):
+    def work(tx):
+        names = set()
+        for rec in tx.run(query, **params):
+            value = rec[0]
+            names.update(value if isinstance(value, list) else [value])
+        return names
+    return session.execute_write(work)
+
+def _run(session, query, **params):
+    session.execute_write(lambda tx: tx.run(query, **params).consume())
+
+def _rederive(session, rel, via, names, batch_size):
+    names = sorted(n for n in names if n)
+    for i in range(0, len(names), batch_size):
+        chunk = names[i:i + batch_size]
+        _run(session, DROP_DERIVED_QUERY.format(rel=rel), names=chunk)
+        _run(session, DERIVE_QUERY.format(rel=rel, via=via), names=chunk)
+
+def apply_changes(session, events, projects_col=None, publications_col=None, batch_size=DEFAULT_BATCH_SIZE):
+    changes = _collapse(events)
+    upserts = {coll: [d for d in docs.values() if d is not None] for coll, docs in changes.items()}
+    deletes = {coll: [i for i, d in docs.items() if d is None] for coll, docs in changes.items()}
+    teammates, co_authors = set(), set()
+
+    # Deletes
+    if deletes["researchers"]:
+        _run(session, DELETE_RESEARCHERS_QUERY, ids=deletes["researchers"])
+    if deletes["projects"]:
+        teammates |= _read_names(session, DELETE_PROJECTS_QUERY, ids=deletes["projects"])
+    if deletes["publications"]:
+        co_authors |= _read_names(session, DELETE_PUBLICATIONS_QUERY, ids=deletes["publications"])
+
+    # Researchers: new names may complete edges for projects/publications
+    # that were synced before the researcher existed, so re-link those too.
+    researchers = upserts["researchers"]
+    if researchers:
+        drop = DROP_RENAMED_QUERY.format(label="Researcher", key="name")
+        write_rows(session, drop, ({"mongo_id": r["_id"], "name": r["name"]} for r in researchers), batch_size)
+        write_rows(session, RESEARCHER_QUERY, researcher_rows(researchers), batch_size)
+        names = [r["name"] for r in researchers]
+        known = {d["_id"] for d in upserts["projects"]}
+        if projects_col is not None:
+            upserts["projects"] += [dict(p, _id=str(p["_id"])) for p in projects_col.find({"participants": {"$in": names}})
+                                    if str(p["_id"]) not in known]
+        known = {d["_id"] for d in upserts["publications"]}
+        if publications_col is not None:
+            upserts["publications"] += [dict(p, _id=str(p["_id"])) for p in publications_col.find({"authors": {"$in": names}})
+                                        if str(p["_id"]) not in known]
+
+    projects = upserts["projects"]
+    if projects:
+        drop = DROP_RENAMED_QUERY.format(label="Project", key="title")
+        write_rows(session, drop, ({"mongo_id": p["_id"], "title": p["title"]} for p in projects), batch_size)
+        write_rows(session, PROJECT_QUERY, project_rows(projects), batch_size)
+        rows = [{"title": p["title"], "participants": p.get("participants", [])} for p in projects]
+        teammates |= _read_names(session, STALE_WORKED_ON_QUERY, rows=rows)
+        write_rows(session, WORKED_ON_QUERY, worked_on_rows(projects), batch_size)
+        for p in projects:
+            teammates.update(p.get("participants", []))
+
+    publications = upserts["publications"]
+    if publications:
+        drop = DROP_RENAMED_QUERY.format(label="Publication", key="title")
+        write_rows(session, drop, ({"mongo_id": p["_id"], "title": p["title"]} for p in publications), batch_size)
+        write_rows(session, PUBLICATION_QUERY, publication_rows(publications), batch_size)
+        rows = [{"title": p["title"], "authors": p.get("authors", []), "project": p.get("project")} for p in publications]
+        co_authors |= _read_names(session, STALE_AUTHORED_QUERY, rows=rows)
+        _run(session, STALE_HAS_PUBLICATION_QUERY, rows=rows)
+        write_rows(session, AUTHORED_QUERY, authored_rows(publications), batch_size)
+        write_rows(session, HAS_PUBLICATION_QUERY, has_publication_rows(publications), batch_size)
+        for p in publications:
+            co_authors.update(p.get("authors", []))
+
+    _rederive(session, "TEAMMATE", "WORKED_ON", teammates, batch_size)
+    _rederive(session, "CO_AUTHOR", "AUTHORED", co_authors, batch_size)
+    return {coll: len(docs) for coll, docs in changes.items()}
+
+# -----------------------------
+# Sync entry points
+# -----------------------------
+def _report(events, counts, start_time):
+    elapsed = time.perf_counter() - start_time
+    print(f"✅ Synced {len(events)} changes "
+          f"(researchers={counts['researchers']}, projects={counts['projects']}, "
+          f"publications={counts['publications']}) in {elapsed:.3f} seconds")
+
+def bootstrap(driver, mongo_db, state_path=DEFAULT_STATE_FILE, batch_size=DEFAULT_BATCH_SIZE):
+    # Open the stream first so nothing written during the upsert load is missed,
+    # then upsert the current data without clearing the graph.
+    pipeline = [{"$match": {"ns.coll": {"$in": list(COLLECTIONS)}}}]
+    with mongo_db.watch(pipeline) as stream:
+        stream.try_next()
+        token = stream.resume_token
+    with driver.session() as session:
+        load_graph(
+            session,
+            researchers=lambda: mongo_db["researchers"].find({}, {"name": 1, "department": 1, "interests": 1}),
+            projects=lambda: mongo_db["projects"].find({}, {"title": 1, "participants": 1}),
+            publications=lambda: mongo_db["publications"].find({}, {"title": 1, "project": 1, "authors": 1}),
+            batch_size=batch_size,
+        )
+    state = load_state(state_path)
+    state["resume_token"] = token
+    save_state(state, state_path)
+    print("✅ Initial load done, change stream position recorded")
+
+def sync_change_stream(driver, mongo_db, state_path=DEFAULT_STATE_FILE, batch_size=DEFAULT_BATCH_SIZE, follow=False):
+    state = load_state(state_path)
+    if "resume_token" not in state:
+        bootstrap(driver, mongo_db, state_path, batch_size)
+        state = load_state(state_path)
+
+    total = 0
+    with driver.session() as session:
+        for events, token in change_stream_batches(mongo_db, state["resume_token"], batch_size, follow):
+            start_time = time.perf_counter()
+            counts = apply_changes(session, events, mongo_db["projects"], mongo_db["publications"], batch_size)
+            state["resume_token"] = token
+            save_state(state, state_path)
+            _report(events, counts, start_time)
+            total += len(events)
+    return total
+
+def sync_replay_log(driver, log_path, state_path=DEFAULT_STATE_FILE, batch_size=DEFAULT_BATCH_SIZE,
+                    projects_col=None, publications_col=None):
+    state = load_state(state_path)
+    offsets = state.setdefault("replay_offsets", {})
+    key = os.path.abspath(log_path)
+
+    total = 0
+    with driver.session() as session:
+        for events, line_no in replay_log_batches(log_path, offsets.get(key, 0), batch_size):
+            start_time = time.perf_counter()
+            counts = apply_changes(session, events, projects_col, publications_col, batch_size)
+            offsets[key] = line_no
+            save_state(state, state_path)
+            _report(events, counts, start_time)
+            total += len(events)
+    return total
@@ -0,0 +1,264 @@
+# leaderboards.py
+# Analytics leaderboards kept as Redis sorted sets and updated on every write:
+#   lb:v1:projects       researcher -> number of projects
+#   lb:v1:publications   author     -> number of publications
+#   lb:v1:collaborators  researcher -> number of distinct project teammates
+# Only researchers are counted, like the other engines: record_researcher (and
+# rebuild) put every researcher on the boards with score 0, other names are ignored.
+# Projects are upserts (add_project replaces the participants), so the members last
+# recorded for a title are kept (lb:v1:project:<title>) and only the delta is applied.
+# Teammates are tracked as shared-project counts (hash lb:v1:collab:<name>), so a
+# teammate is dropped only when the last shared project loses one of the two.
+# Reads walk the boards by score, ties by name like the other engines;
+# `python leaderboards.py --rebuild` recomputes everything from MongoDB for recovery.
+
+import argparse
+from itertools import islice
+
+from redis.exceptions import WatchError
+
+PREFIX = "lb:v1"
+PROJECTS = f"{PREFIX}:projects"
+PUBLICATIONS = f"{PREFIX}:publications"
+COLLABORATORS = f"{PREFIX}:collaborators"
+BOARDS = (PROJECTS, PUBLICATIONS, COLLABORATORS)
+# Publications are $setOnInsert: a title already counted is a no-op
+SEEN_PUBLICATIONS = f"{PREFIX}:seen:publications"
+
+def collab_key(name):
+    return f"{PREFIX}:collab:{name}"
+
+def project_key(title):
+    return f"{PREFIX}:project:{title}"
+
+# -----------------------------
+# Incremental updates
+# -----------------------------
+def record_researcher(client, name):
+    pipe = client.pipeline(transaction=False)
+    for board in BOARDS:
+        pipe.zadd(board, {name: 0}, nx=True)
+    pipe.execute()
+
+def _researchers(client, names):
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+    return [n for n, s in zip(names, client.zmscore(PROJECTS, names)) if s is not None]
+
+def record_project(client, title, participants):
+    key = project_key(title)
+    with client.pipeline() as pipe:
+        while True:
+            try:
+                # WATCH: two writes of the same title must not both apply their delta
+                pipe.watch(key)
+                old = set(pipe.smembers(key))
+                new = set(_researchers(pipe, participants))
+                everyone = old | new
+                pairs = [(a, b, (a in new and b in new) - (a in old and b in old))
+                         for a in everyone for b in everyone if a != b]
+                pairs = [pair for pair in pairs if pair[2]]
+                pipe.multi()
+                for name in new - old:
+                    pipe.zincrby(PROJECTS, 1, name)
+                for name in old - new:
+                    pipe.zincrby(PROJECTS, -1, name)
+                for a, b, delta in pairs:
+                    pipe.hincrby(collab_key(a), b, delta)
+                pipe.delete(key)
+                if new:
+                    pipe.sadd(key, *new)
+                results = pipe.execute()
+                break
+            except WatchError:
+                continue
+
+    # A shared count going 0 -> 1 is a new teammate, 1 -> 0 a lost one
+    shared = results[len(new ^ old):len(new ^ old) + len(pairs)]
+    pipe = client.pipeline(transaction=False)
+    for (a, _, delta), count in zip(pairs, shared):
+        if delta > 0 and count == 1:
+            pipe.zincrby(COLLABORATORS, 1, a)
+        elif delta < 0 and count == 0:
+            pipe.zincrby(COLLABORATORS, -1, a)
+    pipe.execute()
+
+def record_publication(client, title, authors):
+    if not client.sadd(SEEN_PUBLICATIONS, title):
+        return
+    pipe = client.pipeline(transaction=False)
+    for name in _researchers(client, authors):
+        pipe.zincrby(PUBLICATIONS, 1, name)
+    pipe.execute()
+
+# -----------------------------
+# Reads
+# -----------------------------
+def ranked(client, board, chunk=100):
+    # (name, score) from the highest score down, names ascending within a score
+    # (ZREVRANGE would list ties in reverse name order). Score 0 is left out,
+    # as the other engines only list researchers with something to count.
+    high = "+inf"
+    while True:
+        level = client.zrevrangebyscore(board, high, 1, start=0, num=1, withscores=True)
+        if not level:
+            return
+        score = level[0][1]
+        start = 0
+        while True:
+            names = client.zrangebyscore(board, score, score, start=start, num=chunk)
+            yield from ((name, int(score)) for name in names)
+            if len(names) < chunk:
+                break
+            start += chunk
+        high = f"({score}"
+
+def top(client, board, n=5):
+    return list(islice(ranked(client, board, n), n))
+
+def _with_collaborators(leaders, collaborators):
+    # Same rows as the other engines: researchers without any teammate are not ranked
+    return [{"name": name, "projects": projects, "collaborators": int(c)}
+            for (name, projects), c in zip(leaders, collaborators) if c]
+
+class LeaderboardAnalytics:
+    # Same report shapes as neo4j_analytics.Neo4jAnalytics for the boards we keep
+    def __init__(self, client):
+        self.client = client
+
+    def top_authors(self, limit=5):
+        return [{"name": name, "publications": score} for name, score in top(self.client, PUBLICATIONS, limit)]
+
+    def top_teammates(self, limit=5):
+        return [{"name": name, "teammates": score} for name, score in top(self.client, COLLABORATORS, limit)]
+
+    def top_researchers(self, limit=5):
+        rows, leaders = [], ranked(self.client, PROJECTS, limit)
+        while len(rows) < limit:
+            chunk = list(islice(leaders, limit))
+            if not chunk:
+                break
+            rows += _with_collaborators(chunk, self.client.zmscore(COLLABORATORS, [n for n, _ in chunk]))
+        return rows[:limit]
+
+# -----------------------------
+# Async reads (redis.asyncio client, service.py): same walk as ranked()
+# -----------------------------
+async def aranked(client, board, chunk=100):
+    high = "+inf"
+    while True:
+        level = await client.zrevrangebyscore(board, high, 1, start=0, num=1, withscores=True)
+        if not level:
+            return
+        score = level[0][1]
+        start = 0
+        while True:
+            names = await client.zrangebyscore(board, score, score, start=start, num=chunk)
+            for name in names:
+                yield name, int(score)
+            if len(names) < chunk:
+                break
+            start += chunk
+        high = f"({score}"
+
+async def atop_researchers(client, limit=5):
+    rows, chunk = [], []
+    leaders = aranked(client, PROJECTS, limit)
+    async for leader in leaders:
+        chunk.append(leader)
+        if len(chunk) == limit:
+            rows += _with_collaborators(chunk, await client.zmscore(COLLABORATORS, [n for n, _ in chunk]))
+            chunk = []
+            if len(rows) >= limit:
+                break
+    if chunk:
+        rows += _with_collaborators(chunk, await client.zmscore(COLLABORATORS, [n for n, _ in chunk]))
+    await leaders.aclose()
+    return rows[:limit]
+
+# -----------------------------
+# Full rebuild (recovery / after seeding)
+# -----------------------------
+def rebuild(client, researchers, projects, publications, chunk_size=1000):
+    projects_count, publications_count, collab = {}, {}, {}
+    for r in researchers:
+        projects_count.setdefault(r["name"], 0)
+        publications_count.setdefault(r["name"], 0)
+        collab.setdefault(r["name"], {})
+    # Only researchers are counted; a title seen twice keeps its last members (upsert)
+    members = {p["title"]: [n for n in dict.fromkeys(p.get("participants", [])) if n in collab]
+               for p in projects}
+    for names in members.values():
+        for name in names:
+            projects_count[name] += 1
+            for other in names:
+                if other != name:
+                    collab[name][other] = collab[name].get(other, 0) + 1
+    publication_titles = []
+    for pub in publications:
+        publication_titles.append(pub["title"])
+        for name in dict.fromkeys(pub.get("authors", [])):
+            if name in publications_count:
+                publications_count[name] += 1
+
+    # Build under temporary keys and RENAME, so readers never see a half-built board
+    tmp = f"{PREFIX}:rebuild"
+    pipe = client.pipeline(transaction=False)
+    for match in (f"{tmp}:*", collab_key("*"), project_key("*")):
+        for key in client.scan_iter(match=match):
+            pipe.delete(key)
+    pipe.execute()
+
+    def write(key, items, add):
+        items = list(items)
+        for i in range(0, len(items), chunk_size):
+            add(key, items[i:i + chunk_size])
+
+    write(f"{tmp}:projects", projects_count.items(), lambda k, c: client.zadd(k, dict(c)))
+    write(f"{tmp}:publications", publications_count.items(), lambda k, c: client.zadd(k, dict(c)))
+    write(f"{tmp}:collaborators", ((n, len(s)) for n, s in collab.items()), lambda k, c: client.zadd(k, dict(c)))
+    write(f"{tmp}:seen:publications", publication_titles, lambda k, c: client.sadd(k, *c))
+
+    pipe = client.pipeline(transaction=False)
+    for name, shared in collab.items():
+        if shared:
+            pipe.hset(collab_key(name), mapping=shared)
+    for title, names in members.items():
+        if names:
+            pipe.sadd(project_key(title), *names)
+    pipe.execute()
+
+    pipe = client.pipeline(transaction=True)
+    for name, key in (("projects", PROJECTS), ("publications", PUBLICATIONS), ("collaborators", COLLABORATORS),
+                      ("seen:publications", SEEN_PUBLICATIONS)):
+        if client.exists(f"{tmp}:{name}"):
+            pipe.rename(f"{tmp}:{name}", key)
+        else:
+            pipe.delete(key)
+    pipe.delete(f"{PREFIX}:seen:projects")  # left by older versions
+    pipe.execute()
+    return {"researchers": len(collab), "projects": len(members), "publications": len(publication_titles)}
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Redis analytics leaderboards")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all leaderboards from MongoDB (cluster 1)")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    r = connections.get_redis()
+    if args.rebuild:
+        db = connections.get_db(1)
+        counts = rebuild(r,
+                         db["researchers"].find({}, {"_id": 0, "name": 1}),
+                         db["projects"].find({}, {"_id": 0, "title": 1, "participants": 1}),
+                         db["publications"].find({}, {"_id": 0, "title": 1, "authors": 1}))
+        print(f"✅ Leaderboards rebuilt ({counts['researchers']} researchers, "
+              f"{counts['projects']} projects, {counts['publications']} publications)")
+
+    for title, board in (("Projects", PROJECTS), ("Publications", PUBLICATIONS), ("Collaborators", COLLABORATORS)):
+        print(f"\n--- Top Researchers by {title} ---")
+        for name, score in top(r, board, args.top):
+            print(f"{name}: {score}")
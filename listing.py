@@ -0,0 +1,128 @@
+# listing.py
+# Streaming listings for the "show all" views.
+#  - only the fields the view prints are fetched (projection)
+#  - each cluster is read in keyset pages on (key, _id) using the compound
+#    index from schema.py, never with skip(); the next page is prefetched
+#    in the cluster read pool while the current one is consumed
+#  - the clusters' sorted streams are lazily k-way merged (heapq.merge) and
+#    de-duplicated on the key, so replicated documents show up once
+# Memory stays at about two pages per cluster whatever the collection size,
+# and the first page is available as soon as each cluster answered once.
+
+import contextvars
+import heapq
+import time
+
+from cluster_reads import _executor, raise_if_all_failed
+
+DEFAULT_BATCH_SIZE = 500
+
+# kind -> sort/dedupe key and the fields the listing needs
+LISTINGS = {
+    "researchers": {"key": "name", "fields": ["name", "department"]},
+    "projects": {"key": "title", "fields": ["title", "participants"]},
+    "publications": {"key": "title", "fields": ["title", "authors", "project"]},
+}
+
+# -----------------------------
+# One cluster: keyset pages
+# -----------------------------
+def keyset_query(key, position):
+    # position: None (from the start), (key,) (after that key) or (key, _id) (after that document).
+    # A null / missing key sorts before every other value, so after (None, _id) come the
+    # other null keys with a larger _id, then every non-null key.
+    # Results are read sorted by KEYSET_SORT(key) (also used by service.py)
+    if position is None:
+        return {}
+    if len(position) == 1:
+        return {key: {"$gt": position[0]}}
+    if position[0] is None:
+        return {"$or": [{key: None, "_id": {"$gt": position[1]}}, {key: {"$ne": None}}]}
+    return {"$or": [{key: {"$gt": position[0]}}, {key: position[0], "_id": {"$gt": position[1]}}]}
+
+def keyset_sort(key):
+    return [(key, 1), ("_id", 1)]
+
+def _fetch_page(col, key, projection, batch_size, position):
+    cursor = col.find(keyset_query(key, position), projection, sort=keyset_sort(key),
+                      limit=batch_size, batch_size=batch_size)
+    return list(cursor)
+
+def _timed_fetch(timing, *args):
+    start_time = time.perf_counter()
+    try:
+        return _fetch_page(*args)
+    finally:
+        timing["seconds"] += time.perf_counter() - start_time
+
+def keyset_stream(col, key, fields, after=None, batch_size=DEFAULT_BATCH_SIZE, timing=None):
+    # Yields documents sorted by (key, _id), starting after the key `after`
+    timing = timing if timing is not None else {"seconds": 0.0}
+    projection = {f: 1 for f in fields}
+
+    def prefetch(position):
+        return _executor.submit(contextvars.copy_context().run, _timed_fetch,
+                                timing, col, key, projection, batch_size, position)
+
+    future = prefetch(None if after is None else (after,))
+    while future is not None:
+        page = future.result()
+        future = prefetch((page[-1].get(key), page[-1]["_id"])) if len(page) == batch_size else None
+        yield from page
+
+def _guarded(stream, timing):
+    # A failing cluster ends its own stream; the error is kept in its timing entry
+    try:
+        yield from stream
+    except Exception as e:
+        timing["error"] = e
+
+# -----------------------------
+# All clusters: merged, de-duplicated stream
+# clusters: [(label, collection), ...]
+# -----------------------------
+def merged_stream(clusters, kind, after=None, batch_size=DEFAULT_BATCH_SIZE, timings=None):
+    # `timings` (a list) is filled with one {"cluster", "seconds", "error"} entry
+    # per cluster, in the shape cluster_reads.print_timings expects
+    spec = LISTINGS[kind]
+    key = spec["key"]
+    timings = timings if timings is not None else []
+    streams = []
+    for label, col in clusters:
+        timing = {"cluster": label, "seconds": 0.0, "error": None, "result": None}
+        timings.append(timing)
+        streams.append(_guarded(keyset_stream(col, key, spec["fields"], after, batch_size, timing), timing))
+
+    yield from merge_unique(streams, key)
+    raise_if_all_failed(timings)
+
+def merge_unique(streams, key):
+    # Sorted streams (one per cluster) -> one sorted stream, each key once.
+    # MongoDB sorts a missing / null key before every string: same order here,
+    # without comparing None to str. Documents without a key are not duplicates
+    # of each other, so only non-null keys are de-duplicated.
+    last = object()
+    for doc in heapq.merge(*streams, key=lambda d: (d.get(key) is not None, d.get(key) or "")):
+        value = doc.get(key)
+        if value is None or value != last:
+            last = value
+            yield doc
+
+def cut_page(stream, key, size):
+    # (rows, next_after) from a merged stream; next_after is None at the end.
+    # Documents without a key (listed first) all go on the first page: None as
+    # next_after would read as "from the start"
+    rows = []
+    for doc in stream:
+        if len(rows) >= size and rows[-1].get(key) is not None:
+            return rows, rows[-1][key]
+        rows.append(doc)
+    return rows, None
+
+def page(clusters, kind, after=None, size=50, batch_size=None):
+    # One page of the merged listing
+    stream = merged_stream(clusters, kind, after, batch_size or size + 1)
+    try:
+        return cut_page(stream, LISTINGS[kind]["key"], size)
+    finally:
+        stream.close()
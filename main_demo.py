@@ -2,65 +2,47 @@
 # Research Collaboration Management System
 # MongoDB + Neo4j + Redis
 
-from pymongo import MongoClient
-from neo4j import GraphDatabase
-import redis
-from dotenv import load_dotenv
-import os
-import json
-from bson import ObjectId
 import time
-
-load_dotenv()
+import connections
+import leaderboards
 
 # -----------------------------
-# Database configurations
+# Database connections (connections.py: opened on first use and shared;
+# MongoDB is cluster 1, Neo4j reads are cached by query_cache.py,
+# LOCAL_CACHE=1 adds an in-process tier to the read-through cache)
 # -----------------------------
-MONGO_URI = os.getenv("MONGO_URI")
-mongo_client = MongoClient(MONGO_URI)
-mongo_db = mongo_client["research_db"]
-researchers_col = mongo_db["researchers"]
-projects_col = mongo_db["projects"]
-publications_col = mongo_db["publications"]
-
-NEO_URI = os.getenv("NEO4J_URI")
-NEO_USER = os.getenv("NEO4J_USERNAME")
-NEO_PASS = os.getenv("NEO4J_PASSWORD")
-neo_driver = GraphDatabase.driver(NEO_URI, auth=(NEO_USER, NEO_PASS))
-
-REDIS_HOST = os.getenv("REDIS_HOST")
-REDIS_PORT = int(os.getenv("REDIS_PORT"))
-REDIS_PASS = os.getenv("REDIS_PASSWORD")
-r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASS, decode_responses=True)
+def researchers_col():
+    return connections.get_db(1)["researchers"]
+
+def projects_col():
+    return connections.get_db(1)["projects"]
+
+def publications_col():
+    return connections.get_db(1)["publications"]
 
 # -----------------------------
 # Redis caching function with timing
 # -----------------------------
+def load_researcher(name):
+    researcher = researchers_col().find_one({"name": name})
+    # Convert ObjectId to string for serialization
+    if researcher and "_id" in researcher:
+        researcher["_id"] = str(researcher["_id"])
+    return researcher
+
 def cache_researcher(name):
     start_time = time.perf_counter()
 
-    # Check in Redis first
-    data = r.get(f"researcher:{name}")
-    if data:
-        elapsed = time.perf_counter() - start_time
-        print(f"✅ Data fetched from Redis (Cache) in {elapsed:.6f} seconds")
-        return json.loads(data)
+    # Check in Redis first, fetch from MongoDB on a miss (one loader per key)
+    researcher, source = connections.get_cache().get_or_load("researcher", name, lambda: load_researcher(name))
+    elapsed = time.perf_counter() - start_time
 
-    # Fetch from MongoDB
-    researcher = researchers_col.find_one({"name": name})
     if not researcher:
-        elapsed = time.perf_counter() - start_time
         print(f"No researcher found (MongoDB checked in {elapsed:.6f} seconds)")
-        return None
-
-    # Convert ObjectId to string for JSON
-    if "_id" in researcher:
-        researcher["_id"] = str(researcher["_id"])
-
-    # Store in Redis for 60 seconds
-    r.set(f"researcher:{name}", json.dumps(researcher), ex=60)
-    elapsed = time.perf_counter() - start_time
-    print(f"✅ Data fetched from MongoDB and stored in Redis in {elapsed:.6f} seconds")
+    elif source == "loaded":
+        print(f"✅ Data fetched from MongoDB and stored in Redis in {elapsed:.6f} seconds")
+    else:
+        print(f"✅ Data fetched from Redis (Cache) in {elapsed:.6f} seconds")
     return researcher
 
 # -----------------------------
@@ -75,13 +57,13 @@ def show_researcher_by_name(name):
     print(f"\nName: {r_data.get('name','')}, Department: {r_data.get('department','')}, Interests: {', '.join(r_data.get('interests',[]))}")
     
     # Projects of the researcher
-    projects = projects_col.find({"participants": name})
+    projects = projects_col().find({"participants": name})
     print("Projects:")
     for p in projects:
         print(f" - {p.get('title')}")
 
 def show_project_by_title(title):
-    p = projects_col.find_one({"title": title})
+    p = projects_col().find_one({"title": title})
     if not p:
         print(f"No project found with title '{title}'")
         return
@@ -96,7 +78,7 @@ def show_project_by_title(title):
     # جمع العلاقات لكل نوع مرة واحدة
     # -----------------------------
     relations_summary = {}  # relation_type -> set of researcher names
-    with neo_driver.session() as session:
+    with connections.get_neo4j().session() as session:
         for relation_type in ["CO_AUTHOR", "TEAMMATE"]:
             q = f"""
             MATCH (r:Researcher)-[rel:{relation_type}]->(b:Researcher)
@@ -121,72 +103,80 @@ def show_project_by_title(title):
 # Add functions
 # -----------------------------
 def add_researcher(name, department, interests):
-    researchers_col.insert_one({"name": name,"department": department,"interests": interests})
-    with neo_driver.session() as session:
-        session.write_transaction(lambda tx: tx.run(
+    researchers_col().insert_one({"name": name,"department": department,"interests": interests})
+    with connections.get_neo4j().session() as session:
+        session.execute_write(lambda tx: tx.run(
             "MERGE (r:Researcher {name:$name}) SET r.department=$dept", name=name, dept=department))
+    # Drop stale copies in Redis and in every process's local tier
+    connections.get_cache().invalidate("researcher", name)
+    connections.get_cache().invalidate("analytics", "*")
+    leaderboards.record_researcher(connections.get_redis(), name)
     print(f"Researcher '{name}' added successfully!")
 
 def add_project(title, description, participants):
-    projects_col.insert_one({"title": title,"description": description,"participants": participants})
-    with neo_driver.session() as session:
-        session.write_transaction(lambda tx: tx.run("MERGE (p:Project {title:$title})", title=title))
+    projects_col().insert_one({"title": title,"description": description,"participants": participants})
+    with connections.get_neo4j().session() as session:
+        session.execute_write(lambda tx: tx.run("MERGE (p:Project {title:$title})", title=title))
         for r_name in participants:
-            session.write_transaction(lambda tx: tx.run("""
+            session.execute_write(lambda tx: tx.run("""
                 MATCH (r:Researcher {name:$r_name})
                 MATCH (p:Project {title:$title})
                 MERGE (r)-[:WORKS_ON]->(p)
             """, r_name=r_name, title=title))
+    connections.get_cache().invalidate("analytics", "*")
+    leaderboards.record_project(connections.get_redis(), title, participants)
     print(f"Project '{title}' added successfully!")
 
 # -----------------------------
 # Analytics functions
 # -----------------------------
-def show_analytics():
-    cache_key = "analytics_top_researchers"
-    cached = r.get(cache_key)
-    if cached:
-        print("\n✅ Analytics fetched from Redis cache:")
-        print(json.loads(cached))
-        return
-
-    with neo_driver.session() as session:
-        print("\n--- Top Researchers by Projects ---")
+def compute_analytics():
+    analytics = {}
+    with connections.get_neo4j().session() as session:
         query_projects = """
         MATCH (r:Researcher)-[:WORKS_ON]->(p:Project)
         RETURN r.name AS name, count(DISTINCT p) AS projects
         ORDER BY projects DESC LIMIT 5
         """
-        top_proj = []
-        for rec in session.run(query_projects):
-            top_proj.append(f"{rec['name']}: {rec['projects']} projects")
-        print("\n".join(top_proj))
+        analytics["TopProjects"] = [f"{rec['name']}: {rec['projects']} projects" for rec in session.run(query_projects)]
 
-        print("\n--- Top Researchers by Publications ---")
         query_pubs = """
         MATCH (r:Researcher)-[:AUTHORED]->(pub:Publication)
         RETURN r.name AS name, count(pub) AS publications
         ORDER BY publications DESC LIMIT 5
         """
-        top_pub = []
-        for rec in session.run(query_pubs):
-            top_pub.append(f"{rec['name']}: {rec['publications']} publications")
-        print("\n".join(top_pub))
+        analytics["TopPublications"] = [f"{rec['name']}: {rec['publications']} publications" for rec in session.run(query_pubs)]
 
-        print("\n--- Most Collaborative Pairs (Co-Authors) ---")
         query_collab = """
         MATCH (a:Researcher)-[:CO_AUTHOR]->(b:Researcher)
         RETURN a.name AS researcher1, b.name AS researcher2, count(*) AS collaborations
         ORDER BY collaborations DESC LIMIT 5
         """
-        top_collab = []
-        for rec in session.run(query_collab):
-            top_collab.append(f"{rec['researcher1']} & {rec['researcher2']}: {rec['collaborations']} collaborations")
-        print("\n".join(top_collab))
+        analytics["TopCollaborations"] = [f"{rec['researcher1']} & {rec['researcher2']}: {rec['collaborations']} collaborations"
+                                          for rec in session.run(query_collab)]
+    return analytics
+
+def show_analytics():
+    driver = connections.get_neo4j()
+    if hasattr(driver, "query_cache"):
+        # Each query is cached until add_researcher / add_project writes the labels it reads
+        misses = driver.query_cache.stats["misses"]
+        analytics = compute_analytics()
+        source = "loaded" if driver.query_cache.stats["misses"] > misses else "cache"
+    else:
+        # Cached under the "analytics" TTL policy; only one caller recomputes on expiry
+        analytics, source = connections.get_cache().get_or_load("analytics", "analytics_top_researchers", compute_analytics)
+    if source == "loaded":
+        print("\n✅ Analytics computed from Neo4j and stored in Redis cache")
+    else:
+        print("\n✅ Analytics fetched from Redis cache:")
 
-        # Cache the analytics for 60 seconds
-        r.set(cache_key, json.dumps({"TopProjects": top_proj, "TopPublications": top_pub, "TopCollaborations": top_collab}), ex=60)
-        print("\n✅ Analytics stored in Redis cache for 60 seconds")
+    print("\n--- Top Researchers by Projects ---")
+    print("\n".join(analytics["TopProjects"]))
+    print("\n--- Top Researchers by Publications ---")
+    print("\n".join(analytics["TopPublications"]))
+    print("\n--- Most Collaborative Pairs (Co-Authors) ---")
+    print("\n".join(analytics["TopCollaborations"]))
 
 # -----------------------------
 # Interactive menu
@@ -206,13 +196,13 @@ def main_menu():
         choice = input("Select an option: ")
 
         if choice=="1":
-            for r in researchers_col.find():
+            for r in researchers_col().find():
                 print(f"Name: {r.get('name')}, Dept: {r.get('department')}, Interests: {', '.join(r.get('interests',[]))}")
         elif choice=="2":
-            for p in projects_col.find():
+            for p in projects_col().find():
                 print(f"Title: {p.get('title')}, Desc: {p.get('description','')}, Participants: {', '.join(p.get('participants',[]))}")
         elif choice=="3":
-            for pub in publications_col.find():
+            for pub in publications_col().find():
                 print(f"Title: {pub.get('title')}, Authors: {', '.join(pub.get('authors',[]))}, Project: {pub.get('project')}")
         elif choice=="4":
             name = input("Researcher Name: ")
@@ -2,51 +2,51 @@
 # Research Collaboration Management System
 # MongoDB (2 Accounts) + Neo4j + Redis
 
-from pymongo import MongoClient
-from neo4j import GraphDatabase
-import redis
+import connections
 from dotenv import load_dotenv
 import os
-import json
 import time
+from project_relations import projects_with_relations
+from cluster_reads import first_non_empty, merged, print_timings
+import listing
+import leaderboards
+import metrics
 
 load_dotenv()
 
-# -----------------------------
-# MongoDB Account 1
-# -----------------------------
-client1 = MongoClient(os.getenv("MONGO_URI_1"))
-db1 = client1["research_db"]
-researchers_col1 = db1["researchers"]
-projects_col1 = db1["projects"]
-publications_col1 = db1["publications"]
+# Analytics backend: "neo4j" (graph queries, MongoDB fallback), "mongo" (aggregation pipelines),
+# "sparse" (in-process matrices from MongoDB), "routed" (fastest engine per report)
+# or "leaderboard" (Redis sorted sets kept current by every write)
+ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "neo4j")
 
-# -----------------------------
-# MongoDB Account 2
-# -----------------------------
-client2 = MongoClient(os.getenv("MONGO_URI_2"))
-db2 = client2["research_db"]
-researchers_col2 = db2["researchers"]
-projects_col2 = db2["projects"]
-publications_col2 = db2["publications"]
+# Collaboration paths: graph read once from "mongo" or "neo4j", then kept in memory
+COLLAB_PATH_SOURCE = os.getenv("COLLAB_PATH_SOURCE", "mongo")
+COLLAB_PATH_MAX_HOPS = int(os.getenv("COLLAB_PATH_MAX_HOPS", "6"))
+
+# "Show all" views: rows per screen and MongoDB cursor batch size
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+LIST_BATCH_SIZE = int(os.getenv("LIST_BATCH_SIZE", str(listing.DEFAULT_BATCH_SIZE)))
 
 # -----------------------------
-# Neo4j connection
+# Connections: MongoDB (2 accounts), Neo4j and Redis come from the shared
+# registry in connections.py, created on first use and closed at exit, so
+# the menu starts without opening (or importing) any driver.
 # -----------------------------
-neo_driver = GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-)
+def cluster_collections(n):
+    db = connections.get_db(n)
+    return (f"Cluster {n}", db["researchers"], db["projects"], db["publications"])
 
 # -----------------------------
-# Redis connection
+# Labeled collections per cluster (read concurrently by cluster_reads)
 # -----------------------------
-r = redis.Redis(
-    host=os.getenv("REDIS_HOST"),
-    port=int(os.getenv("REDIS_PORT")),
-    password=os.getenv("REDIS_PASSWORD"),
-    decode_responses=True
-)
+def researcher_clusters():
+    return [(f"Cluster {n}", connections.get_db(n)["researchers"]) for n in (1, 2)]
+
+def project_clusters():
+    return [(f"Cluster {n}", connections.get_db(n)["projects"]) for n in (1, 2)]
+
+def publication_clusters():
+    return [(f"Cluster {n}", connections.get_db(n)["publications"]) for n in (1, 2)]
 
 # -----------------------------
 # Choose Cluster
@@ -61,14 +61,11 @@ def choose_cluster_collections():
 
         choice = input("Select option: ").strip()
         if choice == "1":
-            return [(researchers_col1, projects_col1, publications_col1)]
+            return [cluster_collections(1)]
         elif choice == "2":
-            return [(researchers_col2, projects_col2, publications_col2)]
+            return [cluster_collections(2)]
         elif choice == "3":
-            return [
-                (researchers_col1, projects_col1, publications_col1),
-                (researchers_col2, projects_col2, publications_col2)
-            ]
+            return [cluster_collections(1), cluster_collections(2)]
         elif choice == "0":
             print("❌ Operation cancelled. Nothing was saved.")
             return None
@@ -78,63 +75,72 @@ def choose_cluster_collections():
 # -----------------------------
 # Caching function for researcher
 # -----------------------------
+def load_researcher(name):
+    researcher, timings = first_non_empty(researcher_clusters(), lambda col: col.find_one({"name": name}))
+    print_timings(timings)
+    if researcher:
+        researcher["_id"] = str(researcher["_id"])
+    return researcher
+
 def cache_researcher(name):
     start_time = time.perf_counter()
-    data = r.get(f"researcher:{name}")
-    if data:
-        elapsed = time.perf_counter() - start_time
-        print(f"✅ Data fetched from Redis in {elapsed:.6f} seconds")
-        return json.loads(data)
-
-    researcher = researchers_col1.find_one({"name": name}) or \
-                 researchers_col2.find_one({"name": name})
+    researcher, source = connections.get_cache().get_or_load("researcher", name, lambda: load_researcher(name))
+    elapsed = time.perf_counter() - start_time
 
     if not researcher:
-        elapsed = time.perf_counter() - start_time
         print(f"No researcher found (checked MongoDB in {elapsed:.6f} seconds)")
-        return None
-
-    researcher["_id"] = str(researcher["_id"])
-    r.set(f"researcher:{name}", json.dumps(researcher), ex=60)
-    elapsed = time.perf_counter() - start_time
-    print(f"✅ Data fetched from MongoDB and cached in Redis in {elapsed:.6f} seconds")
+    elif source == "loaded":
+        print(f"✅ Data fetched from MongoDB and cached in Redis in {elapsed:.6f} seconds")
+    elif source == "local":
+        print(f"✅ Data fetched from the in-process cache in {elapsed:.6f} seconds")
+    elif source == "waited":
+        print(f"✅ Data fetched from Redis (loaded by another client) in {elapsed:.6f} seconds")
+    else:
+        print(f"✅ Data fetched from Redis in {elapsed:.6f} seconds")
     return researcher
 
 # -----------------------------
-# Show All Researchers
+# Streaming listings: both clusters merged, one page at a time
 # -----------------------------
-def show_all_researchers():
-    print("\n--- Account 1 Researchers ---")
-    for r_data in researchers_col1.find():
-        print(f"{r_data['name']} - {r_data['department']}")
+def print_listing(clusters, kind, heading, fmt, page_size=None, interactive=True):
+    page_size = page_size or LIST_PAGE_SIZE
+    timings = []
+    print(f"\n--- {heading} (Cluster 1 + Cluster 2) ---")
+    stream = listing.merged_stream(clusters, kind, batch_size=LIST_BATCH_SIZE, timings=timings)
+    shown = 0
+    for doc in stream:
+        print(fmt(doc))
+        shown += 1
+        if interactive and shown % page_size == 0:
+            with metrics.paused():
+                answer = input(f"-- {shown} shown, Enter for more, q to stop -- ")
+            if answer.strip().lower() == "q":
+                stream.close()
+                break
+    print_timings(timings)
 
-    print("\n--- Account 2 Researchers ---")
-    for r_data in researchers_col2.find():
-        print(f"{r_data['name']} - {r_data['department']}")
+# -----------------------------
+# Show All Researchers
+# -----------------------------
+def show_all_researchers(page_size=None, interactive=True):
+    print_listing(researcher_clusters(), "researchers", "Researchers",
+                  lambda r_data: f"{r_data['name']} - {r_data.get('department')}", page_size, interactive)
 
 # -----------------------------
 # Show All Projects
 # -----------------------------
-def show_all_projects():
-    print("\n--- Account 1 Projects ---")
-    for p in projects_col1.find():
-        print(f"{p['title']} - Participants: {', '.join(p.get('participants', []))}")
-
-    print("\n--- Account 2 Projects ---")
-    for p in projects_col2.find():
-        print(f"{p['title']} - Participants: {', '.join(p.get('participants', []))}")
+def show_all_projects(page_size=None, interactive=True):
+    print_listing(project_clusters(), "projects", "Projects",
+                  lambda p: f"{p['title']} - Participants: {', '.join(p.get('participants', []))}",
+                  page_size, interactive)
 
 # -----------------------------
 # Show All Publications
 # -----------------------------
-def show_all_publications():
-    print("\n--- Account 1 Publications ---")
-    for pub in publications_col1.find():
-        print(f"{pub['title']} - Authors: {', '.join(pub.get('authors', []))} - Project: {pub.get('project')}")
-
-    print("\n--- Account 2 Publications ---")
-    for pub in publications_col2.find():
-        print(f"{pub['title']} - Authors: {', '.join(pub.get('authors', []))} - Project: {pub.get('project')}")
+def show_all_publications(page_size=None, interactive=True):
+    print_listing(publication_clusters(), "publications", "Publications",
+                  lambda pub: f"{pub['title']} - Authors: {', '.join(pub.get('authors', []))} - Project: {pub.get('project')}",
+                  page_size, interactive)
 
 # -----------------------------
 # Show Researcher by Name
@@ -143,43 +149,35 @@ def show_researcher_by_name(name):
     r_data = cache_researcher(name)
     if not r_data:
         print(f"No researcher found with name '{name}'")
+        show_did_you_mean("researcher", name)
         return
 
     print(f"\nName: {r_data.get('name','')}, Department: {r_data.get('department','')}, Interests: {', '.join(r_data.get('interests', []))}")
-    projects1 = projects_col1.find({"participants": name})
-    projects2 = projects_col2.find({"participants": name})
-    all_projects = list(projects1) + list(projects2)
+    all_projects, timings = merged(project_clusters(), lambda col: list(col.find({"participants": name})),
+                                   key=lambda d: d["title"])
     print("Projects:")
     for p in all_projects:
         print(f" - {p.get('title')}")
+    print_timings(timings)
 
 # -----------------------------
 # Show Project by Title (Updated)
 # -----------------------------
 def show_project_by_title(title):
-    project = projects_col1.find_one({"title": title}) or projects_col2.find_one({"title": title})
-    if not project:
+    with connections.get_neo4j().session() as session:
+        found, timings = projects_with_relations(project_clusters(), session, [title])
+    print_timings(timings)
+    if not found:
         print(f"No project found with title '{title}'")
+        show_did_you_mean("project", title)
         return
 
+    project, relations = found[0]
     participants = project.get("participants", [])
     print(f"\nTitle: {project.get('title')}")
     print("Participants:", ", ".join(participants))
 
-    # Relationships (Neo4j) - Updated to handle TEAMMATE, CO_AUTHOR, AUTHORED
-    relations = {}
-    with neo_driver.session() as session:
-        for i, r1 in enumerate(participants):
-            for r2 in participants[i+1:]:
-                q = """
-                MATCH (a:Researcher {name:$r1})-[rel]->(b:Researcher {name:$r2})
-                WHERE type(rel) IN ['WORKED_ON','TEAMMATE','CO_AUTHOR','AUTHORED']
-                RETURN type(rel) AS relation
-                """
-                for rec in session.run(q, r1=r1, r2=r2):
-                    rel_type = rec['relation']
-                    relations.setdefault(rel_type, set()).update([r1, r2])
-
+    # Relationships (Neo4j) - all participant pairs in a single query
     print("\nRelationships in this project:")
     if relations:
         for rel_type, names in relations.items():
@@ -190,89 +188,243 @@ def show_project_by_title(title):
 # -----------------------------
 # Option 6: Analytics (Top Researchers by Projects + collaborators)
 # -----------------------------
-def show_analytics():
+def show_analytics(backend=None):
+    backend = backend or ANALYTICS_BACKEND
     start_time = time.perf_counter()
-    cache_key = "top_researchers_projects"
-    cached_data = r.get(cache_key)
+    engines = []
+    if backend == "leaderboard":
+        # Always current, no TTL cache needed
+        analytics, source = leaderboards.LeaderboardAnalytics(connections.get_redis()).top_researchers(5), "leaderboard"
+    elif backend == "neo4j" and hasattr(connections.get_neo4j(), "query_cache"):
+        # No TTL cache either: the query cache drops the result when a write touches its labels
+        # (the outbox worker's included), so it is never older than the last relevant write
+        from neo4j_analytics import make_engine
+        driver = connections.get_neo4j()
+        misses = driver.query_cache.stats["misses"]
+        engines.append(make_engine(backend, driver=driver, mongo_db=connections.get_db(1)))
+        analytics = engines[0].top_researchers(5)
+        source = "loaded" if driver.query_cache.stats["misses"] > misses else "query_cache"
+    else:
+        # neo4j falls back to MongoDB aggregations when Neo4j is down or times out
+        # (engines import their drivers, so they are loaded on first use)
+        from neo4j_analytics import make_engine
+        def compute():
+            engines.append(make_engine(backend, driver=connections.get_neo4j(), mongo_db=connections.get_db(1)))
+            return engines[0].top_researchers(5)
+        analytics, source = connections.get_cache().get_or_load("analytics", f"top_researchers_projects:{backend}", compute)
+    elapsed = time.perf_counter() - start_time
 
-    if cached_data:
-        analytics = json.loads(cached_data)
-        elapsed = time.perf_counter() - start_time
-        print(f"✅ Analytics fetched from Redis in {elapsed:.6f} seconds")
+    if source == "leaderboard":
+        print(f"✅ Analytics read from Redis leaderboards in {elapsed:.6f} seconds")
+    elif source == "query_cache":
+        print(f"✅ Analytics fetched from the Neo4j query cache in {elapsed:.6f} seconds")
+    elif source == "loaded":
+        used = getattr(engines[0], "last_engine", None) if engines else None
+        print(f"✅ Analytics computed from {used or backend} and stored in Redis in {elapsed:.6f} seconds")
     else:
-        analytics = []
-        with neo_driver.session() as session:
-            query = """
-            MATCH (r:Researcher)-[:WORKED_ON]->(p:Project)<-[:WORKED_ON]-(co:Researcher)
-            WHERE r <> co
-            RETURN r.name AS name, count(DISTINCT p) AS projects, count(DISTINCT co) AS collaborators
-            ORDER BY projects DESC LIMIT 5
-            """
-            for rec in session.run(query):
-                analytics.append({
-                    "name": rec["name"],
-                    "projects": rec["projects"],
-                    "collaborators": rec["collaborators"]
-                })
-        r.set(cache_key, json.dumps(analytics), ex=60)
-        elapsed = time.perf_counter() - start_time
-        print(f"✅ Analytics computed from Neo4j and stored in Redis in {elapsed:.6f} seconds")
+        print(f"✅ Analytics fetched from Redis in {elapsed:.6f} seconds")
 
     print("\n--- Top Researchers by Projects ---")
     for r_data in analytics:
         print(f"{r_data['name']}: {r_data['projects']} projects, {r_data['collaborators']} collaborators")
 
+# -----------------------------
+# Option 9: Suggested collaborators (precomputed by `python recommendations.py --rebuild`)
+# -----------------------------
+def show_suggestions(name, limit=5):
+    import recommendations
+    start_time = time.perf_counter()
+    found = recommendations.suggestions(connections.get_redis(), name, limit)
+    elapsed = time.perf_counter() - start_time
+    if found is None:
+        print(f"No suggestions stored for '{name}' (run: python recommendations.py --rebuild)")
+        return
+    print(f"✅ Suggestions read from Redis in {elapsed:.6f} seconds")
+    print(f"\n--- Suggested Collaborators for {name} ---")
+    for s in found:
+        reasons = [f"{s['common']} common collaborators"]
+        if s["shared_interests"]:
+            reasons.append(f"interests: {', '.join(s['shared_interests'])}")
+        if s["same_department"]:
+            reasons.append("same department")
+        print(f"{s['name']} ({s['score']}): {'; '.join(reasons)}")
+
+# -----------------------------
+# Option 10: Collaboration path between two researchers
+# -----------------------------
+_collab_graph = None
+
+def collab_graph():
+    # Built on first use; add_researcher / add_project keep it current afterwards
+    global _collab_graph
+    if _collab_graph is None:
+        from collab_path import CollaborationGraph
+        start_time = time.perf_counter()
+        if COLLAB_PATH_SOURCE == "neo4j":
+            _collab_graph = CollaborationGraph.from_neo4j(connections.get_neo4j())
+        else:
+            _collab_graph = CollaborationGraph.from_mongo(connections.get_db(1))
+        print(f"✅ Collaboration graph loaded from {COLLAB_PATH_SOURCE} in {time.perf_counter() - start_time:.3f} seconds")
+    return _collab_graph
+
+def show_collaboration_path(a, b, max_hops=None):
+    from collab_path import print_path
+    graph = collab_graph()
+    start_time = time.perf_counter()
+    found = graph.shortest_path(a, b, max_hops or COLLAB_PATH_MAX_HOPS)
+    print_path(a, b, found, time.perf_counter() - start_time)
+
+# -----------------------------
+# Option 11: Search researchers by interest / department (search_index.py)
+# -----------------------------
+def search_researchers(query, page_size=None, interactive=True):
+    import search_index
+    page_size = page_size or LIST_PAGE_SIZE
+    page = 1
+    while True:
+        start_time = time.perf_counter()
+        try:
+            found = search_index.search(connections.get_redis(), query, page, page_size)
+        except search_index.QueryError as e:
+            print(f"❌ {e}")
+            return
+        elapsed = time.perf_counter() - start_time
+        if page == 1:
+            print(f"✅ {found['total']} researchers match (searched in {elapsed:.6f} seconds)")
+        for row in found["results"]:
+            print(f"{row['name']} - {row['department']} - {', '.join(row['interests'])}")
+        shown = found["offset"] + len(found["results"])
+        if shown >= found["total"] or not interactive:
+            break
+        with metrics.paused():
+            answer = input(f"-- {shown} of {found['total']} shown, Enter for more, q to stop -- ")
+        if answer.strip().lower() == "q":
+            break
+        page += 1
+
+# -----------------------------
+# Option 12: Autocomplete / "did you mean" over names and titles (fuzzy_search.py)
+# -----------------------------
+_fuzzy = None
+
+def fuzzy_matcher():
+    # Loaded from Redis on the first lookup, then refreshed from the insert log
+    global _fuzzy
+    if _fuzzy is None:
+        from fuzzy_search import FuzzyMatcher
+        _fuzzy = FuzzyMatcher(connections.get_redis())
+    return _fuzzy
+
+def show_did_you_mean(kind, text):
+    from fuzzy_search import print_suggestions
+    print_suggestions(fuzzy_matcher().suggest(kind, text))
+
+def find_by_name(kind, text, limit=10):
+    start_time = time.perf_counter()
+    found = fuzzy_matcher().suggest(kind, text, limit)
+    print(f"✅ {len(found)} candidates in {time.perf_counter() - start_time:.6f} seconds")
+    for s in found:
+        print(f" - {s['name']} ({s['match']}, {s['score']})")
+
+# -----------------------------
+# Outbox worker: applies add_researcher / add_project to Neo4j and Redis
+# (outbox.py) after the MongoDB write has returned
+# -----------------------------
+_outbox_worker = None
+
+def notify_outbox():
+    # OUTBOX_WORKER=external: a separate `python outbox.py --follow` drains it
+    global _outbox_worker
+    import outbox
+    if outbox.OUTBOX_WORKER != "thread":
+        return
+    if _outbox_worker is None:
+        _outbox_worker = outbox.OutboxWorker([(f"Cluster {n}", connections.get_db(n)) for n in (1, 2)],
+                                             connections.get_neo4j(), connections.get_redis(),
+                                             fuzzy=fuzzy_matcher(), cache=connections.get_cache()).start()
+    _outbox_worker.notify()
+
 # -----------------------------
 # Add Researcher
 # -----------------------------
-def add_researcher(name, department, interests):
-    targets = choose_cluster_collections()
+def add_researcher(name, department, interests, targets=None):
+    targets = targets or choose_cluster_collections()
     if targets is None:
         return
 
-    for r_col, _, _ in targets:
-        r_col.insert_one({"name": name, "department": department, "interests": interests})
+    # One bulk upsert per cluster, all clusters in parallel, with its outbox event
+    # (imported here: replicated_writer pulls in pymongo, which the menu only needs once it writes)
+    from replicated_writer import replicated_write, print_write_report
+    from outbox import researcher_event
+    result = replicated_write(targets, researchers=[{"name": name, "department": department, "interests": interests}],
+                              events=[researcher_event(name, department, interests)])
+    print_write_report(result)
+    if not any(rep["ok"] for rep in result["clusters"]):
+        print(f"❌ Researcher '{name}' was not saved.")
+        return
 
-    # Neo4j once
-    with neo_driver.session() as session:
-        session.execute_write(
-            lambda tx: tx.run("MERGE (r:Researcher {name:$name}) SET r.department=$dept", name=name, dept=department)
-        )
+    # Drop stale copies in Redis and in every process's local tier; Neo4j, the
+    # leaderboards, the search indexes and the cached analytics follow from the outbox
+    connections.get_cache().invalidate("researcher", name)
+    notify_outbox()
+    if _collab_graph is not None:
+        _collab_graph.add_researcher(name)
+    from neo4j_analytics import loaded_sparse_engine
+    sparse_engine = loaded_sparse_engine()
+    if sparse_engine is not None:
+        sparse_engine.add_researcher(name)
 
     print(f"✅ Researcher '{name}' added successfully!")
 
 # -----------------------------
 # Add Project
 # -----------------------------
-def add_project(title, description, participants, publications=[]):
-    targets = choose_cluster_collections()
+def add_project(title, description, participants, publications=[], targets=None):
+    targets = targets or choose_cluster_collections()
     if targets is None:
         return
 
-    for _, p_col, pub_col in targets:
-        p_col.insert_one({"title": title, "description": description, "participants": participants})
+    # One bulk upsert per collection and cluster, all clusters in parallel, with its
+    # outbox event; publications keep their existing document if the title already exists
+    from replicated_writer import replicated_write, print_write_report
+    from outbox import project_event
+    result = replicated_write(
+        targets,
+        projects=[{"title": title, "description": description, "participants": participants}],
+        publications=[{"title": pub_title, "project": title, "authors": participants} for pub_title in publications],
+        events=[project_event(title, participants, publications)],
+    )
+    print_write_report(result)
+    if not any(rep["ok"] for rep in result["clusters"]):
+        print(f"❌ Project '{title}' was not saved.")
+        return
 
+    # Cached analytics are dropped by the outbox worker once Neo4j has the project
+    notify_outbox()
+    if _collab_graph is not None:
+        _collab_graph.add_group("project", title, participants)
+        for pub_title in publications:
+            _collab_graph.add_group("publication", pub_title, participants)
+    from neo4j_analytics import loaded_sparse_engine
+    sparse_engine = loaded_sparse_engine()
+    if sparse_engine is not None:
+        sparse_engine.add_group("project", title, participants)
         for pub_title in publications:
-            if not pub_col.find_one({"title": pub_title}):
-                pub_col.insert_one({"title": pub_title, "project": title, "authors": participants})
-
-    # Neo4j once
-    with neo_driver.session() as session:
-        session.execute_write(lambda tx: tx.run("MERGE (p:Project {title:$title})", title=title))
-        for r_name in participants:
-            session.execute_write(
-                lambda tx: tx.run("""
-                    MATCH (r:Researcher {name:$r})
-                    MATCH (p:Project {title:$t})
-                    MERGE (r)-[:WORKED_ON]->(p)
-                """, r=r_name, t=title)
-            )
+            sparse_engine.add_group("publication", pub_title, participants)
 
     print(f"✅ Project '{title}' added successfully!")
 
 # -----------------------------
 # Interactive Menu
 # -----------------------------
+MENU_ACTIONS = {
+    "1": "show_all_researchers", "2": "show_all_projects", "3": "show_all_publications",
+    "4": "add_researcher", "5": "add_project", "6": "show_analytics",
+    "7": "show_researcher_by_name", "8": "show_project_by_title", "9": "show_suggestions",
+    "10": "show_collaboration_path", "11": "search_researchers",
+    "12": "find_by_name",
+}
+
 def main_menu():
     while True:
         print("\n--- Research Collaboration System ---")
@@ -284,41 +436,97 @@ def main_menu():
         print("6. Show Analytics (Neo4j + Redis)")
         print("7. Show Researcher by Name")
         print("8. Show Project by Title")
+        print("9. Suggest Collaborators")
+        print("10. Collaboration Path Between Researchers")
+        print("11. Search Researchers (interest / department)")
+        print("12. Find by Name / Title (autocomplete)")
         print("0. Exit")
 
         choice = input("Select an option: ").strip()
 
         if choice=="1":
-            show_all_researchers()
+            task = show_all_researchers
         elif choice=="2":
-            show_all_projects()
+            task = show_all_projects
         elif choice=="3":
-            show_all_publications()
+            task = show_all_publications
         elif choice=="4":
             name = input("Researcher Name: ")
             dept = input("Department: ")
             interests = [i.strip() for i in input("Interests (comma separated): ").split(",")]
-            add_researcher(name.strip(), dept.strip(), interests)
+            targets = choose_cluster_collections()
+            if targets is None:
+                continue
+            task = lambda: add_researcher(name.strip(), dept.strip(), interests, targets)
         elif choice=="5":
             title = input("Project Title: ")
             desc = input("Project Description: ")
             participants = [p.strip() for p in input("Participants (comma separated): ").split(",")]
             pubs = [p.strip() for p in input("Publications (comma separated, optional): ").split(",") if p.strip()]
-            add_project(title.strip(), desc.strip(), participants, pubs)
+            targets = choose_cluster_collections()
+            if targets is None:
+                continue
+            task = lambda: add_project(title.strip(), desc.strip(), participants, pubs, targets)
         elif choice=="6":
-            show_analytics()
+            task = show_analytics
         elif choice=="7":
             name = input("Enter Researcher Name: ")
-            show_researcher_by_name(name.strip())
+            task = lambda: show_researcher_by_name(name.strip())
         elif choice=="8":
             title = input("Enter Project Title: ")
-            show_project_by_title(title.strip())
+            task = lambda: show_project_by_title(title.strip())
+        elif choice=="9":
+            name = input("Enter Researcher Name: ")
+            task = lambda: show_suggestions(name.strip())
+        elif choice=="10":
+            a = input("From Researcher: ")
+            b = input("To Researcher: ")
+            task = lambda: show_collaboration_path(a.strip(), b.strip())
+        elif choice=="11":
+            query = input('Query (e.g. interest:AI AND dept:"Computer Science"): ')
+            task = lambda: search_researchers(query.strip())
+        elif choice=="12":
+            kind = {"1": "researcher", "2": "project", "3": "publication"}.get(
+                input("Find: 1. Researcher  2. Project  3. Publication: ").strip())
+            if kind is None:
+                print("Invalid choice. Try again!")
+                continue
+            text = input("Name / title (or its beginning): ")
+            task = lambda: find_by_name(kind, text.strip())
         elif choice=="0":
             print("Exiting...")
             break
         else:
             print("Invalid choice. Try again!")
+            continue
+
+        # Prompts (cluster choice included) are answered above and paging waits
+        # are paused, so the action is timed without user input
+        with metrics.action(MENU_ACTIONS[choice]):
+            task()
 
 if __name__=="__main__":
-    main_menu()
+    import argparse
+    parser = argparse.ArgumentParser(description="Research Collaboration Management System")
+    parser.add_argument("--remote", metavar="HOST:PORT",
+                        help="run the menu as a thin client of service.py instead of connecting directly")
+    args = parser.parse_args()
+    metrics.serve_from_env()
+
+    if args.remote:
+        from service_client import ServiceClient, remote_menu
+        host, _, port = args.remote.rpartition(":")
+        client = ServiceClient(host or "127.0.0.1", int(port))
+        try:
+            remote_menu(client)
+        finally:
+            client.close()
+    else:
+        connections.record_startup("main_demo_fixed")
+        try:
+            main_menu()
+        finally:
+            # Apply what is still pending before the process goes away
+            if _outbox_worker is not None:
+                _outbox_worker.stop(flush=True)
 
@@ -0,0 +1,442 @@
+# metrics.py
+# Per-backend latency instrumentation:
+#  - MongoDB: pymongo command monitoring, one listener per cluster
+#  - Neo4j:   wrapper around the driver's sessions and transactions (queries timed
+#             until their result is consumed, managed transactions timed apart)
+#  - Redis:   wrapper around execute_command and pipeline execute
+#  - cache:   hit / miss counters from get_or_load's source
+# Every sample is tagged with the current menu action (see action()); time
+# spent waiting on the user inside an action is left out with paused().
+# Exposed as Prometheus text (METRICS_PORT=9108 serves /metrics once an entry
+# point calls serve_from_env(); importing this module opens no port) and/or
+# written to a local file (METRICS_FILE=metrics.prom, after every action and at exit).
+# METRICS_ENABLED=0 turns everything off: no listener, no wrapper is installed
+# and the clients are returned untouched.
+
+import atexit
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_FILE = os.getenv("METRICS_FILE")
+PREFIX = "rc"
+
+# Seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_action = contextvars.ContextVar("metrics_action", default="none")
+_paused = contextvars.ContextVar("metrics_paused", default=None)
+
+# -----------------------------
+# Registry
+# -----------------------------
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self.counters = {}    # (name, labels) -> value
+
+    def observe(self, name, labels, seconds):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def render(self):
+        def fmt(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        lines = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (name, labels), h in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in zip(BUCKETS, h):
+                lines.append(f"{name}_bucket{fmt(labels, [('le', repr(bound))])} {count}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {h[-1]}")
+            lines.append(f"{name}_sum{fmt(labels)} {h[-2]:.9f}")
+            lines.append(f"{name}_count{fmt(labels)} {h[-1]}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REQUEST_SECONDS = f"{PREFIX}_backend_request_seconds"
+TRANSACTION_SECONDS = f"{PREFIX}_backend_transaction_seconds"
+COMMANDS = f"{PREFIX}_backend_commands_total"
+BYTES = f"{PREFIX}_backend_bytes_total"
+CACHE_REQUESTS = f"{PREFIX}_cache_requests_total"
+ACTION_SECONDS = f"{PREFIX}_action_seconds"
+STARTUP_SECONDS = f"{PREFIX}_startup_seconds"
+HELP = {
+    REQUEST_SECONDS: "Latency of one round trip to a backend",
+    TRANSACTION_SECONDS: "Latency of a Neo4j managed transaction, retries included (its queries are in request_seconds)",
+    COMMANDS: "Commands sent to a backend (a pipeline or transaction carries several per round trip)",
+    BYTES: "Bytes sent to and received from a backend (MongoDB and Redis only)",
+    CACHE_REQUESTS: "Read-through cache lookups by result",
+    ACTION_SECONDS: "End-to-end latency of a menu action",
+    STARTUP_SECONDS: "Time from process start until a script is ready (see connections.record_startup)",
+}
+
+registry = Registry()
+
+def record(backend, target, operation, seconds, commands=1, sent=0, received=0):
+    labels = {"backend": backend, "target": target, "operation": operation, "action": _action.get()}
+    registry.observe(REQUEST_SECONDS, labels, seconds)
+    registry.inc(COMMANDS, labels, commands)
+    if sent:
+        registry.inc(BYTES, dict(labels, direction="sent"), sent)
+    if received:
+        registry.inc(BYTES, dict(labels, direction="received"), received)
+
+# -----------------------------
+# Menu action tagging
+# -----------------------------
+@contextlib.contextmanager
+def _timed_action(name):
+    token = _action.set(name)
+    paused_seconds = [0.0]
+    paused_token = _paused.set(paused_seconds)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(ACTION_SECONDS, {"action": name}, time.perf_counter() - start_time - paused_seconds[0])
+        _paused.reset(paused_token)
+        _action.reset(token)
+        if METRICS_FILE:
+            write_file(METRICS_FILE)
+
+def action(name):
+    return _timed_action(name) if ENABLED else contextlib.nullcontext()
+
+@contextlib.contextmanager
+def paused():
+    # with metrics.paused(): input(...)  -- not counted in the current action's time
+    paused_seconds = _paused.get()
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        if paused_seconds is not None:
+            paused_seconds[0] += time.perf_counter() - start_time
+
+# -----------------------------
+# MongoDB: command monitoring
+# -----------------------------
+_listener_class = None
+
+def _mongo_listener_class():
+    # Built on first use so importing metrics does not import pymongo
+    global _listener_class
+    if _listener_class is None:
+        import bson
+        from pymongo import monitoring
+
+        class MongoCommandListener(monitoring.CommandListener):
+            def __init__(self, cluster):
+                self.cluster = cluster
+                self._sent = {}
+
+            def started(self, event):
+                self._sent[(event.connection_id, event.request_id)] = len(bson.encode(event.command))
+
+            def _finished(self, event, reply):
+                sent = self._sent.pop((event.connection_id, event.request_id), 0)
+                received = len(bson.encode(reply)) if reply else 0
+                record("mongo", self.cluster, event.command_name, event.duration_micros / 1e6,
+                       sent=sent, received=received)
+
+            def succeeded(self, event):
+                self._finished(event, event.reply)
+
+            def failed(self, event):
+                self._finished(event, None)
+
+        _listener_class = MongoCommandListener
+    return _listener_class
+
+def mongo_listeners(cluster):
+    # MongoClient(uri, event_listeners=metrics.mongo_listeners("Cluster 1"))
+    return [_mongo_listener_class()(cluster)] if ENABLED else []
+
+# -----------------------------
+# Neo4j: session / transaction wrappers
+# Round trips are counted per query; the driver does not expose byte counts.
+# -----------------------------
+def _operation(query):
+    words = query.split()
+    return words[0].upper() if words else "?"
+
+# Result methods that read the records to the end
+_CONSUMING = {"consume", "data", "single", "value", "values", "graph", "to_df", "to_eager_result"}
+
+class _TimedResult:
+    # Records are streamed: the query is timed from run() until its result is consumed
+    def __init__(self, result, target, operation):
+        self._result = result
+        self._target = target
+        self._operation = operation
+        self._start_time = time.perf_counter()
+        self._done = False
+
+    def finish(self):
+        if not self._done:
+            self._done = True
+            record("neo4j", self._target, self._operation, time.perf_counter() - self._start_time)
+
+    def __getattr__(self, name):
+        attr = getattr(self._result, name)
+        if name not in _CONSUMING:
+            return attr
+
+        def consuming(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.finish()
+        return consuming
+
+    def __iter__(self):
+        try:
+            yield from self._result
+        finally:
+            self.finish()
+
+class _InstrumentedTransaction:
+    def __init__(self, tx, target):
+        self._tx = tx
+        self._target = target
+        self.results = []
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+    def run(self, query, parameters=None, **kwargs):
+        result = _TimedResult(self._tx.run(query, parameters, **kwargs), self._target, _operation(query))
+        self.results.append(result)
+        return result
+
+class _InstrumentedSession:
+    def __init__(self, session, target):
+        self._session = session
+        self._target = target
+        self._results = []
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self._session.__exit__(*exc)
+        finally:
+            self._finish()
+
+    def close(self):
+        try:
+            self._session.close()
+        finally:
+            self._finish()
+
+    def _finish(self):
+        # Results never read to the end are done once the session has closed
+        for result in self._results:
+            result.finish()
+        self._results = []
+
+    def run(self, query, parameters=None, **kwargs):
+        result = _TimedResult(self._session.run(query, parameters, **kwargs), self._target, _operation(query))
+        self._results = [r for r in self._results if not r._done] + [result]
+        return result
+
+    def _execute(self, method, kind, fn, args, kwargs):
+        def work(tx, *a, **kw):
+            tx = _InstrumentedTransaction(tx, self._target)
+            try:
+                return fn(tx, *a, **kw)
+            finally:
+                for result in tx.results:
+                    result.finish()
+
+        start_time = time.perf_counter()
+        try:
+            return method(work, *args, **kwargs)
+        finally:
+            registry.observe(TRANSACTION_SECONDS, {"backend": "neo4j", "target": self._target, "operation": kind,
+                                                   "action": _action.get()}, time.perf_counter() - start_time)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return self._execute(self._session.execute_read, "execute_read", fn, args, kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return self._execute(self._session.execute_write, "execute_write", fn, args, kwargs)
+
+class _InstrumentedDriver:
+    def __init__(self, driver, target):
+        self._driver = driver
+        self._target = target
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def session(self, **kwargs):
+        return _InstrumentedSession(self._driver.session(**kwargs), self._target)
+
+def instrument_neo4j(driver, target="Neo4j"):
+    return _InstrumentedDriver(driver, target) if ENABLED else driver
+
+# -----------------------------
+# Redis: execute_command and pipelines, patched on the instance
+# -----------------------------
+def _size(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple, set)):
+        return sum(_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_size(k) + _size(v) for k, v in value.items())
+    return len(str(value)) if value is not None else 0
+
+def instrument_redis(client, target="Redis"):
+    if not ENABLED:
+        return client
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    def timed_command(*args, **options):
+        start_time = time.perf_counter()
+        reply = execute_command(*args, **options)
+        record("redis", target, str(args[0]).upper(), time.perf_counter() - start_time,
+               sent=_size(args), received=_size(reply))
+        return reply
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def timed_execute(*a, **kw):
+            commands = len(pipe.command_stack)
+            sent = sum(_size(c[0]) for c in pipe.command_stack)
+            start_time = time.perf_counter()
+            replies = execute(*a, **kw)
+            record("redis", target, "PIPELINE", time.perf_counter() - start_time,
+                   commands=commands, sent=sent, received=_size(replies))
+            return replies
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_command
+    client.pipeline = timed_pipeline
+    return client
+
+# -----------------------------
+# Cache hit / miss
+# -----------------------------
+def instrument_cache(cache):
+    # source "cache" / "local" -> hit, "waited" -> hit after waiting on another loader, "loaded" -> miss
+    if not ENABLED:
+        return cache
+    get_or_load = cache.get_or_load
+
+    def counted(entity, ident, loader):
+        value, source = get_or_load(entity, ident, loader)
+        result = "miss" if source == "loaded" else "hit"
+        registry.inc(CACHE_REQUESTS, {"entity": entity, "result": result, "source": source,
+                                      "action": _action.get()})
+        return value, source
+
+    cache.get_or_load = counted
+    return cache
+
+def cache_hit_ratio():
+    hits = misses = 0
+    with registry._lock:
+        for (name, labels), value in registry.counters.items():
+            if name == CACHE_REQUESTS:
+                if dict(labels)["result"] == "hit":
+                    hits += value
+                else:
+                    misses += value
+    return hits / (hits + misses) if hits + misses else None
+
+# -----------------------------
+# Export
+# -----------------------------
+def render():
+    return registry.render()
+
+def write_file(path):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+def start_http_server(port, host="127.0.0.1"):
+    # http.server is imported only when the endpoint is wanted
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def serve_from_env():
+    # Called by the long-running entry points (main_demo_fixed.py, service.py, outbox.py --follow)
+    if ENABLED and os.getenv("METRICS_PORT"):
+        return start_http_server(int(os.getenv("METRICS_PORT")))
+    return None
+
+if ENABLED and METRICS_FILE:
+    atexit.register(write_file, METRICS_FILE)
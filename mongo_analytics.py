@@ -0,0 +1,282 @@
+# mongo_analytics.py
+# The analytics reports of neo4j_analytics.py answered by MongoDB itself:
+# server-side $unwind / $group / $lookup pipelines over the `participants`
+# and `authors` arrays, so the reports keep working when Neo4j is slow or down.
+# Same report shapes as Neo4jAnalytics and SparseAnalytics; like the sparse
+# engine, only names present in the researchers collection are counted.
+#
+# Also here:
+#  - FallbackAnalytics: Neo4j first, MongoDB when Neo4j fails or times out
+#  - RoutedAnalytics:   each report sent to the engine that measured fastest
+#  - compare():         side-by-side latency of every report on every engine
+#                        (warm calls; the CLI also prints each engine's build time)
+#  - parity():          the reports every engine disagrees on (should be none)
+#
+#   python mongo_analytics.py --compare neo4j,mongo,sparse --save-routes .analytics_routes.json
+#   python mongo_analytics.py --compare neo4j,mongo,sparse --parity
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPORTS = ("top_authors", "top_coauthor_pairs", "top_teammates", "top_researchers")
+DEFAULT_ROUTES_FILE = ".analytics_routes.json"
+
+# -----------------------------
+# Pipeline building blocks
+# -----------------------------
+def known_members(field):
+    # One document per source document: {_id, members: [distinct names that are researchers]}
+    return [
+        {"$project": {field: 1}},
+        {"$unwind": f"${field}"},
+        {"$group": {"_id": {"doc": "$_id", "name": f"${field}"}}},
+        {"$lookup": {"from": "researchers", "localField": "_id.name", "foreignField": "name", "as": "researcher"}},
+        {"$match": {"researcher": {"$ne": []}}},
+        {"$group": {"_id": "$_id.doc", "members": {"$push": "$_id.name"}}},
+    ]
+
+def collaborators_per_member():
+    # members -> {_id: name, projects, collaborators (distinct co-members)}.
+    # The (a, a) pair occurs once per project of a, so it carries the project count.
+    same = {"$eq": ["$_id.a", "$_id.b"]}
+    return [
+        {"$project": {"a": "$members", "b": "$members"}},
+        {"$unwind": "$a"},
+        {"$unwind": "$b"},
+        {"$group": {"_id": {"a": "$a", "b": "$b"}, "n": {"$sum": 1}}},
+        {"$group": {"_id": "$_id.a",
+                    "projects": {"$max": {"$cond": [same, "$n", 0]}},
+                    "collaborators": {"$sum": {"$cond": [same, 0, 1]}}}},
+    ]
+
+def top_researchers_pipeline(limit):
+    # projects collection -> [{_id: name, projects, collaborators}] (also used by service.py)
+    return known_members("participants") + collaborators_per_member() + [
+        {"$match": {"collaborators": {"$gt": 0}}},
+        {"$sort": {"projects": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+
+# -----------------------------
+# Engine
+# -----------------------------
+class MongoAnalytics:
+    def __init__(self, mongo_db):
+        self.db = mongo_db
+
+    def _aggregate(self, collection, pipeline):
+        return list(self.db[collection].aggregate(pipeline, allowDiskUse=True))
+
+    def top_authors(self, limit=5):
+        rows = self._aggregate("publications", known_members("authors") + [
+            {"$unwind": "$members"},
+            {"$group": {"_id": "$members", "publications": {"$sum": 1}}},
+            {"$sort": {"publications": -1, "_id": 1}},
+            {"$limit": limit},
+        ])
+        return [{"name": row["_id"], "publications": row["publications"]} for row in rows]
+
+    def top_coauthor_pairs(self, limit=5):
+        rows = self._aggregate("publications", known_members("authors") + [
+            {"$project": {"a": "$members", "b": "$members"}},
+            {"$unwind": "$a"},
+            {"$unwind": "$b"},
+            {"$match": {"$expr": {"$lt": ["$a", "$b"]}}},
+            {"$group": {"_id": {"a": "$a", "b": "$b"}, "collaborations": {"$sum": 1}}},
+            {"$sort": {"collaborations": -1, "_id.a": 1, "_id.b": 1}},
+            {"$limit": limit},
+        ])
+        return [{"researcher1": row["_id"]["a"], "researcher2": row["_id"]["b"],
+                 "collaborations": row["collaborations"]} for row in rows]
+
+    def top_teammates(self, limit=5):
+        rows = self._aggregate("projects", known_members("participants") + collaborators_per_member() + [
+            {"$match": {"collaborators": {"$gt": 0}}},
+            {"$sort": {"collaborators": -1, "_id": 1}},
+            {"$limit": limit},
+        ])
+        return [{"name": row["_id"], "teammates": row["collaborators"]} for row in rows]
+
+    def project_members(self, title):
+        project = self.db["projects"].find_one({"title": title}, {"_id": 0, "participants": 1})
+        if not project:
+            return []
+        names = list(dict.fromkeys(project.get("participants", [])))
+        known = {r["name"] for r in self.db["researchers"].find({"name": {"$in": names}}, {"_id": 0, "name": 1})}
+        return sorted(n for n in names if n in known)
+
+    def top_researchers(self, limit=5):
+        rows = self._aggregate("projects", top_researchers_pipeline(limit))
+        return [{"name": row["_id"], "projects": row["projects"], "collaborators": row["collaborators"]}
+                for row in rows]
+
+# -----------------------------
+# Neo4j first, MongoDB when Neo4j is unreachable, erroring or past its timeout
+# -----------------------------
+class FallbackAnalytics:
+    def __init__(self, primary, fallback, primary_name="neo4j", fallback_name="mongo"):
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_name = primary_name
+        self.fallback_name = fallback_name
+        self.last_engine = None
+
+    def _call(self, report, *args, **kwargs):
+        try:
+            result = getattr(self.primary, report)(*args, **kwargs)
+            self.last_engine = self.primary_name
+            return result
+        except Exception as e:
+            print(f"⚠️ {self.primary_name} failed for {report} ({type(e).__name__}: {e}); "
+                  f"answering from {self.fallback_name}")
+            self.last_engine = self.fallback_name
+            return getattr(self.fallback, report)(*args, **kwargs)
+
+    def top_authors(self, limit=5):
+        return self._call("top_authors", limit)
+
+    def top_coauthor_pairs(self, limit=5):
+        return self._call("top_coauthor_pairs", limit)
+
+    def top_teammates(self, limit=5):
+        return self._call("top_teammates", limit)
+
+    def project_members(self, title):
+        return self._call("project_members", title)
+
+    def top_researchers(self, limit=5):
+        return self._call("top_researchers", limit)
+
+# -----------------------------
+# Per-report routing from a compare() run
+# -----------------------------
+class RoutedAnalytics(FallbackAnalytics):
+    # engines: {name: engine}; routes: {report: engine name}. The fallback
+    # engine answers unrouted reports and any routed call that fails.
+    # Engines are long-lived (make_engine passes the process's sparse engine).
+    def __init__(self, engines, routes, fallback_name="mongo"):
+        super().__init__(None, engines[fallback_name], None, fallback_name)
+        self.engines = engines
+        self.routes = routes
+
+    def _call(self, report, *args, **kwargs):
+        name = self.routes.get(report)
+        if name not in self.engines or name == self.fallback_name:
+            self.last_engine = self.fallback_name
+            return getattr(self.fallback, report)(*args, **kwargs)
+        engine = FallbackAnalytics(self.engines[name], self.fallback, name, self.fallback_name)
+        result = engine._call(report, *args, **kwargs)
+        self.last_engine = engine.last_engine
+        return result
+
+def load_routes(path=DEFAULT_ROUTES_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_routes(comparison, path=DEFAULT_ROUTES_FILE):
+    routes = {report: row["fastest"] for report, row in comparison.items() if row.get("fastest")}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(routes, f, indent=2)
+    os.replace(tmp, path)
+    return routes
+
+# -----------------------------
+# Side-by-side latency comparison
+# -----------------------------
+def compare(engines, limit=5, repeat=3):
+    # engines: {name: engine} -> {report: {name: best seconds or None, "fastest": name}}
+    comparison = {}
+    for report in REPORTS:
+        row = {}
+        for name, engine in engines.items():
+            best = None
+            try:
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    getattr(engine, report)(limit)
+                    elapsed = time.perf_counter() - start_time
+                    best = elapsed if best is None else min(best, elapsed)
+            except Exception as e:
+                print(f"⚠️ {name} failed for {report}: {e}")
+                best = None
+            row[name] = best
+        timed = {name: s for name, s in row.items() if s is not None}
+        row["fastest"] = min(timed, key=timed.get) if timed else None
+        comparison[report] = row
+    return comparison
+
+# -----------------------------
+# Parity: every engine must give the same report
+# -----------------------------
+def parity(engines, limit=5):
+    # engines: {name: engine} -> {report: {name: rows}} for the reports where the engines disagree
+    mismatches = {}
+    for report in REPORTS:
+        results = {}
+        for name, engine in engines.items():
+            try:
+                results[name] = getattr(engine, report)(limit)
+            except Exception as e:
+                print(f"⚠️ {name} failed for {report}: {e}")
+        if len({json.dumps(rows, sort_keys=True) for rows in results.values()}) > 1:
+            mismatches[report] = results
+    return mismatches
+
+def print_comparison(comparison, names, builds=None):
+    # builds: {name: seconds to construct the engine}, paid once per process
+    print(f"\n{'report':<22}" + "".join(f"{name:>14}" for name in names) + "   fastest")
+    if builds:
+        print(f"{'(build)':<22}" + "".join(f"{builds[n] * 1000:>12.2f}ms" for n in names))
+    for report, row in comparison.items():
+        cells = "".join(f"{row[n] * 1000:>12.2f}ms" if row[n] is not None else f"{'failed':>14}" for n in names)
+        print(f"{report:<22}{cells}   {row['fastest'] or '-'}")
+
+
+if __name__ == "__main__":
+    import connections
+    from neo4j_analytics import make_engine
+
+    parser = argparse.ArgumentParser(description="MongoDB aggregation analytics")
+    parser.add_argument("--compare", default="mongo", help="comma separated engines: neo4j,mongo,sparse")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parity", action="store_true",
+                        help="check that the engines give the same reports (exit 1 if not)")
+    parser.add_argument("--save-routes", nargs="?", const=DEFAULT_ROUTES_FILE,
+                        help="store the fastest engine per report (used by the 'routed' backend)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.compare.split(",") if n.strip()]
+    mongo_db = connections.get_db(1)
+    driver = connections.get_neo4j() if "neo4j" in names else None
+    # Engines are compared as they are, without the Neo4j -> MongoDB fallback.
+    # Reports are timed warm: the routed backend reuses one engine per process
+    # (neo4j_analytics.sparse_engine), so the build is paid once and shown apart.
+    engines, builds = {}, {}
+    for name in names:
+        start_time = time.perf_counter()
+        engines[name] = make_engine(name, driver=driver, mongo_db=mongo_db if name != "neo4j" else None)
+        builds[name] = time.perf_counter() - start_time
+
+    if args.parity:
+        mismatches = parity(engines, args.limit)
+        for report, results in mismatches.items():
+            print(f"❌ {report} differs:")
+            for name, rows in results.items():
+                print(f"   {name}: {rows}")
+        if mismatches:
+            sys.exit(1)
+        print(f"✅ {', '.join(names)} agree on {', '.join(REPORTS)}")
+        sys.exit(0)
+
+    comparison = compare(engines, args.limit, args.repeat)
+    print_comparison(comparison, names, builds)
+    if args.save_routes:
+        routes = save_routes(comparison, args.save_routes)
+        print(f"\n✅ Routes saved to {args.save_routes}: {routes}")
@@ -2,18 +2,16 @@
 # إعداد MongoDB لكل الحسابين (Account 1 + Account 2)
 # كل الباحثين، المشاريع، والمنشورات موجودين بالكامل
 
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
+import connections
+import leaderboards
+import fuzzy_search
+import search_index
+from schema import apply_mongo_indexes
 
 # =========================
 # MongoDB Account 1
 # =========================
-MONGO_URI_1 = os.getenv("MONGO_URI_1")
-client1 = MongoClient(MONGO_URI_1)
-db1 = client1["research_db"]
+db1 = connections.get_db(1)
 researchers_col1 = db1["researchers"]
 projects_col1 = db1["projects"]
 publications_col1 = db1["publications"]
@@ -21,9 +19,7 @@ publications_col1 = db1["publications"]
 # =========================
 # MongoDB Account 2
 # =========================
-MONGO_URI_2 = os.getenv("MONGO_URI_2")
-client2 = MongoClient(MONGO_URI_2)
-db2 = client2["research_db"]
+db2 = connections.get_db(2)
 researchers_col2 = db2["researchers"]
 projects_col2 = db2["projects"]
 publications_col2 = db2["publications"]
@@ -36,6 +32,13 @@ for col in [researchers_col1, projects_col1, publications_col1,
     col.delete_many({})
 print("✅ تم مسح جميع البيانات القديمة في الحسابين!")
 
+# =========================
+# الفهارس على name / title / participants / authors في الحسابين
+# =========================
+for db in [db1, db2]:
+    apply_mongo_indexes(db)
+print("✅ تم إنشاء الفهارس في الحسابين!")
+
 # =========================
 # بيانات الباحثين (50 باحث)
 # =========================
@@ -147,3 +150,15 @@ for project in projects:
 for col in [publications_col1, publications_col2]:
     col.insert_many(publications_list)
 print(f"✅ تم إضافة {len(publications_list)} منشورات لكل الحساب!")
+
+# =========================
+# إعادة بناء لوحات الصدارة في Redis
+# =========================
+r = connections.get_redis()
+leaderboards.rebuild(r, researchers, projects, publications_list)
+print("✅ تم تحديث لوحات الصدارة في Redis!")
+search_index.rebuild(r, researchers)
+print("✅ تم تحديث فهرس البحث في Redis!")
+fuzzy_search.rebuild(r, [x["name"] for x in researchers], [p["title"] for p in projects],
+                     [pub["title"] for pub in publications_list])
+print("✅ تم تحديث فهرس الإكمال التلقائي في Redis!")
@@ -1,89 +1,227 @@
+import argparse
 import os
-from neo4j import GraphDatabase
+import threading
+from neo4j import Query
 from dotenv import load_dotenv
 
 # =========================
 # تحميل متغيرات البيئة من ملف .env
+# (الاتصالات نفسها من connections.py)
 # =========================
 load_dotenv()
-URI = os.getenv("NEO4J_URI")
-USERNAME = os.getenv("NEO4J_USERNAME")
-PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-# إنشاء الاتصال مع Neo4j
-driver = GraphDatabase.driver(URI, auth=(USERNAME, PASSWORD))
+BACKENDS = ("neo4j", "sparse", "mongo", "routed")
+
+# Seconds before a Neo4j analytics query is aborted (and, with a MongoDB
+# database at hand, answered by mongo_analytics instead); unset = no limit
+QUERY_TIMEOUT = float(os.getenv("ANALYTICS_NEO4J_TIMEOUT")) if os.getenv("ANALYTICS_NEO4J_TIMEOUT") else None
+
+# Snapshot file (snapshot.py) the sparse engine starts from instead of reading
+# MongoDB; unset = read MongoDB. A missing or stale file (MongoDB written since)
+# is rewritten from MongoDB first.
+ANALYTICS_SNAPSHOT = os.getenv("ANALYTICS_SNAPSHOT")
 
 # =========================
 # دالة لتشغيل أي استعلام وإرجاع النتائج كقائمة
 # ⚡ مهم لتحويل النتائج لقائمة لتجنب ResultConsumedError
 # =========================
-def run_query(query):
+def run_query(driver, query, timeout=None, **params):
     with driver.session(database="neo4j") as session:
-        result = session.run(query)
+        result = session.run(Query(query, timeout=timeout) if timeout else query, **params)
         return list(result)
 
 # =========================
-# 1️⃣ Top authors by publications
+# الاستعلامات
 # =========================
-print("\n--- Top Authors by Publications ---")
 query_top_authors = """
 MATCH (r:Researcher)-[:AUTHORED]->(p:Publication)
 RETURN r.name AS Researcher, COUNT(p) AS Publications
-ORDER BY Publications DESC
-LIMIT 5
+ORDER BY Publications DESC, Researcher
+LIMIT $limit
 """
-for record in run_query(query_top_authors):
-    print(f"{record['Researcher']}: {record['Publications']} publications")  # عرض النتائج بالإنجليزي
 
-# =========================
-# 2️⃣ Top co-author pairs
-# =========================
-print("\n--- Top Co-Author Pairs ---")
+# Shared publications per pair, each pair once (as the sparse and mongo engines count it)
 query_top_pairs = """
-MATCH (r1:Researcher)-[:CO_AUTHOR]-(r2:Researcher)
-WITH r1.name AS Researcher1, r2.name AS Researcher2, COUNT(*) AS Collaborations
-ORDER BY Collaborations DESC
-LIMIT 5
+MATCH (r1:Researcher)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(r2:Researcher)
+WHERE r1.name < r2.name
+WITH r1.name AS Researcher1, r2.name AS Researcher2, COUNT(DISTINCT p) AS Collaborations
+ORDER BY Collaborations DESC, Researcher1, Researcher2
+LIMIT $limit
 RETURN Researcher1, Researcher2, Collaborations
 """
-for record in run_query(query_top_pairs):
-    print(f"{record['Researcher1']} ↔ {record['Researcher2']}: {record['Collaborations']} collaborations")
 
-# =========================
-# 3️⃣ Most collaborative researchers in projects
-# =========================
-print("\n--- Most Collaborative Researchers in Projects ---")
 query_top_teamwork = """
-MATCH (r:Researcher)-[:TEAMMATE]->(colleague)
+MATCH (r:Researcher)-[:TEAMMATE]-(colleague)
 RETURN r.name AS Researcher, COUNT(DISTINCT colleague) AS Teammates
-ORDER BY Teammates DESC
-LIMIT 5
+ORDER BY Teammates DESC, Researcher
+LIMIT $limit
 """
-for record in run_query(query_top_teamwork):
-    print(f"{record['Researcher']}: {record['Teammates']} teammates")
 
-# =========================
-# 4️⃣ All researchers in a specific project (example: "AI Project 1")
-# =========================
-print("\n--- All Researchers in Project 'AI Project 1' ---")
 query_project_members = """
-MATCH (pr:Project {title: "AI Project 1"})<-[:WORKS_ON]-(r:Researcher)
+MATCH (pr:Project {title: $title})<-[:WORKED_ON]-(r:Researcher)
 RETURN r.name AS Researcher
 """
-for record in run_query(query_project_members):
-    print(f"- {record['Researcher']}")
 
-# =========================
-# 5️⃣ All collaboration relationships
-# =========================
-print("\n--- All Collaboration Relationships Between Researchers ---")
+# projects counts every project of r (one-person projects too, as the sparse and
+# MongoDB engines do); only researchers with at least one collaborator are ranked
+query_top_researchers = """
+MATCH (r:Researcher)-[:WORKED_ON]->(p:Project)
+WITH r, count(DISTINCT p) AS projects
+MATCH (r)-[:WORKED_ON]->(:Project)<-[:WORKED_ON]-(co:Researcher)
+WHERE co <> r
+WITH r, projects, count(DISTINCT co) AS collaborators
+RETURN r.name AS name, projects, collaborators
+ORDER BY projects DESC, name LIMIT $limit
+"""
+
 query_all_relations = """
 MATCH (r1:Researcher)-[rel]->(r2:Researcher)
 WHERE type(rel) IN ["CO_AUTHOR","TEAMMATE"]
 RETURN r1.name AS From, type(rel) AS Relation, r2.name AS To
 """
-for record in run_query(query_all_relations):
-    print(f"{record['From']} -[{record['Relation']}]-> {record['To']}")
 
-driver.close()
-print("\n✅ All analytics completed successfully!")
+# =========================
+# محرك Neo4j (نفس واجهة sparse_analytics.SparseAnalytics)
+# =========================
+class Neo4jAnalytics:
+    def __init__(self, driver, timeout=QUERY_TIMEOUT):
+        self.driver = driver
+        self.timeout = timeout
+
+    def top_authors(self, limit=5):
+        return [{"name": rec["Researcher"], "publications": rec["Publications"]}
+                for rec in run_query(self.driver, query_top_authors, self.timeout, limit=limit)]
+
+    def top_coauthor_pairs(self, limit=5):
+        return [{"researcher1": rec["Researcher1"], "researcher2": rec["Researcher2"],
+                 "collaborations": rec["Collaborations"]}
+                for rec in run_query(self.driver, query_top_pairs, self.timeout, limit=limit)]
+
+    def top_teammates(self, limit=5):
+        return [{"name": rec["Researcher"], "teammates": rec["Teammates"]}
+                for rec in run_query(self.driver, query_top_teamwork, self.timeout, limit=limit)]
+
+    def project_members(self, title):
+        return [rec["Researcher"] for rec in run_query(self.driver, query_project_members, self.timeout, title=title)]
+
+    def top_researchers(self, limit=5):
+        return [{"name": rec["name"], "projects": rec["projects"], "collaborators": rec["collaborators"]}
+                for rec in run_query(self.driver, query_top_researchers, self.timeout, limit=limit)]
+
+# =========================
+# اختيار المحرك حسب --backend
+# neo4j مع وجود MongoDB: التحويل التلقائي إلى mongo عند تعطل Neo4j
+# =========================
+# One sparse engine per process: built on first use, then kept current by the
+# writers (main_demo_fixed add_researcher / add_project) instead of rebuilt
+_sparse = None
+_sparse_lock = threading.Lock()
+
+def _load_snapshot(path, mongo_db):
+    # The snapshot at path, rewritten first when MongoDB has changed since; None = read MongoDB
+    import snapshot
+    snap = snapshot.load(path) if os.path.exists(path) else None
+    if mongo_db is None or (snap is not None and snap.is_fresh(mongo_db)):
+        return snap
+    if snap is not None:
+        snap.close()
+    try:
+        snapshot.write_from_mongo(path, mongo_db)
+    except OSError as e:
+        print(f"⚠️ Could not rewrite the analytics snapshot {path} ({e}); reading MongoDB")
+        return None
+    return snapshot.load(path)
+
+def sparse_engine(mongo_db=None, snapshot_path=None, reload=False):
+    global _sparse
+    with _sparse_lock:
+        if _sparse is None or reload:
+            from sparse_analytics import SparseAnalytics
+            snapshot_path = snapshot_path or ANALYTICS_SNAPSHOT
+            snap = _load_snapshot(snapshot_path, mongo_db) if snapshot_path else None
+            previous = _sparse
+            _sparse = SparseAnalytics.from_snapshot(snap) if snap is not None else SparseAnalytics.from_mongo(mongo_db)
+            if previous is not None:
+                previous.close()
+        return _sparse
+
+def loaded_sparse_engine():
+    # The process's sparse engine, or None when nothing has built it yet
+    return _sparse
+
+def make_engine(backend, driver=None, mongo_db=None):
+    if backend == "neo4j":
+        engine = Neo4jAnalytics(driver)
+        if mongo_db is None:
+            return engine
+        from mongo_analytics import FallbackAnalytics, MongoAnalytics
+        return FallbackAnalytics(engine, MongoAnalytics(mongo_db))
+    if backend == "sparse":
+        return sparse_engine(mongo_db)
+    if backend == "mongo":
+        from mongo_analytics import MongoAnalytics
+        return MongoAnalytics(mongo_db)
+    if backend == "routed":
+        # Fastest engine per report, as measured by `python mongo_analytics.py --compare ... --save-routes`
+        from mongo_analytics import DEFAULT_ROUTES_FILE, MongoAnalytics, RoutedAnalytics, load_routes
+        engines = {"mongo": MongoAnalytics(mongo_db)}
+        if driver is not None:
+            engines["neo4j"] = Neo4jAnalytics(driver)
+        routes = load_routes(os.getenv("ANALYTICS_ROUTES", DEFAULT_ROUTES_FILE))
+        if "sparse" in routes.values():
+            engines["sparse"] = sparse_engine(mongo_db)
+        return RoutedAnalytics(engines, routes)
+    raise ValueError(f"Unknown analytics backend '{backend}' (choose from {', '.join(BACKENDS)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Research collaboration analytics")
+    parser.add_argument("--backend", choices=BACKENDS, default=os.getenv("ANALYTICS_BACKEND", "neo4j"))
+    parser.add_argument("--project", default="AI Project 1")
+    args = parser.parse_args()
+
+    import connections
+
+    # إنشاء الاتصال مع Neo4j أو MongoDB حسب المحرك
+    # (MongoDB is always opened: it is also the fallback when Neo4j is down)
+    driver = connections.get_neo4j() if args.backend in ("neo4j", "routed") else None
+    engine = make_engine(args.backend, driver, connections.get_db(1))
+
+    # =========================
+    # 1️⃣ Top authors by publications
+    # =========================
+    print("\n--- Top Authors by Publications ---")
+    for record in engine.top_authors():
+        print(f"{record['name']}: {record['publications']} publications")  # عرض النتائج بالإنجليزي
+
+    # =========================
+    # 2️⃣ Top co-author pairs
+    # =========================
+    print("\n--- Top Co-Author Pairs ---")
+    for record in engine.top_coauthor_pairs():
+        print(f"{record['researcher1']} ↔ {record['researcher2']}: {record['collaborations']} collaborations")
+
+    # =========================
+    # 3️⃣ Most collaborative researchers in projects
+    # =========================
+    print("\n--- Most Collaborative Researchers in Projects ---")
+    for record in engine.top_teammates():
+        print(f"{record['name']}: {record['teammates']} teammates")
+
+    # =========================
+    # 4️⃣ All researchers in a specific project (example: "AI Project 1")
+    # =========================
+    print(f"\n--- All Researchers in Project '{args.project}' ---")
+    for name in engine.project_members(args.project):
+        print(f"- {name}")
+
+    # =========================
+    # 5️⃣ All collaboration relationships (Neo4j only)
+    # =========================
+    if driver is not None:
+        print("\n--- All Collaboration Relationships Between Researchers ---")
+        for record in run_query(driver, query_all_relations):
+            print(f"{record['From']} -[{record['Relation']}]-> {record['To']}")
+    connections.close_all()
+
+    print("\n✅ All analytics completed successfully!")
@@ -0,0 +1,352 @@
+# outbox.py
+# Transactional outbox for the cross-store writes of add_researcher /
+# add_project: the MongoDB write records an event in the `outbox` collection
+# of the same cluster (in one transaction with the documents when
+# OUTBOX_TRANSACTIONS=1, the default), and the user-facing call returns at
+# MongoDB latency. A worker drains the outbox into Neo4j and Redis:
+#  - claims a batch of due events with a lease (several workers can run)
+#  - one Neo4j transaction per batch: every label / relationship type is one
+#    UNWIND statement (graph_loader); edges of removed members are dropped and
+#    TEAMMATE / CO_AUTHOR derived again (graph_sync's queries), so a retried
+#    batch is harmless
+#  - Redis side: leaderboards, search index, fuzzy index, then the event ids
+#    go into outbox:v1:applied, so a batch retried after that point skips them
+#  - cached analytics are dropped once the batch is in Neo4j (not at write
+#    time: a read in between would cache the old graph for the TTL)
+#  - failures: back to pending with exponential backoff; after
+#    OUTBOX_MAX_ATTEMPTS the event is parked as "failed"
+# Replicated writes record the same event (same _id) on both clusters; it is
+# applied once.
+#
+# Event: {_id, type: researcher|project, payload, status: pending|processing|done|failed,
+#         attempts, available_at, created_at[, worker, done_at, last_error]}
+#
+#   python outbox.py --follow        drain continuously (OUTBOX_WORKER=external)
+#   python outbox.py --status
+
+import argparse
+import datetime
+import os
+import threading
+import time
+import uuid
+
+import graph_loader
+import graph_sync
+import leaderboards
+import search_index
+
+OUTBOX = "outbox"
+APPLIED = "outbox:v1:applied"        # sorted set: event id -> time applied
+APPLIED_RETENTION = 7 * 24 * 3600    # seconds an applied id is remembered
+DONE_RETENTION = 7 * 24 * 3600       # TTL index on done_at (schema.py)
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+LEASE_SECONDS = 60
+BACKOFF_SECONDS = (0.5, 60.0)        # first retry delay, cap
+POLL_SECONDS = 1.0
+# "thread": drained by a background thread of the writing process;
+# "external": by a separate `python outbox.py --follow`
+OUTBOX_WORKER = os.getenv("OUTBOX_WORKER", "thread")
+OUTBOX_TRANSACTIONS = os.getenv("OUTBOX_TRANSACTIONS", "1") == "1"
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+# -----------------------------
+# Events
+# -----------------------------
+def _event(kind, payload):
+    now = _now()
+    return {"_id": uuid.uuid4().hex, "type": kind, "payload": payload, "status": "pending", "attempts": 0,
+            "available_at": now, "created_at": now}
+
+def researcher_event(name, department, interests):
+    return _event("researcher", {"name": name, "department": department, "interests": list(interests or [])})
+
+def project_event(title, participants, publications=()):
+    # publications: titles, authored by the participants
+    return _event("project", {"title": title, "participants": list(participants), "publications": list(publications)})
+
+# -----------------------------
+# Writing documents + events together (one cluster)
+# -----------------------------
+def write_with_events(writes, outbox_col, events, transactional=None):
+    # writes: [(collection, bulk ops)]; events go to outbox_col (same database)
+    # -> the bulk_write results. Transactional: documents and events commit
+    # together. Otherwise the events follow the documents (a crash in between
+    # loses the event, the documents stay; `python neo4j_setup_complete.py --batch`
+    # reloads Neo4j from MongoDB).
+    transactional = OUTBOX_TRANSACTIONS if transactional is None else transactional
+    events = [dict(e) for e in events]
+
+    def work(session=None):
+        options = {"session": session} if session is not None else {}
+        results = [col.bulk_write(ops, ordered=False, **options) for col, ops in writes if ops]
+        if events:
+            outbox_col.insert_many(events, ordered=False, **options)
+        return results
+
+    # Nothing to keep together without events (bulk_import, plain replicated writes)
+    if not transactional or not events:
+        return work()
+    with outbox_col.database.client.start_session() as session:
+        return session.with_transaction(work)
+
+async def awrite_with_events(writes, outbox_col, events, transactional=None):
+    transactional = OUTBOX_TRANSACTIONS if transactional is None else transactional
+    events = [dict(e) for e in events]
+
+    async def work(session=None):
+        options = {"session": session} if session is not None else {}
+        results = [await col.bulk_write(ops, ordered=False, **options) for col, ops in writes if ops]
+        if events:
+            await outbox_col.insert_many(events, ordered=False, **options)
+        return results
+
+    if not transactional or not events:
+        return await work()
+    async with outbox_col.database.client.start_session() as session:
+        return await session.with_transaction(work)
+
+# -----------------------------
+# Worker
+# -----------------------------
+class OutboxWorker:
+    def __init__(self, clusters, driver, redis_client, fuzzy=None, cache=None, batch_size=BATCH_SIZE):
+        # clusters: [(label, mongo db)]; fuzzy: a fuzzy_search.FuzzyMatcher (one is made if None);
+        # cache: the read-through cache whose "analytics" entries are dropped after each batch
+        self.clusters = clusters
+        self.driver = driver
+        self.redis = redis_client
+        self.fuzzy = fuzzy
+        self.cache = cache
+        self.batch_size = batch_size
+        self.token = uuid.uuid4().hex
+        self.stats = {"applied": 0, "skipped": 0, "retried": 0, "failed": 0, "batches": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- claim / ack / retry (per cluster) ----
+    def _claim(self, db):
+        now = _now()
+        due = {"status": {"$in": ["pending", "processing"]}, "available_at": {"$lte": now}}
+        ids = [e["_id"] for e in db[OUTBOX].find(due, {"_id": 1}).sort("available_at", 1).limit(self.batch_size)]
+        if not ids:
+            return []
+        # Only documents still due are taken: another worker's lease moves available_at forward
+        db[OUTBOX].update_many(dict(due, _id={"$in": ids}),
+                               {"$set": {"status": "processing", "worker": self.token,
+                                         "available_at": now + datetime.timedelta(seconds=LEASE_SECONDS)}})
+        return list(db[OUTBOX].find({"_id": {"$in": ids}, "worker": self.token, "status": "processing"}))
+
+    def _ack(self, db, events):
+        db[OUTBOX].update_many({"_id": {"$in": [e["_id"] for e in events]}, "worker": self.token},
+                               {"$set": {"status": "done", "done_at": _now()}, "$unset": {"worker": ""}})
+
+    def _retry(self, db, events, error):
+        from pymongo import UpdateOne
+        now, ops = _now(), []
+        for e in events:
+            attempts = e.get("attempts", 0) + 1
+            failed = attempts >= MAX_ATTEMPTS
+            delay = min(BACKOFF_SECONDS[0] * 2 ** (attempts - 1), BACKOFF_SECONDS[1])
+            ops.append(UpdateOne({"_id": e["_id"], "worker": self.token},
+                                 {"$set": {"status": "failed" if failed else "pending", "attempts": attempts,
+                                           "available_at": now + datetime.timedelta(seconds=delay),
+                                           "last_error": str(error)[:500]},
+                                  "$unset": {"worker": ""}}))
+            self.stats["failed" if failed else "retried"] += 1
+        db[OUTBOX].bulk_write(ops, ordered=False)
+
+    # ---- applying ----
+    def _mongo_docs(self, db, events):
+        # Event payloads -> the documents as MongoDB stored them, with their _id (mongo_id on
+        # the nodes). Publications are insert-only ($setOnInsert), so an existing title keeps
+        # its stored authors. A document this cluster does not have (it missed the write)
+        # is taken from the payload without _id, and its node keeps the id it has.
+        wanted = {"researchers": {}, "projects": {}, "publications": {}}
+        for e in events:
+            p = e["payload"]
+            if e["type"] == "researcher":
+                wanted["researchers"][p["name"]] = dict(p)
+            elif e["type"] == "project":
+                wanted["projects"][p["title"]] = {"title": p["title"], "participants": p["participants"]}
+                for t in p.get("publications", []):
+                    wanted["publications"].setdefault(t, {"title": t, "project": p["title"],
+                                                          "authors": p["participants"]})
+        found = []
+        for collection, fields in (("researchers", ("name", "department", "interests")),
+                                   ("projects", ("title", "participants")),
+                                   ("publications", ("title", "project", "authors"))):
+            docs = wanted[collection]
+            key = fields[0]
+            if docs:
+                for d in db[collection].find({key: {"$in": list(docs)}}, {f: 1 for f in fields}):
+                    docs[d[key]] = d
+            found.append(list(docs.values()))
+        return found
+
+    def _apply_graph(self, researchers, projects, publications):
+        # Same steps as graph_sync.apply_changes, in one transaction: nodes, the
+        # edges of removed members dropped, current edges merged, TEAMMATE /
+        # CO_AUTHOR derived again for everyone whose memberships changed
+        project_rows = [{"title": p["title"], "participants": p.get("participants", [])} for p in projects]
+        publication_rows = [{"title": p["title"], "authors": p.get("authors", []), "project": p.get("project")}
+                            for p in publications]
+
+        def run(tx, query, rows):
+            names = set()
+            for batch in graph_loader.batches(rows, graph_loader.DEFAULT_BATCH_SIZE):
+                for rec in tx.run(query, rows=batch):
+                    names.add(rec[0])
+            return names
+
+        def work(tx):
+            run(tx, graph_loader.RESEARCHER_QUERY, graph_loader.researcher_rows(researchers))
+            run(tx, graph_loader.PROJECT_QUERY, graph_loader.project_rows(projects))
+            run(tx, graph_loader.PUBLICATION_QUERY, graph_loader.publication_rows(publications))
+            teammates = run(tx, graph_sync.STALE_WORKED_ON_QUERY, project_rows)
+            run(tx, graph_loader.WORKED_ON_QUERY, graph_loader.worked_on_rows(projects))
+            co_authors = run(tx, graph_sync.STALE_AUTHORED_QUERY, publication_rows)
+            run(tx, graph_sync.STALE_HAS_PUBLICATION_QUERY, publication_rows)
+            run(tx, graph_loader.HAS_PUBLICATION_QUERY, graph_loader.has_publication_rows(publications))
+            run(tx, graph_loader.AUTHORED_QUERY, graph_loader.authored_rows(publications))
+            teammates.update(n for p in project_rows for n in p["participants"])
+            co_authors.update(n for p in publication_rows for n in p["authors"])
+            for rel, via, names in (("TEAMMATE", "WORKED_ON", teammates), ("CO_AUTHOR", "AUTHORED", co_authors)):
+                names = sorted(n for n in names if n)
+                for batch in graph_loader.batches(names, graph_loader.DEFAULT_BATCH_SIZE):
+                    tx.run(graph_sync.DROP_DERIVED_QUERY.format(rel=rel), names=batch).consume()
+                    tx.run(graph_sync.DERIVE_QUERY.format(rel=rel, via=via), names=batch).consume()
+
+        with self.driver.session() as session:
+            session.execute_write(work)
+
+    def _apply_redis(self, event_ids, researchers, projects, publications):
+        for r in researchers:
+            leaderboards.record_researcher(self.redis, r["name"])
+            search_index.index_researcher(self.redis, r["name"], r.get("department"), r.get("interests"))
+        for p in projects:
+            leaderboards.record_project(self.redis, p["title"], p["participants"])
+        for pub in publications:
+            leaderboards.record_publication(self.redis, pub["title"], pub["authors"])
+        if self.fuzzy is None:
+            from fuzzy_search import FuzzyMatcher
+            self.fuzzy = FuzzyMatcher(self.redis)
+        for kind, names in (("researcher", [r["name"] for r in researchers]),
+                            ("project", [p["title"] for p in projects]),
+                            ("publication", [pub["title"] for pub in publications])):
+            if names:
+                self.fuzzy.add(kind, *names)
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(APPLIED, {event_id: now for event_id in event_ids})
+        pipe.zremrangebyscore(APPLIED, "-inf", now - APPLIED_RETENTION)
+        pipe.execute()
+
+    def drain_once(self):
+        # One batch from every cluster -> number of events taken (0 = nothing due)
+        taken = 0
+        for label, db in self.clusters:
+            events = self._claim(db)
+            if not events:
+                continue
+            taken += len(events)
+            self.stats["batches"] += 1
+            try:
+                ids = [e["_id"] for e in events]
+                applied = self.redis.zmscore(APPLIED, ids)
+                todo = [e for e, score in zip(events, applied) if score is None]
+                self.stats["skipped"] += len(events) - len(todo)
+                if todo:
+                    docs = self._mongo_docs(db, todo)
+                    self._apply_graph(*docs)
+                    self._apply_redis([e["_id"] for e in todo], *docs)
+                    if self.cache is not None:
+                        self.cache.invalidate("analytics", "*")
+                    self.stats["applied"] += len(todo)
+            except Exception as e:
+                print(f"⚠️ outbox ({label}): batch of {len(events)} failed, will retry: {e}")
+                self._retry(db, events, e)
+                continue
+            self._ack(db, events)
+        return taken
+
+    def drain(self):
+        total = 0
+        while True:
+            taken = self.drain_once()
+            total += taken
+            if not taken:
+                return total
+
+    # ---- background thread ----
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                taken = self.drain_once()
+            except Exception as e:
+                print(f"⚠️ outbox worker: {e}")
+                taken = 0
+            if not taken:
+                self._wake.wait(POLL_SECONDS)
+                self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def notify(self):
+        # New events were written: drain now instead of at the next poll
+        self._wake.set()
+
+    def stop(self, flush=True):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.drain()
+
+def status(clusters):
+    # -> {label: {status: count}}
+    return {label: {row["_id"]: row["count"] for row in db[OUTBOX].aggregate(
+                [{"$group": {"_id": "$status", "count": {"$sum": 1}}}])}
+            for label, db in clusters}
+
+
+if __name__ == "__main__":
+    import connections
+    import metrics
+
+    parser = argparse.ArgumentParser(description="Drain the MongoDB outbox into Neo4j and Redis")
+    parser.add_argument("--follow", action="store_true", help="keep draining until interrupted")
+    parser.add_argument("--status", action="store_true", help="print the event counts per status")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    clusters = [(f"Cluster {n}", connections.get_db(n)) for n in (1, 2)]
+    if args.status:
+        for label, counts in status(clusters).items():
+            print(f"{label}: " + (", ".join(f"{n} {s}" for s, n in sorted(counts.items())) or "empty"))
+    else:
+        worker = OutboxWorker(clusters, connections.get_neo4j(), connections.get_redis(),
+                              cache=connections.get_cache(), batch_size=args.batch_size)
+        start_time = time.perf_counter()
+        if args.follow:
+            metrics.serve_from_env()
+            print("✅ Draining the outbox (Ctrl+C to stop)")
+            try:
+                worker.start()._thread.join()
+            except KeyboardInterrupt:
+                worker.stop(flush=False)
+        else:
+            worker.drain()
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ {worker.stats['applied']} events applied, {worker.stats['skipped']} already applied, "
+              f"{worker.stats['retried']} retried, {worker.stats['failed']} failed in {elapsed:.2f} seconds")
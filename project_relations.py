@@ -0,0 +1,56 @@
+# project_relations.py
+# Typed relationships among a project's participants in one parameterized
+# Neo4j query (instead of one query per participant pair), for a whole
+# batch of projects at once (a single project is a batch of one).
+
+from cluster_reads import fan_out, raise_if_all_failed
+
+RELATION_TYPES = ["WORKED_ON", "TEAMMATE", "CO_AUTHOR", "AUTHORED"]
+
+BATCH_RELATIONS_QUERY = """
+UNWIND $projects AS project
+UNWIND project.names AS name
+MATCH (a:Researcher {name: name})-[rel]->(b:Researcher)
+WHERE b.name IN project.names AND type(rel) IN $types
+RETURN project.title AS title, a.name AS a, type(rel) AS relation, b.name AS b
+"""
+
+# -----------------------------
+# Neo4j side
+# -----------------------------
+def summarize(rows):
+    # [(a, relation, b), ...] -> {relation: {names}}
+    relations = {}
+    for a, relation, b in rows:
+        relations.setdefault(relation, set()).update([a, b])
+    return relations
+
+def fetch_project_relations(session, participants_by_title, types=RELATION_TYPES):
+    # participants_by_title: {title: [names]} -> {title: {relation: {names}}}
+    projects = [{"title": t, "names": list(names)} for t, names in participants_by_title.items()]
+    rows = {title: [] for title in participants_by_title}
+    if projects:
+        for rec in session.run(BATCH_RELATIONS_QUERY, projects=projects, types=list(types)):
+            rows[rec["title"]].append((rec["a"], rec["relation"], rec["b"]))
+    return {title: summarize(r) for title, r in rows.items()}
+
+# -----------------------------
+# MongoDB side: one $in query per cluster, run concurrently, first cluster wins
+# -----------------------------
+def find_projects(project_clusters, titles):
+    # project_clusters: [(label, collection), ...]
+    timings = fan_out(project_clusters, lambda col: list(col.find({"title": {"$in": list(titles)}})))
+    raise_if_all_failed(timings)
+    found = {}
+    for t in timings:
+        for p in t["result"] or []:
+            found.setdefault(p["title"], p)
+    return found, timings
+
+def projects_with_relations(project_clusters, session, titles, types=RELATION_TYPES):
+    # Constant number of database calls for any number of titles:
+    # one find per cluster plus a single Neo4j query.
+    projects, timings = find_projects(project_clusters, titles)
+    relations = fetch_project_relations(
+        session, {t: p.get("participants", []) for t, p in projects.items()}, types)
+    return [(projects[t], relations[t]) for t in titles if t in projects], timings
@@ -0,0 +1,375 @@
+# query_cache.py
+# Result cache for Cypher reads, invalidated by the writes themselves instead
+# of a TTL:
+#  - key: normalized query text + parameters (+ database)
+#  - every query is tagged with the node labels and relationship types its
+#    patterns touch ("label:Researcher", "rel:WORKED_ON"); an untyped
+#    [rel] narrowed by `type(rel) IN $types` is tagged with those types
+#  - each tag has a version counter in Redis; an entry stores the versions it
+#    was computed at and is only served while they are all unchanged (the
+#    entry and the versions come back in one pipeline)
+#  - writes that go through CachingDriver (session.run, execute_write) bump
+#    the versions of the tags they touch once they have committed, so only
+#    the entries reading those labels go stale
+#  - queries the tags cannot describe (unlabelled nodes, untyped
+#    relationships, DETACH DELETE) depend on / bump the wildcard tags
+#    "label:*", "rel:*" and "*"
+#  - EXPLAIN / PROFILE / SHOW, procedure calls, non-deterministic functions
+#    and results holding nodes, relationships or paths are not cached
+# connections.get_neo4j() returns a CachingDriver unless QUERY_CACHE=0.
+# Writes made outside this repo's code (Neo4j Browser, another app) are not
+# seen: run `python query_cache.py --invalidate` after them.
+#
+#   python query_cache.py --tags "MATCH (r:Researcher)-[:AUTHORED]->(p) RETURN r"
+#   python query_cache.py --invalidate Researcher WORKED_ON    (no names: everything)
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+from neo4j import Record
+
+from cache import default_serializer
+
+PREFIX = "qc:v1"
+QUERY_CACHE = os.getenv("QUERY_CACHE", "1") == "1"
+# Entries are kept until a relevant write; the TTL only bounds memory for queries never asked again
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "3600"))
+QUERY_CACHE_MAX_ROWS = int(os.getenv("QUERY_CACHE_MAX_ROWS", "5000"))
+
+ANY = "*"
+ANY_LABEL = "label:*"
+ANY_REL = "rel:*"
+
+# -----------------------------
+# Query analysis
+# -----------------------------
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_COMMENT_RE = re.compile(r"//[^\n]*")
+_WRITE_RE = re.compile(r"(?<![.\w$`])(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+_DETACH_RE = re.compile(r"(?<![.\w$`])DETACH\s+DELETE\b", re.IGNORECASE)
+_PROCEDURE_RE = re.compile(r"(?<![.\w$`])CALL\s+[\w.`]+\s*\(", re.IGNORECASE)
+_VOLATILE_RE = re.compile(r"(?<![.\w$`])(rand|randomUUID|timestamp|datetime|localdatetime|date|time|localtime)"
+                          r"\s*\(\s*\)", re.IGNORECASE)
+# (var:Label:Other {...}) / (var) / () -- not function calls like count(p)
+_NODE_RE = re.compile(r"(?<![\w)\]`])\(\s*(\w*)\s*((?::\s*!?`?\w+`?\s*(?:[|&]\s*!?`?\w+`?\s*)*)*)(?=[{)]|WHERE\b)",
+                      re.IGNORECASE)
+# -[var:TYPE|OTHER*1..3 {...}]-
+_REL_RE = re.compile(r"-\s*\[\s*(\w*)\s*((?::\s*!?`?\w+`?\s*(?:\|:?\s*!?`?\w+`?\s*)*)?)[^\]]*\]")
+_ANON_REL_RE = re.compile(r"\)\s*<?--+>?\s*\(")
+_SET_LABEL_RE = re.compile(r"(?<![.\w$`])(?:SET|REMOVE)\s+\w+\s*((?::\s*`?\w+`?\s*)+)", re.IGNORECASE)
+_NAME_RE = re.compile(r"\w+")
+
+def normalize(query):
+    # Comments dropped and whitespace collapsed (string literals kept as they are)
+    parts, last = [], 0
+    for m in _STRING_RE.finditer(query):
+        parts.append(" ".join(_COMMENT_RE.sub("", query[last:m.start()]).split()))
+        parts.append(m.group(0))
+        last = m.end()
+    parts.append(" ".join(_COMMENT_RE.sub("", query[last:]).split()))
+    return " ".join(p for p in parts if p)
+
+def _type_filter(text, var):
+    # `type(var) IN $param` -> "$param", `type(var) IN ['A', 'B']` -> ("A", "B"), else None
+    m = re.search(rf"\btype\(\s*{re.escape(var)}\s*\)\s+IN\s+(\$\w+|\[[^\]]*\])", text, re.IGNORECASE)
+    if m is None:
+        return None
+    if m.group(1).startswith("$"):
+        return m.group(1)
+    return tuple(s[1:-1] for s in _STRING_RE.findall(m.group(1)))
+
+@lru_cache(maxsize=1024)
+def analyze(text):
+    # normalized query -> (kind, tags, type_filters): kind "read", "write" or "uncached";
+    # type_filters: "$param" names whose values are the relationship types read
+    bare = _STRING_RE.sub("''", text)
+    first = bare.split(" ", 1)[0].upper()
+    write = bool(_WRITE_RE.search(bare)) and first != "EXPLAIN"
+    # EXPLAIN / PROFILE callers want the plan from the summary, SHOW lists schema objects
+    if not write and (first in ("EXPLAIN", "PROFILE", "SHOW") or _PROCEDURE_RE.search(bare)
+                      or _VOLATILE_RE.search(bare)):
+        return "uncached", frozenset(), ()
+
+    tags, filters, labelled, unlabelled = set(), [], set(), set()
+    for var, labels in _NODE_RE.findall(bare):
+        names = _NAME_RE.findall(labels)
+        tags.update(f"label:{n}" for n in names)
+        if names:
+            labelled.add(var)
+        else:
+            unlabelled.add(var)
+    for var, types in _REL_RE.findall(bare):
+        names = _NAME_RE.findall(types)
+        if names:
+            tags.update(f"rel:{n}" for n in names)
+            continue
+        narrowed = _type_filter(text, var) if var else None
+        if isinstance(narrowed, tuple):
+            tags.update(f"rel:{n}" for n in narrowed)
+        elif narrowed:
+            filters.append(narrowed[1:])
+        else:
+            tags.add(ANY_REL)
+    if _ANON_REL_RE.search(bare):
+        tags.add(ANY_REL)
+    for labels in _SET_LABEL_RE.findall(bare):
+        tags.update(f"label:{n}" for n in _NAME_RE.findall(labels))
+    # A variable bound without a label anywhere (or an anonymous node) can be any node
+    if "" in unlabelled or unlabelled - labelled:
+        tags.add(ANY_LABEL)
+
+    if write:
+        # Scoped writes also move the wildcards their readers depend on; unscoped ones move everything
+        if ANY_LABEL in tags or ANY_REL in tags or _DETACH_RE.search(bare):
+            tags.add(ANY)
+        if any(t.startswith("label:") for t in tags):
+            tags.add(ANY_LABEL)
+        if any(t.startswith("rel:") for t in tags) or filters:
+            tags.add(ANY_REL)
+        return "write", frozenset(tags), tuple(filters)
+    return "read", frozenset(tags | {ANY}), tuple(filters)
+
+def query_tags(query, params=None):
+    # -> (kind, sorted tags) with $param type filters resolved
+    kind, tags, filters = analyze(normalize(query))
+    tags = set(tags)
+    for name in filters:
+        values = (params or {}).get(name)
+        if isinstance(values, (list, tuple)) and all(isinstance(v, str) for v in values):
+            tags.update(f"rel:{v}" for v in values)
+        else:
+            tags.add(ANY_REL)
+    return kind, sorted(tags)
+
+# -----------------------------
+# Cached results
+# -----------------------------
+def _plain(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _plain(v) for k, v in value.items())
+    return False
+
+class CachedResult:
+    # The parts of neo4j.Result the application uses, over a list of records
+    def __init__(self, keys, rows):
+        self._keys = list(keys)
+        self._records = [Record(zip(self._keys, row)) for row in rows]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def keys(self):
+        return list(self._keys)
+
+    def data(self, *keys):
+        return [rec.data(*keys) for rec in self._records]
+
+    def values(self, *keys):
+        return [rec.values(*keys) for rec in self._records]
+
+    def value(self, key=0, default=None):
+        return [rec.value(key, default) for rec in self._records]
+
+    def single(self, strict=False):
+        if len(self._records) != 1:
+            if strict:
+                raise ValueError(f"expected one record, got {len(self._records)}")
+            return self._records[0] if self._records else None
+        return self._records[0]
+
+    def fetch(self, n):
+        taken, self._records = self._records[:n], self._records[n:]
+        return taken
+
+    def peek(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        self._records = []
+
+# -----------------------------
+# Cache
+# client must be a binary Redis client (decode_responses=False)
+# -----------------------------
+class QueryCache:
+    def __init__(self, client, serializer=None, ttl=QUERY_CACHE_TTL, max_rows=QUERY_CACHE_MAX_ROWS):
+        self.client = client
+        self.serializer = serializer or default_serializer()
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.stats = {"hits": 0, "misses": 0, "uncached": 0, "bumps": 0}
+
+    def key(self, database, text, params):
+        digest = hashlib.sha1("\0".join([database or "", text, json.dumps(params, sort_keys=True, default=str)])
+                              .encode("utf-8")).hexdigest()
+        return f"{PREFIX}:{self.serializer.name}:q:{digest}"
+
+    def tag_key(self, tag):
+        return f"{PREFIX}:tag:{tag}"
+
+    def fetch(self, database, query, params, run):
+        # run() executes the query -> a CachedResult (hit or stored miss) or run()'s own result
+        text = normalize(query)
+        kind, tags = query_tags(text, params)
+        if kind != "read":
+            self.stats["uncached"] += 1
+            return run()
+
+        key = self.key(database, text, params)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.mget([self.tag_key(t) for t in tags])
+        data, versions = pipe.execute()
+        versions = [int(v or 0) for v in versions]
+        if data is not None:
+            entry = self.serializer.loads(data)
+            if entry["versions"] == versions:
+                self.stats["hits"] += 1
+                return CachedResult(entry["keys"], entry["rows"])
+
+        # Stored with the versions read before running: a write committed meanwhile makes it stale at once
+        self.stats["misses"] += 1
+        result = run()
+        records = list(result)
+        keys = list(records[0].keys()) if records else list(getattr(result, "keys", list)())
+        rows = [[rec[k] for k in keys] for rec in records]
+        if len(rows) <= self.max_rows and _plain(rows):
+            self.client.set(key, self.serializer.dumps({"versions": versions, "keys": keys, "rows": rows}),
+                            ex=self.ttl)
+        return CachedResult(keys, rows)
+
+    def bump(self, tags):
+        if not tags:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for tag in sorted(tags):
+            pipe.incr(self.tag_key(tag))
+        pipe.execute()
+        self.stats["bumps"] += 1
+
+    def invalidate(self, *names):
+        # Labels / relationship types changed outside CachingDriver; no names = everything
+        if not names:
+            self.bump([ANY])
+        else:
+            self.bump([f"label:{n}" for n in names] + [f"rel:{n}" for n in names])
+
+# -----------------------------
+# Driver wrapper (same shape as metrics._InstrumentedDriver)
+# -----------------------------
+def _query_text(query):
+    # str or neo4j.Query
+    return getattr(query, "text", query)
+
+def _params(parameters, kwargs):
+    return dict(parameters or {}, **kwargs)
+
+def _run(target, query, parameters, kwargs):
+    return target.run(query, parameters, **kwargs) if parameters is not None else target.run(query, **kwargs)
+
+class _TaggingTransaction:
+    # Collects the tags of the writes run in a transaction function
+    def __init__(self, tx, written):
+        self._tx = tx
+        self._written = written
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+    def run(self, query, parameters=None, **kwargs):
+        kind, tags = query_tags(_query_text(query), _params(parameters, kwargs))
+        if kind == "write":
+            self._written.update(tags)
+        return _run(self._tx, query, parameters, kwargs)
+
+class CachingSession:
+    def __init__(self, session, cache, database):
+        self._session = session
+        self._cache = cache
+        self._database = database
+        self._written = set()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self._session.__exit__(*exc)
+        finally:
+            self._flush()
+
+    def close(self):
+        try:
+            self._session.close()
+        finally:
+            self._flush()
+
+    def _flush(self):
+        # Auto-commit writes are committed once their result is consumed, at the latest on close
+        written, self._written = self._written, set()
+        self._cache.bump(written)
+
+    def run(self, query, parameters=None, **kwargs):
+        params = _params(parameters, kwargs)
+        kind, tags = query_tags(_query_text(query), params)
+        if kind == "write":
+            result = _run(self._session, query, parameters, kwargs)
+            self._cache.bump(tags)
+            self._written.update(tags)
+            return result
+        return self._cache.fetch(self._database, _query_text(query), params,
+                                 lambda: _run(self._session, query, parameters, kwargs))
+
+    def _write(self, method, fn, args, kwargs):
+        written = set()
+        try:
+            return method(lambda tx, *a, **kw: fn(_TaggingTransaction(tx, written), *a, **kw), *args, **kwargs)
+        finally:
+            # Also after a failure: a retried transaction function may have committed once
+            self._cache.bump(written)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return self._write(self._session.execute_write, fn, args, kwargs)
+
+class CachingDriver:
+    def __init__(self, driver, cache):
+        self._driver = driver
+        self.query_cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def session(self, **kwargs):
+        return CachingSession(self._driver.session(**kwargs), self.query_cache, kwargs.get("database"))
+
+def wrap(driver, client):
+    # client: binary Redis client
+    return CachingDriver(driver, QueryCache(client)) if QUERY_CACHE else driver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Neo4j query result cache")
+    parser.add_argument("--tags", metavar="QUERY", help="print how a query is classified and tagged")
+    parser.add_argument("--invalidate", nargs="*", metavar="NAME",
+                        help="drop the entries reading these labels / relationship types (none: all)")
+    args = parser.parse_args()
+
+    if args.tags:
+        kind, tags = query_tags(args.tags)
+        print(f"{kind}: {', '.join(tags) or '-'}")
+    if args.invalidate is not None:
+        import connections
+        QueryCache(connections.get_redis(binary=True)).invalidate(*args.invalidate)
+        print(f"✅ Query cache invalidated: {', '.join(args.invalidate) or 'everything'}")
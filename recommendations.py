@@ -0,0 +1,224 @@
+# recommendations.py
+# "Suggest collaborators for researcher X": link prediction over the
+# collaboration graph (TEAMMATE = shared project, CO_AUTHOR = shared
+# publication, both taken from the MongoDB `participants` / `authors` fields).
+# Candidates are researchers two hops away, scored by
+#   adamic_adar * Σ 1/log(degree of each common collaborator)
+#   + interests * Jaccard overlap of `interests`
+#   + department * (same `department`)
+# The whole graph is scored as sparse matrix products, a block of rows at a
+# time, and the top-k list of every researcher is stored in Redis:
+#   recs:v1:<name>   JSON list [{name, score, common, shared_interests, same_department}]
+#   recs:v1:meta     hash with the build time, size, k and weights
+# so a lookup is one GET. Current collaborators are never suggested.
+#
+#   python recommendations.py --rebuild --k 10
+#   python recommendations.py --name "Eman Ali"
+
+import argparse
+import json
+import time
+
+import numpy as np
+from scipy import sparse
+
+from sparse_analytics import co_occurrence, incidence
+
+PREFIX = "recs:v1"
+META = f"{PREFIX}:meta"
+DEFAULT_K = 10
+DEFAULT_CHUNK_SIZE = 2048
+WEIGHTS = {"adamic_adar": 1.0, "interests": 1.0, "department": 0.5}
+
+def recs_key(name):
+    return f"{PREFIX}:{name}"
+
+# -----------------------------
+# Scoring
+# -----------------------------
+class Recommender:
+    def __init__(self, researchers, projects, publications, weights=None):
+        researchers = sorted(researchers, key=lambda r: r["name"])
+        projects = list(projects)
+        publications = list(publications)
+        self.names = [r["name"] for r in researchers]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        P = incidence([p.get("participants", []) for p in projects], self.index, len(projects))
+        A = incidence([pub.get("authors", []) for pub in publications], self.index, len(publications))
+
+        # I: researcher x interest (binary), department as an integer code (-1 = none)
+        self.interests = [list(dict.fromkeys(r.get("interests") or [])) for r in researchers]
+        vocabulary = {}
+        rows, cols = [], []
+        for i, interests in enumerate(self.interests):
+            for term in interests:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+        I = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, max(1, len(vocabulary))))
+        departments = {}
+        department = np.array([departments.setdefault(r["department"], len(departments))
+                               if r.get("department") else -1 for r in researchers], dtype=np.int64)
+        self._build(P, A, I, department, weights)
+
+    def _build(self, P, A, I, department, weights):
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        # G: researcher x researcher, 1 where they share a project or a publication
+        G = (co_occurrence(P) + co_occurrence(A)).tocsr()
+        G.data[:] = 1
+        self.G = G
+        degree = np.diff(G.indptr)
+        # Only researchers with 2+ collaborators can be a common neighbour, so log(degree) > 0
+        self.aa_weights = 1.0 / np.log(np.maximum(degree, 2))
+        self.I = I
+        self.interest_counts = np.diff(I.indptr)
+        self.department = department
+
+    @classmethod
+    def from_mongo(cls, mongo_db, weights=None):
+        return cls(
+            mongo_db["researchers"].find({}, {"_id": 0, "name": 1, "department": 1, "interests": 1}),
+            mongo_db["projects"].find({}, {"_id": 0, "participants": 1}),
+            mongo_db["publications"].find({}, {"_id": 0, "authors": 1}),
+            weights,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snap, weights=None):
+        # snapshot.Snapshot: researchers come sorted by name, interests and departments
+        # as string ids (ids are codes as good as any)
+        self = cls.__new__(cls)
+        self.names = snap.researcher_names()
+        self.index = {name: i for i, name in enumerate(self.names)}
+        indptr, terms = snap["researchers.interests_indptr"], snap["researchers.interests"]
+        vocabulary, columns = np.unique(terms, return_inverse=True)
+        I = sparse.csr_matrix((np.ones(len(terms), dtype=np.int32), columns, indptr),
+                              shape=(len(self.names), max(1, len(vocabulary))))
+        words = dict(zip(vocabulary.tolist(), snap.strings(vocabulary)))
+        self.interests = [[words[t] for t in terms[indptr[i]:indptr[i + 1]].tolist()] for i in range(len(self.names))]
+        department = np.asarray(snap["researchers.department"], dtype=np.int64)
+        self._build(snap.incidence("projects"), snap.incidence("publications"), I, department, weights)
+        return self
+
+    def _block(self, start, stop, k):
+        # Rows start..stop-1 -> (row, candidate, score, common) for the top k candidates per row
+        n = len(self.names)
+        block = self.G[start:stop]
+        # One product gives both counts: real part = common collaborators, imaginary = Adamic-Adar
+        weighted = block.astype(np.complex128)
+        weighted.data += 1j * self.aa_weights[weighted.indices]
+        pairs = (weighted @ self.G).tocsr()
+        pairs.sort_indices()
+        pairs = pairs.tocoo()
+        rows = pairs.row.astype(np.int64) + start
+        cols = pairs.col.astype(np.int64)
+
+        # Not themselves, not a current collaborator
+        existing = block.tocoo()
+        existing = np.sort((existing.row.astype(np.int64) + start) * n + existing.col)
+        keep = (rows != cols) & ~np.isin(rows * n + cols, existing, assume_unique=True)
+        rows, cols = rows[keep], cols[keep]
+        common_counts = np.rint(pairs.data.real[keep]).astype(np.int64)
+        aa = pairs.data.imag[keep]
+
+        shared = np.asarray(self.I[rows].multiply(self.I[cols]).sum(axis=1)).ravel()
+        union = self.interest_counts[rows] + self.interest_counts[cols] - shared
+        jaccard = np.divide(shared, union, out=np.zeros(len(shared)), where=union > 0)
+        same_department = (self.department[rows] == self.department[cols]) & (self.department[rows] >= 0)
+        w = self.weights
+        scores = w["adamic_adar"] * aa + w["interests"] * jaccard + w["department"] * same_department
+
+        # Top k per row: rows ascending, then score descending (one float key; the stable
+        # sort keeps candidates in name order on ties), keep the first k of each row
+        order = np.argsort((rows - start) + 1.0 / (2.0 + scores), kind="stable")
+        rows, cols, scores, common_counts = rows[order], cols[order], scores[order], common_counts[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        top = rank < k
+        return rows[top], cols[top], scores[top], common_counts[top]
+
+    def suggest_all(self, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Yields (name, suggestions) for every researcher, suggestions possibly empty
+        for start in range(0, len(self.names), chunk_size):
+            stop = min(start + chunk_size, len(self.names))
+            rows, cols, scores, common = self._block(start, stop, k)
+            bounds = np.searchsorted(rows, np.arange(start, stop + 1))
+            for i in range(start, stop):
+                lo, hi = bounds[i - start], bounds[i - start + 1]
+                yield self.names[i], [self._suggestion(i, int(cols[j]), scores[j], common[j]) for j in range(lo, hi)]
+
+    def _suggestion(self, i, j, score, common):
+        shared = [t for t in self.interests[i] if t in self.interests[j]]
+        return {"name": self.names[j], "score": round(float(score), 4), "common": int(common),
+                "shared_interests": shared,
+                "same_department": bool(self.department[i] >= 0 and self.department[i] == self.department[j])}
+
+# -----------------------------
+# Redis: batch store and single-key lookup
+# -----------------------------
+def store(client, recommender, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK_SIZE):
+    stored = 0
+    pipe = client.pipeline(transaction=False)
+    for n, (name, suggestions) in enumerate(recommender.suggest_all(k, chunk_size), 1):
+        if suggestions:
+            pipe.set(recs_key(name), json.dumps(suggestions))
+            stored += 1
+        else:
+            pipe.delete(recs_key(name))
+        if n % 1000 == 0:
+            pipe.execute()
+    pipe.hset(META, mapping={"built_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "researchers": len(recommender.names),
+                             "with_suggestions": stored, "k": k, "weights": json.dumps(recommender.weights)})
+    pipe.execute()
+    return stored
+
+def rebuild(client, mongo_db, k=DEFAULT_K, chunk_size=DEFAULT_CHUNK_SIZE, weights=None, snapshot_path=None):
+    if snapshot_path:
+        from snapshot import load
+        snap = load(snapshot_path)
+        if snap.is_fresh(mongo_db):
+            try:
+                return store(client, Recommender.from_snapshot(snap, weights), k, chunk_size)
+            finally:
+                snap.close()
+        snap.close()
+        print(f"⚠️ {snapshot_path} is older than MongoDB; scoring from MongoDB")
+    return store(client, Recommender.from_mongo(mongo_db, weights), k, chunk_size)
+
+def suggestions(client, name, limit=None):
+    # None: nothing stored for this researcher (unknown, no collaborators yet, or not rebuilt since added)
+    data = client.get(recs_key(name))
+    if data is None:
+        return None
+    return json.loads(data)[:limit]
+
+async def asuggestions(client, name, limit=None):
+    data = await client.get(recs_key(name))
+    if data is None:
+        return None
+    return json.loads(data)[:limit]
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Collaborator suggestions (precomputed top-k in Redis)")
+    parser.add_argument("--rebuild", action="store_true", help="score the whole graph from MongoDB (cluster 1)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="suggestions stored per researcher")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="researchers scored per block")
+    parser.add_argument("--snapshot", help="score from this snapshot file (snapshot.py) instead of MongoDB")
+    parser.add_argument("--name", help="show the stored suggestions for this researcher")
+    args = parser.parse_args()
+
+    r = connections.get_redis()
+    if args.rebuild:
+        start_time = time.perf_counter()
+        stored = rebuild(r, connections.get_db(1), args.k, args.chunk_size, snapshot_path=args.snapshot)
+        print(f"✅ Suggestions stored for {stored} researchers in {time.perf_counter() - start_time:.1f} seconds")
+    if args.name:
+        found = suggestions(r, args.name)
+        if found is None:
+            print(f"No suggestions stored for '{args.name}'")
+        for s in found or []:
+            print(f"{s['name']}: {s['score']} ({s['common']} common collaborators, "
+                  f"interests: {', '.join(s['shared_interests']) or '-'}"
+                  f"{', same department' if s['same_department'] else ''})")
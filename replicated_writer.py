@@ -0,0 +1,97 @@
+# replicated_writer.py
+# Replicated write path for "Replication (Both Clusters)": one bulk_write of
+# upserts per collection, sent to every selected cluster in parallel.
+# Returns a per-cluster result + latency report and flags partial failures.
+# outbox events (outbox.py) are written with the documents on every cluster.
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from outbox import OUTBOX, write_with_events
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cluster-write")
+
+# -----------------------------
+# Upsert builders
+# -----------------------------
+def researcher_ops(researchers):
+    return [UpdateOne({"name": r["name"]},
+                      {"$set": {"name": r["name"], "department": r.get("department"), "interests": r.get("interests", [])}},
+                      upsert=True)
+            for r in researchers]
+
+def project_ops(projects):
+    ops = []
+    for p in projects:
+        doc = {"title": p["title"], "participants": p.get("participants", [])}
+        if "description" in p:
+            doc["description"] = p["description"]
+        ops.append(UpdateOne({"title": p["title"]}, {"$set": doc}, upsert=True))
+    return ops
+
+def publication_ops(publications, overwrite=False):
+    # $setOnInsert: an existing publication with the same title is left as is;
+    # overwrite=True (bulk_import: the file is the source) replaces its fields
+    ops = []
+    for pub in publications:
+        doc = {"title": pub["title"], "project": pub.get("project"), "authors": pub.get("authors", [])}
+        if "year" in pub:
+            doc["year"] = pub["year"]
+        ops.append(UpdateOne({"title": pub["title"]}, {"$set" if overwrite else "$setOnInsert": doc}, upsert=True))
+    return ops
+
+# -----------------------------
+# Per-cluster bulk write
+# target: (label, researchers_col, projects_col, publications_col)
+# -----------------------------
+def _write_cluster(target, researchers, projects, publications, events=()):
+    label, r_col, p_col, pub_col = target
+    report = {"cluster": label, "ok": True, "seconds": 0.0,
+              "upserted": 0, "modified": 0, "matched": 0, "error": None}
+    start_time = time.perf_counter()
+    try:
+        writes = [(r_col, researchers), (p_col, projects), (pub_col, publications)]
+        for result in write_with_events(writes, r_col.database[OUTBOX], events):
+            report["upserted"] += result.upserted_count
+            report["modified"] += result.modified_count
+            report["matched"] += result.matched_count
+    except BulkWriteError as e:
+        details = e.details or {}
+        report["upserted"] += details.get("nUpserted", 0)
+        report["modified"] += details.get("nModified", 0)
+        report["matched"] += details.get("nMatched", 0)
+        report["ok"] = False
+        report["error"] = f"{len(details.get('writeErrors', []))} write errors"
+    except Exception as e:
+        report["ok"] = False
+        report["error"] = str(e)
+    report["seconds"] = time.perf_counter() - start_time
+    return report
+
+def replicated_write(targets, researchers=(), projects=(), publications=(), events=(), overwrite_publications=False):
+    researchers = researcher_ops(researchers)
+    projects = project_ops(projects)
+    publications = publication_ops(publications, overwrite_publications)
+    futures = [_executor.submit(contextvars.copy_context().run, _write_cluster, t, researchers, projects, publications,
+                                events) for t in targets]
+    reports = [f.result() for f in futures]
+    ok = [rep for rep in reports if rep["ok"]]
+    return {
+        "clusters": reports,
+        "ok": len(ok) == len(reports),
+        "partial": 0 < len(ok) < len(reports),
+        "seconds": max((rep["seconds"] for rep in reports), default=0.0),
+    }
+
+def print_write_report(result):
+    for rep in result["clusters"]:
+        if rep["ok"]:
+            print(f"   {rep['cluster']}: ✅ {rep['upserted']} inserted, {rep['modified']} updated in {rep['seconds']:.6f}s")
+        else:
+            print(f"   {rep['cluster']}: ❌ failed after {rep['seconds']:.6f}s ({rep['error']})")
+    if result["partial"]:
+        failed = ", ".join(rep["cluster"] for rep in result["clusters"] if not rep["ok"])
+        print(f"⚠️ Partial failure: the write did not reach {failed}; the clusters are out of sync.")
@@ -1,16 +1,19 @@
-def cache_researcher(name):
-    # أول شي نحاول نجيب البيانات من Redis
-    data = r.get(f"researcher:{name}")
-    if data:
-        print("✅ تم جلب البيانات من Redis (Cache)")
-        return eval(data)  # تحويل string لقاموس
+# كاش الباحثين عن طريق وحدة الكاش المشتركة (cache.py)
+# cache: ReadThroughCache, researchers_col: مجموعة الباحثين في MongoDB
+def cache_researcher(name, cache, researchers_col):
+    def load():
+        # إذا مش موجودة في Redis، نجيبها من MongoDB
+        researcher = researchers_col.find_one({"name": name})
+        if researcher:
+            researcher["_id"] = str(researcher["_id"])
+        return researcher
 
-    # إذا مش موجودة، نجيبها من MongoDB
-    researcher = researchers_col.find_one({"name": name})
-    if not researcher:
+    # أول شي نحاول نجيب البيانات من Redis (طالب واحد فقط يجلبها من MongoDB عند انتهاء الصلاحية)
+    researcher, source = cache.get_or_load("researcher", name, load)
+    if researcher is None:
         return None
-
-    # نخزنها في Redis لمدة 60 ثانية مثلاً
-    r.set(f"researcher:{name}", str(researcher), ex=60)
-    print("✅ تم جلب البيانات من MongoDB وتم تخزينها في Redis")
+    if source == "loaded":
+        print("✅ تم جلب البيانات من MongoDB وتم تخزينها في Redis")
+    else:
+        print("✅ تم جلب البيانات من Redis (Cache)")
     return researcher
@@ -0,0 +1,161 @@
+# schema.py
+# Declares the MongoDB indexes (both accounts) and Neo4j constraints/indexes
+# the application's lookups rely on, applies them idempotently, and in
+# --check mode EXPLAINs every known point query and fails if any still scans.
+#
+#   python schema.py            apply everything
+#   python schema.py --check    apply, then verify the query plans (exit 1 on scans)
+
+import argparse
+import sys
+from pymongo import ASCENDING
+
+import graph_loader
+import graph_sync
+import outbox
+import project_relations
+
+# -----------------------------
+# Declarations
+# -----------------------------
+# A tuple is a compound index; (key, _id) also serves listing.py's keyset pages
+MONGO_INDEXES = {
+    "researchers": [("name", "_id")],
+    "projects": [("title", "_id"), "participants"],
+    "publications": [("title", "_id"), "authors", "project"],
+    outbox.OUTBOX: [("status", "available_at"), "created_at"],
+}
+# collection -> (field, seconds): applied outbox events expire after a week
+MONGO_TTL_INDEXES = {
+    outbox.OUTBOX: ("done_at", outbox.DONE_RETENTION),
+}
+
+NEO4J_SCHEMA = [
+    "CREATE CONSTRAINT researcher_name IF NOT EXISTS FOR (r:Researcher) REQUIRE r.name IS UNIQUE",
+    "CREATE CONSTRAINT project_title IF NOT EXISTS FOR (p:Project) REQUIRE p.title IS UNIQUE",
+    "CREATE CONSTRAINT publication_title IF NOT EXISTS FOR (p:Publication) REQUIRE p.title IS UNIQUE",
+    # Used by the incremental sync to find nodes of deleted documents
+    "CREATE INDEX researcher_mongo_id IF NOT EXISTS FOR (r:Researcher) ON (r.mongo_id)",
+    "CREATE INDEX project_mongo_id IF NOT EXISTS FOR (p:Project) ON (p.mongo_id)",
+    "CREATE INDEX publication_mongo_id IF NOT EXISTS FOR (p:Publication) ON (p.mongo_id)",
+]
+
+# Point queries issued by the application: (collection, filter)
+MONGO_QUERIES = [
+    ("researchers", {"name": "x"}),
+    ("projects", {"title": "x"}),
+    ("projects", {"title": {"$in": ["x", "y"]}}),
+    ("projects", {"participants": "x"}),
+    ("publications", {"title": "x"}),
+    ("publications", {"authors": "x"}),
+    ("researchers", {"$or": [{"name": {"$gt": "x"}}, {"name": "x", "_id": {"$gt": 0}}]}),
+    (outbox.OUTBOX, {"status": {"$in": ["pending", "processing"]}, "available_at": {"$lte": 0}}),
+]
+
+_pair = [{"a": "x", "b": "y"}]
+NEO4J_QUERIES = [
+    ("graph_loader.RESEARCHER_QUERY", graph_loader.RESEARCHER_QUERY, {"rows": [{"name": "x"}]}),
+    ("graph_loader.PROJECT_QUERY", graph_loader.PROJECT_QUERY, {"rows": [{"title": "x"}]}),
+    ("graph_loader.PUBLICATION_QUERY", graph_loader.PUBLICATION_QUERY, {"rows": [{"title": "x"}]}),
+    ("graph_loader.WORKED_ON_QUERY", graph_loader.WORKED_ON_QUERY, {"rows": [{"researcher": "x", "project": "y"}]}),
+    ("graph_loader.HAS_PUBLICATION_QUERY", graph_loader.HAS_PUBLICATION_QUERY,
+     {"rows": [{"project": "x", "publication": "y"}]}),
+    ("graph_loader.AUTHORED_QUERY", graph_loader.AUTHORED_QUERY, {"rows": [{"researcher": "x", "publication": "y"}]}),
+    ("graph_loader.CO_AUTHOR_QUERY", graph_loader.CO_AUTHOR_QUERY, {"rows": _pair}),
+    ("graph_loader.TEAMMATE_QUERY", graph_loader.TEAMMATE_QUERY, {"rows": _pair}),
+    ("graph_sync.DELETE_RESEARCHERS_QUERY", graph_sync.DELETE_RESEARCHERS_QUERY, {"ids": ["x"]}),
+    ("graph_sync.DELETE_PROJECTS_QUERY", graph_sync.DELETE_PROJECTS_QUERY, {"ids": ["x"]}),
+    ("graph_sync.DELETE_PUBLICATIONS_QUERY", graph_sync.DELETE_PUBLICATIONS_QUERY, {"ids": ["x"]}),
+    ("graph_sync.DERIVE_QUERY (TEAMMATE)", graph_sync.DERIVE_QUERY.format(rel="TEAMMATE", via="WORKED_ON"),
+     {"names": ["x"]}),
+    ("project_relations.BATCH_RELATIONS_QUERY", project_relations.BATCH_RELATIONS_QUERY,
+     {"projects": [{"title": "p", "names": ["x", "y"]}], "types": project_relations.RELATION_TYPES}),
+]
+
+SCAN_OPERATORS = {"AllNodesScan", "NodeByLabelScan"}
+
+# -----------------------------
+# Apply
+# -----------------------------
+def apply_mongo_indexes(mongo_db):
+    created = []
+    for collection, fields in MONGO_INDEXES.items():
+        for field in fields:
+            keys = field if isinstance(field, tuple) else (field,)
+            created.append(mongo_db[collection].create_index([(k, ASCENDING) for k in keys],
+                                                             name="_".join(f"{k}_1" for k in keys)))
+    for collection, (field, seconds) in MONGO_TTL_INDEXES.items():
+        created.append(mongo_db[collection].create_index([(field, ASCENDING)], name=f"{field}_ttl",
+                                                         expireAfterSeconds=seconds))
+    return created
+
+def apply_neo4j_schema(driver):
+    with driver.session() as session:
+        for statement in NEO4J_SCHEMA:
+            session.run(statement).consume()
+    return len(NEO4J_SCHEMA)
+
+# -----------------------------
+# Plan verification
+# -----------------------------
+def _find_stages(plan, found):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.add(plan["stage"])
+        for value in plan.values():
+            _find_stages(value, found)
+    elif isinstance(plan, list):
+        for item in plan:
+            _find_stages(item, found)
+    return found
+
+def check_mongo(mongo_db):
+    failures = []
+    for collection, query in MONGO_QUERIES:
+        explain = mongo_db[collection].find(query).explain()
+        stages = _find_stages(explain.get("queryPlanner", {}).get("winningPlan", {}), set())
+        if "COLLSCAN" in stages:
+            failures.append(f"{collection}.find({query}) -> COLLSCAN")
+    return failures
+
+def _operators(plan, found):
+    found.add(plan["operatorType"].split("@")[0])
+    for child in plan.get("children", []):
+        _operators(child, found)
+    return found
+
+def check_neo4j(driver):
+    failures = []
+    with driver.session() as session:
+        for label, query, params in NEO4J_QUERIES:
+            summary = session.run("EXPLAIN " + query, **params).consume()
+            scans = _operators(summary.plan, set()) & SCAN_OPERATORS
+            if scans:
+                failures.append(f"{label} -> {', '.join(sorted(scans))}")
+    return failures
+
+
+if __name__ == "__main__":
+    import connections
+    parser = argparse.ArgumentParser(description="Apply and verify MongoDB indexes and Neo4j constraints")
+    parser.add_argument("--check", action="store_true", help="EXPLAIN every known query and fail if any scans")
+    args = parser.parse_args()
+
+    clusters = [("Cluster 1", connections.get_db(1)), ("Cluster 2", connections.get_db(2))]
+    driver = connections.get_neo4j()
+
+    for label, db in clusters:
+        print(f"✅ {label}: indexes {', '.join(apply_mongo_indexes(db))}")
+    print(f"✅ Neo4j: {apply_neo4j_schema(driver)} constraints/indexes in place")
+
+    failures = []
+    if args.check:
+        for label, db in clusters:
+            failures += [f"{label}: {f}" for f in check_mongo(db)]
+        failures += [f"Neo4j: {f}" for f in check_neo4j(driver)]
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("✅ No known query scans a whole collection or label")
+    connections.close_all()
+    sys.exit(1 if failures else 0)
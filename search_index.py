@@ -0,0 +1,316 @@
+# search_index.py
+# Researcher search by interest and department, answered from an inverted
+# index in Redis instead of scanning both clusters:
+#   idx:v1:interest:<term>   researchers with that interest   (sorted set, score 1)
+#   idx:v1:dept:<term>       researchers in that department    (sorted set, score 1)
+#   idx:v1:all               every indexed researcher          (sorted set, score 0)
+#   idx:v1:info              name -> {"department", "interests"} (hash, JSON values)
+# Terms are lower-cased with whitespace collapsed.
+#
+# Queries: field:value terms combined with AND / OR / NOT and parentheses;
+# neighbouring terms are ANDed, a bare word matches an interest or a department:
+#   interest:AI AND dept:"Computer Science"
+#   (interest:genetics OR interest:botany) NOT dept:biology
+# The query becomes ZINTERSTORE / ZUNIONSTORE / ZDIFFSTORE on temporary keys,
+# sent in one pipeline. Results are ranked by how many query terms they match
+# (then by name) and paginated with ZRANGE.
+# ZDIFFSTORE needs Redis 6.2+.
+#
+#   python search_index.py --rebuild
+#   python search_index.py 'interest:AI AND dept:"Computer Science"' --page 2
+
+import argparse
+import json
+import re
+import uuid
+
+PREFIX = "idx:v1"
+ALL = f"{PREFIX}:all"
+INFO = f"{PREFIX}:info"
+FIELDS = {"interest": "interest", "interests": "interest", "i": "interest",
+          "dept": "dept", "department": "dept", "d": "dept"}
+DEFAULT_PAGE_SIZE = 20
+TEMP_TTL = 30  # seconds; temporary keys are deleted right away, the TTL only covers a crash
+
+class QueryError(ValueError):
+    pass
+
+def normalize(term):
+    return re.sub(r"\s+", " ", str(term)).strip().lower()
+
+def term_key(field, term, prefix=PREFIX):
+    return f"{prefix}:{field}:{normalize(term)}"
+
+# -----------------------------
+# Query parsing: OR < AND < NOT, implicit AND between neighbours
+# -----------------------------
+TOKEN = re.compile(r'\s*(?:(?P<open>\()|(?P<close>\))|(?:(?P<field>\w+):)?(?:"(?P<quoted>[^"]*)"|(?P<word>[^\s()"]+)))')
+
+def tokenize(query):
+    tokens, pos = [], 0
+    query = query.strip()
+    while pos < len(query):
+        m = TOKEN.match(query, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"cannot parse the query at: {query[pos:]!r}")
+        pos = m.end()
+        if m.group("open"):
+            tokens.append(("(", None))
+        elif m.group("close"):
+            tokens.append((")", None))
+        elif m.group("field") is None and m.group("word") and m.group("word").upper() in ("AND", "OR", "NOT"):
+            tokens.append((m.group("word").upper(), None))
+        else:
+            field = m.group("field")
+            if field is not None and field.lower() not in FIELDS:
+                raise QueryError(f"unknown field '{field}' (use interest: or dept:)")
+            value = m.group("quoted") if m.group("quoted") is not None else m.group("word")
+            tokens.append(("TERM", (FIELDS[field.lower()] if field else None, value)))
+    return tokens
+
+def parse(query):
+    # -> ("term", field, value) | ("and", [..]) | ("or", [..]) | ("not", node); field None = any
+    tokens = tokenize(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() == "OR":
+            take()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() in ("AND", "NOT", "TERM", "("):
+            if peek() == "AND":
+                take()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        kind = peek()
+        if kind == "(":
+            take()
+            node = parse_or()
+            if peek() != ")":
+                raise QueryError("missing ')'")
+            take()
+            return node
+        if kind == "TERM":
+            field, value = take()[1]
+            if not normalize(value):
+                raise QueryError("empty search term")
+            return ("term", field, value)
+        raise QueryError("expected a search term" if kind is None else f"unexpected '{kind}'")
+
+    if not tokens:
+        raise QueryError("empty query")
+    node = parse_or()
+    if pos != len(tokens):
+        raise QueryError(f"unexpected '{tokens[pos][0]}'")
+    return node
+
+# -----------------------------
+# Query plan: Redis commands queued on a (sync or async) pipeline.
+# Result scores are minus the number of matched terms, so ZRANGE lists the
+# best matches first and equal scores by name.
+# -----------------------------
+class _Plan:
+    def __init__(self, pipe):
+        self.pipe = pipe
+        self.prefix = f"{PREFIX}:tmp:{uuid.uuid4().hex}"
+        self.temps = []
+
+    def temp(self):
+        key = f"{self.prefix}:{len(self.temps)}"
+        self.temps.append(key)
+        return key
+
+    def compile(self, node):
+        # -> {key: weight} whose weighted combination is the node's result
+        kind = node[0]
+        if kind == "term":
+            _, field, value = node
+            if field is not None:
+                return {term_key(field, value): -1}
+            key = self.temp()
+            # A bare word counts once whether it names an interest, a department or both
+            self.pipe.zunionstore(key, {term_key("interest", value): -1, term_key("dept", value): -1},
+                                  aggregate="MIN")
+            return {key: 1}
+        if kind == "not":
+            key = self.temp()
+            self.pipe.zdiffstore(key, [ALL, self._store(self.compile(node[1]))])
+            return {key: 1}
+        if kind == "or":
+            key = self.temp()
+            self.pipe.zunionstore(key, self._merge([self.compile(child) for child in node[1]]))
+            return {key: 1}
+        # and: intersect the positive parts, then drop what the NOT parts match
+        positives = [self.compile(child) for child in node[1] if child[0] != "not"]
+        negatives = [self._store(self.compile(child[1])) for child in node[1] if child[0] == "not"]
+        key = self.temp()
+        self.pipe.zinterstore(key, self._merge(positives) if positives else {ALL: 1})
+        if negatives:
+            self.pipe.zdiffstore(key, [key] + negatives)
+        return {key: 1}
+
+    def _merge(self, parts):
+        weights = {}
+        for part in parts:
+            for key, weight in part.items():
+                if key in weights:
+                    # The same term twice (a AND a): keep it once
+                    continue
+                weights[key] = weight
+        return weights
+
+    def _store(self, weighted):
+        # A single plain key is used as is; anything else is materialized
+        if len(weighted) == 1:
+            return next(iter(weighted))
+        key = self.temp()
+        self.pipe.zunionstore(key, weighted)
+        return key
+
+def _queue_search(pipe, query, offset, limit):
+    plan = _Plan(pipe)
+    weighted = plan.compile(parse(query))
+    if len(weighted) == 1 and next(iter(weighted.values())) == 1:
+        result = next(iter(weighted))
+    else:
+        result = plan.temp()
+        pipe.zunionstore(result, weighted)
+    for key in plan.temps:
+        pipe.expire(key, TEMP_TTL)
+    pipe.zcard(result)
+    pipe.zrange(result, offset, offset + limit - 1, withscores=True)
+    if plan.temps:
+        pipe.delete(*plan.temps)
+    return len(plan.temps)
+
+def _results(replies, temps):
+    # replies end with: zcard, zrange[, delete]
+    total, page = (replies[-3], replies[-2]) if temps else (replies[-2], replies[-1])
+    return total, [(name, int(abs(score))) for name, score in page]
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+def _format(total, page, infos, offset, limit):
+    results = []
+    for (name, matches), info in zip(page, infos):
+        info = json.loads(info) if info else {}
+        results.append({"name": _decode(name), "matches": matches, "department": info.get("department"),
+                        "interests": info.get("interests", [])})
+    return {"total": total, "offset": offset, "limit": limit, "results": results}
+
+def search(client, query, page=1, page_size=DEFAULT_PAGE_SIZE):
+    offset, limit = max(0, (page - 1) * page_size), max(1, page_size)
+    pipe = client.pipeline(transaction=False)
+    temps = _queue_search(pipe, query, offset, limit)
+    total, found = _results(pipe.execute(), temps)
+    infos = client.hmget(INFO, [name for name, _ in found]) if found else []
+    return _format(total, found, infos, offset, limit)
+
+async def asearch(client, query, page=1, page_size=DEFAULT_PAGE_SIZE):
+    offset, limit = max(0, (page - 1) * page_size), max(1, page_size)
+    pipe = client.pipeline(transaction=False)
+    temps = _queue_search(pipe, query, offset, limit)
+    total, found = _results(await pipe.execute(), temps)
+    infos = await client.hmget(INFO, [name for name, _ in found]) if found else []
+    return _format(total, found, infos, offset, limit)
+
+# -----------------------------
+# Index maintenance
+# -----------------------------
+def _queue_index(pipe, name, department, interests, previous, prefix=PREFIX):
+    # previous: the JSON stored in INFO for this name, if any (its terms are removed first);
+    # prefix: where the index lives (rebuild() writes a new one next to the live one)
+    if previous:
+        old = json.loads(previous)
+        for term in old.get("interests", []):
+            pipe.zrem(term_key("interest", term), name)
+        if old.get("department"):
+            pipe.zrem(term_key("dept", old["department"]), name)
+    interests = [i for i in dict.fromkeys(interests or []) if normalize(i)]
+    for term in interests:
+        pipe.zadd(term_key("interest", term, prefix), {name: 1})
+    if department and normalize(department):
+        pipe.zadd(term_key("dept", department, prefix), {name: 1})
+    pipe.zadd(f"{prefix}:all", {name: 0})
+    pipe.hset(f"{prefix}:info", name, json.dumps({"department": department, "interests": interests}))
+
+def index_researcher(client, name, department=None, interests=()):
+    pipe = client.pipeline(transaction=False)
+    _queue_index(pipe, name, department, interests, client.hget(INFO, name))
+    pipe.execute()
+
+def rebuild(client, researchers, batch_size=1000):
+    # researchers: iterable of {"name", "department", "interests"}; replaces the whole index.
+    # Built under temporary keys and RENAMEd in one transaction (like leaderboards.rebuild),
+    # so searches never see a partial index; the query temp keys (PREFIX:tmp:*) are not touched
+    tmp = f"{PREFIX}:rebuild"
+    pipe = client.pipeline(transaction=False)
+    for n, key in enumerate(client.scan_iter(match=f"{tmp}:*", count=1000), 1):
+        pipe.delete(key)
+        if n % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+    count = 0
+    for r in researchers:
+        _queue_index(pipe, r["name"], r.get("department"), r.get("interests"), None, tmp)
+        count += 1
+        if count % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+
+    built = {_decode(key)[len(tmp) + 1:] for key in client.scan_iter(match=f"{tmp}:*", count=1000)}
+    live = {ALL, INFO}
+    for field in ("interest", "dept"):
+        live.update(_decode(key) for key in client.scan_iter(match=f"{PREFIX}:{field}:*", count=1000))
+    pipe = client.pipeline(transaction=True)
+    for suffix in built:
+        pipe.rename(f"{tmp}:{suffix}", f"{PREFIX}:{suffix}")
+    stale = live - {f"{PREFIX}:{suffix}" for suffix in built}
+    if stale:
+        pipe.delete(*stale)
+    pipe.execute()
+    return count
+
+
+if __name__ == "__main__":
+    import connections
+
+    parser = argparse.ArgumentParser(description="Search researchers by interest and department")
+    parser.add_argument("query", nargs="?", help="e.g. 'interest:AI AND dept:\"Computer Science\"'")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from MongoDB (cluster 1)")
+    args = parser.parse_args()
+
+    r = connections.get_redis()
+    if args.rebuild:
+        count = rebuild(r, connections.get_db(1)["researchers"].find({}, {"_id": 0, "name": 1, "department": 1,
+                                                                          "interests": 1}))
+        print(f"✅ Search index rebuilt for {count} researchers")
+    if args.query:
+        found = search(r, args.query, args.page, args.page_size)
+        print(f"{found['total']} researchers match")
+        for row in found["results"]:
+            print(f"{row['name']} - {row['department']} - {', '.join(row['interests'])} ({row['matches']} terms)")
@@ -0,0 +1,441 @@
+# service.py
+# The research collaboration operations as one asyncio service, so many
+# users are served at once without a thread per request:
+#   lookup_researcher, lookup_project, complete, list, analytics, suggest, search, add_researcher, add_project
+# Async drivers with sized connection pools: pymongo's AsyncMongoClient (both
+# clusters), neo4j's AsyncGraphDatabase and redis.asyncio (blocking pools, so a
+# burst waits for a free connection instead of failing).
+#
+# Protocol: JSON lines over TCP. Each request {"id", "op", "params"} gets one
+# response {"id", "ok", "result" | "error", "seconds"}; a client may send many
+# requests on one connection without waiting, responses carry the request id.
+# The interactive menu is a thin client of this service (service_client.py).
+#
+#   python service.py                      listens on SERVICE_HOST:SERVICE_PORT (127.0.0.1:8765)
+
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+from neo4j import AsyncGraphDatabase
+from pymongo import AsyncMongoClient
+from redis.exceptions import WatchError
+
+import fuzzy_search
+import leaderboards
+import listing
+import metrics
+import outbox
+import recommendations
+import search_index
+from cache import INVALIDATION_CHANNEL, ReadThroughCache
+from mongo_analytics import top_researchers_pipeline
+from neo4j_analytics import query_top_researchers
+from project_relations import BATCH_RELATIONS_QUERY, RELATION_TYPES, summarize
+from replicated_writer import project_ops, publication_ops, researcher_ops
+
+load_dotenv()
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8765"))
+MONGO_POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "50"))
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", "50"))
+# Requests executing at once across all connections; the rest queue
+MAX_INFLIGHT = int(os.getenv("SERVICE_MAX_INFLIGHT", "500"))
+ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "neo4j")
+CLUSTERS = ("1", "2")
+
+class ServiceError(Exception):
+    pass
+
+# -----------------------------
+# Async read-through cache
+# Same keys, serializer and TTLs as cache.ReadThroughCache, so the service and
+# the synchronous scripts share entries. Concurrent misses for one key inside
+# the service are coalesced onto a single load, which then takes the same
+# Redis lock (<key>:lock) as ReadThroughCache, so the service and the scripts
+# do not load one key at the same time either.
+# -----------------------------
+class AsyncCache:
+    def __init__(self, client):
+        self.client = client
+        self.policy = ReadThroughCache(None)
+        self._inflight = {}
+
+    async def get_or_load(self, entity, ident, loader):
+        key = self.policy.key(entity, ident)
+        data = await self.client.get(key)
+        if data is not None:
+            return self.policy.serializer.loads(data), "cache"
+        if key in self._inflight:
+            return await asyncio.shield(self._inflight[key]), "waited"
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting when the load fails: mark the exception as seen
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value, source = await self._load(entity, key, loader)
+            future.set_result(value)
+            return value, source
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _release(self, lock_key, token):
+        # Delete the lock only if we still own it (it may have expired and been re-taken)
+        async with self.client.pipeline() as pipe:
+            try:
+                await pipe.watch(lock_key)
+                if await pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    await pipe.execute()
+                else:
+                    await pipe.unwatch()
+            except WatchError:
+                pass
+
+    async def _load(self, entity, key, loader):
+        # ReadThroughCache._load: one loader per key across processes, the others wait
+        lock_key = key + ":lock"
+        token = uuid.uuid4().hex
+        if await self.client.set(lock_key, token, nx=True, px=int(self.policy.lock_ttl * 1000)):
+            try:
+                value = await loader()
+                if value is not None:
+                    await self.client.set(key, self.policy.serializer.dumps(value), ex=self.policy.ttl(entity))
+                return value, "loaded"
+            finally:
+                await self._release(lock_key, token)
+
+        # Someone else is loading this key: wait for their result
+        deadline = time.monotonic() + self.policy.wait_timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            data = await self.client.get(key)
+            if data is not None:
+                return self.policy.serializer.loads(data), "waited"
+            if not await self.client.exists(lock_key):
+                # The loader finished without a value (e.g. not found) or died
+                break
+        return await loader(), "loaded"
+
+    async def invalidate(self, entity, ident):
+        key = self.policy.key(entity, ident)
+        if ident == "*":
+            async for k in self.client.scan_iter(match=key):
+                await self.client.delete(k)
+        else:
+            await self.client.delete(key)
+        # Processes running cache.TwoTierCache drop their local copy
+        await self.client.publish(INVALIDATION_CHANNEL, key)
+
+# -----------------------------
+# Service
+# -----------------------------
+class ResearchService:
+    def __init__(self):
+        self.clusters = []
+        for n in CLUSTERS:
+            label = f"Cluster {n}"
+            client = AsyncMongoClient(os.getenv(f"MONGO_URI_{n}"), maxPoolSize=MONGO_POOL_SIZE,
+                                      event_listeners=metrics.mongo_listeners(label))
+            self.clusters.append((label, client, client["research_db"]))
+        self.neo_driver = AsyncGraphDatabase.driver(
+            os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")),
+            max_connection_pool_size=NEO4J_POOL_SIZE)
+        redis_options = {"host": os.getenv("REDIS_HOST"), "port": int(os.getenv("REDIS_PORT")),
+                         "password": os.getenv("REDIS_PASSWORD"), "max_connections": REDIS_POOL_SIZE}
+        self.redis = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(decode_responses=True,
+                                                                                     **redis_options))
+        self.cache = AsyncCache(aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(**redis_options)))
+        self.fuzzy = fuzzy_search.FuzzyMatcher(self.redis)
+        self.outbox_worker = None    # set by serve() when it runs one (OUTBOX_WORKER=thread)
+
+    async def close(self):
+        for _, client, _ in self.clusters:
+            await client.close()
+        await self.neo_driver.close()
+        await self.redis.aclose()
+        await self.cache.client.aclose()
+
+    def _targets(self, clusters=None):
+        wanted = {str(c) for c in clusters} if clusters else set(CLUSTERS)
+        targets = [(label, db) for label, _, db in self.clusters if label.split()[-1] in wanted]
+        if not targets:
+            raise ServiceError(f"unknown clusters {sorted(wanted)}")
+        return targets
+
+    # ---- cluster fan-out (same semantics as cluster_reads) ----
+    async def _first_non_empty(self, fn):
+        tasks = [asyncio.create_task(fn(db)) for _, _, db in self.clusters]
+        errors = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    result = await next_done
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if result:
+                    return result
+        finally:
+            for t in tasks:
+                t.cancel()
+        if len(errors) == len(tasks):
+            raise errors[0]
+        return None
+
+    async def _all(self, fn, targets=None):
+        targets = targets or [(label, db) for label, _, db in self.clusters]
+        results = await asyncio.gather(*(fn(db) for _, db in targets), return_exceptions=True)
+        if all(isinstance(r, Exception) for r in results):
+            raise results[0]
+        return results
+
+    # ---- reads ----
+    async def lookup_researcher(self, name):
+        async def load():
+            researcher = await self._first_non_empty(lambda db: db["researchers"].find_one({"name": name}))
+            if researcher:
+                researcher["_id"] = str(researcher["_id"])
+            return researcher
+
+        researcher, source = await self.cache.get_or_load("researcher", name, load)
+        if not researcher:
+            return {"researcher": None, "projects": [], "source": source,
+                    "did_you_mean": await self.fuzzy.asuggest("researcher", name)}
+        pages = await self._all(lambda db: db["projects"].find({"participants": name}, {"_id": 0, "title": 1})
+                                .to_list(None))
+        titles = sorted({p["title"] for page in pages if not isinstance(page, Exception) for p in page})
+        return {"researcher": researcher, "projects": titles, "source": source}
+
+    async def lookup_project(self, title):
+        project = await self._first_non_empty(lambda db: db["projects"].find_one({"title": title}, {"_id": 0}))
+        if not project:
+            return {"project": None, "relations": {}, "did_you_mean": await self.fuzzy.asuggest("project", title)}
+        try:
+            async with self.neo_driver.session() as session:
+                result = await session.run(BATCH_RELATIONS_QUERY, types=RELATION_TYPES,
+                                           projects=[{"title": title, "names": project.get("participants", [])}])
+                rows = [(rec["a"], rec["relation"], rec["b"]) async for rec in result]
+        except Exception as e:
+            return {"project": project, "relations": None, "relations_error": str(e)}
+        relations = {rel: sorted(names) for rel, names in summarize(rows).items()}
+        return {"project": project, "relations": relations}
+
+    async def complete(self, kind, text, limit=fuzzy_search.DEFAULT_LIMIT):
+        # Autocomplete / fuzzy candidates; kind: researcher, project or publication
+        return await self.fuzzy.asuggest(kind, text, max(1, min(int(limit), 50)))
+
+    async def list(self, kind, after=None, limit=50):
+        if kind not in listing.LISTINGS:
+            raise ServiceError(f"unknown listing '{kind}'")
+        spec = listing.LISTINGS[kind]
+        key = spec["key"]
+        limit = max(1, min(int(limit), 1000))
+        # One keyset page per cluster, merged and cut like listing.page
+        query = listing.keyset_query(key, None if after is None else (after,))
+        projection = {f: 1 for f in spec["fields"]}
+        pages = await self._all(lambda db: db[kind].find(query, projection, sort=listing.keyset_sort(key),
+                                                         limit=limit + 1).to_list(None))
+        rows, next_after = listing.cut_page(
+            listing.merge_unique([p for p in pages if not isinstance(p, Exception)], key), key, limit)
+        for row in rows:
+            row.pop("_id", None)
+        return {"rows": rows, "next_after": next_after}
+
+    async def _mongo_top_researchers(self, limit):
+        db = self.clusters[0][2]
+        cursor = await db["projects"].aggregate(top_researchers_pipeline(limit), allowDiskUse=True)
+        return [{"name": row["_id"], "projects": row["projects"], "collaborators": row["collaborators"]}
+                async for row in cursor]
+
+    async def _neo4j_top_researchers(self, limit):
+        async with self.neo_driver.session(database="neo4j") as session:
+            result = await session.run(query_top_researchers, limit=limit)
+            return [{"name": rec["name"], "projects": rec["projects"], "collaborators": rec["collaborators"]}
+                    async for rec in result]
+
+    async def analytics(self, backend=None, limit=5):
+        backend = backend or ANALYTICS_BACKEND
+        if backend == "leaderboard":
+            return {"rows": await leaderboards.atop_researchers(self.redis, limit), "source": "leaderboard",
+                    "engine": "leaderboard"}
+        if backend not in ("neo4j", "mongo"):
+            raise ServiceError(f"analytics backend '{backend}' is not served (use neo4j, mongo or leaderboard)")
+
+        used = []
+        async def compute():
+            if backend == "neo4j":
+                try:
+                    rows = await self._neo4j_top_researchers(limit)
+                    used.append("neo4j")
+                    return rows
+                except Exception as e:
+                    print(f"⚠️ neo4j failed for top_researchers ({type(e).__name__}: {e}); answering from mongo")
+            used.append("mongo")
+            return await self._mongo_top_researchers(limit)
+
+        rows, source = await self.cache.get_or_load("analytics", f"top_researchers_projects:{backend}:{limit}",
+                                                    compute)
+        return {"rows": rows, "source": source, "engine": used[0] if used else backend}
+
+    async def suggest(self, name, limit=10):
+        found = await recommendations.asuggestions(self.redis, name, max(1, min(int(limit), 100)))
+        return {"name": name, "suggestions": found or [], "stored": found is not None}
+
+    async def search(self, query, page=1, page_size=search_index.DEFAULT_PAGE_SIZE):
+        return await search_index.asearch(self.redis, query, max(1, int(page)), max(1, min(int(page_size), 100)))
+
+    # ---- writes ----
+    async def _bulk_write(self, targets, ops_by_collection, events=()):
+        # events go to each cluster's outbox with the documents (outbox.py);
+        # Neo4j and Redis are updated by the outbox worker
+        async def write(label, db):
+            report = {"cluster": label, "ok": True, "upserted": 0, "modified": 0, "error": None}
+            start_time = time.perf_counter()
+            try:
+                writes = [(db[collection], ops) for collection, ops in ops_by_collection]
+                for result in await outbox.awrite_with_events(writes, db[outbox.OUTBOX], events):
+                    report["upserted"] += result.upserted_count
+                    report["modified"] += result.modified_count
+            except Exception as e:
+                report["ok"] = False
+                report["error"] = str(e)
+            report["seconds"] = time.perf_counter() - start_time
+            return report
+
+        reports = await asyncio.gather(*(write(label, db) for label, db in targets))
+        if not any(rep["ok"] for rep in reports):
+            raise ServiceError("write failed on every cluster: " + "; ".join(
+                f"{rep['cluster']}: {rep['error']}" for rep in reports))
+        return reports
+
+    def _notify_outbox(self):
+        # Drain now instead of at the worker's next poll (an external worker polls)
+        if self.outbox_worker is not None:
+            self.outbox_worker.notify()
+
+    async def add_researcher(self, name, department=None, interests=(), clusters=None):
+        name = (name or "").strip()
+        if not name:
+            raise ServiceError("name is required")
+        doc = {"name": name, "department": department, "interests": list(interests)}
+        reports = await self._bulk_write(self._targets(clusters), [("researchers", researcher_ops([doc]))],
+                                         [outbox.researcher_event(name, department, doc["interests"])])
+        # Cached analytics are dropped by the outbox worker once Neo4j has the write
+        await self.cache.invalidate("researcher", name)
+        self._notify_outbox()
+        return {"clusters": reports}
+
+    async def add_project(self, title, description=None, participants=(), publications=(), clusters=None):
+        title = (title or "").strip()
+        if not title:
+            raise ServiceError("title is required")
+        participants = [p for p in dict.fromkeys(p.strip() for p in participants) if p]
+        project = {"title": title, "participants": participants}
+        if description is not None:
+            project["description"] = description
+        pubs = [{"title": t, "project": title, "authors": participants} for t in publications if t]
+        reports = await self._bulk_write(self._targets(clusters),
+                                         [("projects", project_ops([project])), ("publications", publication_ops(pubs))],
+                                         [outbox.project_event(title, participants, [p["title"] for p in pubs])])
+        self._notify_outbox()
+        return {"clusters": reports}
+
+    async def ping(self):
+        return "pong"
+
+OPERATIONS = ("ping", "lookup_researcher", "lookup_project", "complete", "list", "analytics", "suggest", "search",
+              "add_researcher", "add_project")
+
+# -----------------------------
+# JSON-lines TCP server
+# -----------------------------
+async def handle_request(service, request, inflight):
+    request_id = request.get("id") if isinstance(request, dict) else None
+    start_time = time.perf_counter()
+    async with inflight:
+        try:
+            op = request.get("op")
+            if op not in OPERATIONS:
+                raise ServiceError(f"unknown operation '{op}'")
+            with metrics.action(op):
+                result = await getattr(service, op)(**(request.get("params") or {}))
+            response = {"id": request_id, "ok": True, "result": result}
+        except (ServiceError, TypeError, ValueError) as e:
+            response = {"id": request_id, "ok": False, "error": str(e)}
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    response["seconds"] = time.perf_counter() - start_time
+    return response
+
+async def handle_connection(service, inflight, reader, writer):
+    pending = set()
+
+    async def respond(line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            response = {"id": None, "ok": False, "error": "invalid JSON request"}
+        else:
+            response = await handle_request(service, request, inflight)
+        writer.write((json.dumps(response, default=str) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    try:
+        while line := await reader.readline():
+            if line.strip():
+                task = asyncio.create_task(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host=SERVICE_HOST, port=SERVICE_PORT):
+    service = ResearchService()
+    metrics.serve_from_env()
+    # The outbox worker uses the synchronous clients, on its own thread
+    worker = None
+    if outbox.OUTBOX_WORKER == "thread":
+        import connections
+        worker = outbox.OutboxWorker([(f"Cluster {n}", connections.get_db(int(n))) for n in CLUSTERS],
+                                     connections.get_neo4j(), connections.get_redis(),
+                                     cache=connections.get_cache()).start()
+        service.outbox_worker = worker
+    inflight = asyncio.Semaphore(MAX_INFLIGHT)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, inflight, r, w),
+                                        host, port, limit=16 * 1024 * 1024)
+    print(f"✅ Research service listening on {host}:{port} "
+          f"(pools: mongo {MONGO_POOL_SIZE}, neo4j {NEO4J_POOL_SIZE}, redis {REDIS_POOL_SIZE})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if worker is not None:
+            await asyncio.to_thread(worker.stop, True)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Service stopped.")
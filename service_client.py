@@ -0,0 +1,295 @@
+# service_client.py
+# Thin clients for service.py:
+#  - ServiceClient: blocking, one request at a time (the interactive menu)
+#  - AsyncServiceClient: many requests in flight on one connection
+#  - remote_menu(): the main_demo_fixed.py menu, talking only to the service
+#
+#   python service_client.py                                  interactive menu
+#   python service_client.py --load 2000 --concurrency 200 --op analytics
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8765"))
+
+class ServiceError(Exception):
+    pass
+
+def _result(response):
+    if not response.get("ok"):
+        raise ServiceError(response.get("error", "unknown error"))
+    return response["result"]
+
+# -----------------------------
+# Blocking client
+# -----------------------------
+class ServiceClient:
+    def __init__(self, host=SERVICE_HOST, port=SERVICE_PORT, timeout=30.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def call(self, op, **params):
+        request_id = next(self._ids)
+        self.file.write((json.dumps({"id": request_id, "op": op, "params": params}) + "\n").encode("utf-8"))
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ServiceError("connection closed by the service")
+        response = json.loads(line)
+        return _result(response), response.get("seconds", 0.0)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+# -----------------------------
+# Async client: responses are matched to requests by id
+# -----------------------------
+class AsyncServiceClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, host=SERVICE_HOST, port=SERVICE_PORT):
+        reader, writer = await asyncio.open_connection(host, port, limit=16 * 1024 * 1024)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future = self._waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._waiting.values():
+            future.set_exception(ServiceError("connection closed by the service"))
+
+    async def call(self, op, **params):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self.writer.write((json.dumps({"id": request_id, "op": op, "params": params}) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        return _result(await future)
+
+    async def close(self):
+        self.writer.close()
+        self._receiver.cancel()
+
+# -----------------------------
+# Interactive menu over the service
+# -----------------------------
+def _ask_clusters():
+    choice = input("Store in: 1. Cluster 1  2. Cluster 2  3. Both  0. Cancel: ").strip()
+    return {"1": ["1"], "2": ["2"], "3": ["1", "2"]}.get(choice)
+
+FIND_KINDS = {"1": "researcher", "2": "project", "3": "publication"}
+
+def _print_did_you_mean(found):
+    if found:
+        print("Did you mean: " + ", ".join(f"'{s['name']}'" for s in found) + "?")
+
+def _print_list(client, kind, heading, fmt, page_size=50):
+    print(f"\n--- {heading} (Cluster 1 + Cluster 2) ---")
+    after = None
+    while True:
+        page, seconds = client.call("list", kind=kind, after=after, limit=page_size)
+        for doc in page["rows"]:
+            print(fmt(doc))
+        after = page["next_after"]
+        if after is None or input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+            break
+    print(f"⏱️ service: {seconds:.6f}s for the last page")
+
+def remote_menu(client):
+    while True:
+        print("\n--- Research Collaboration System (service) ---")
+        print("1. Show All Researchers")
+        print("2. Show All Projects")
+        print("3. Show All Publications")
+        print("4. Add Researcher")
+        print("5. Add Project")
+        print("6. Show Analytics")
+        print("7. Show Researcher by Name")
+        print("8. Show Project by Title")
+        print("9. Suggest Collaborators")
+        print("11. Search Researchers (interest / department)")
+        print("12. Find by Name / Title (autocomplete)")
+        print("0. Exit")
+        choice = input("Select an option: ").strip()
+        try:
+            if choice == "1":
+                _print_list(client, "researchers", "Researchers", lambda r: f"{r['name']} - {r.get('department')}")
+            elif choice == "2":
+                _print_list(client, "projects", "Projects",
+                            lambda p: f"{p['title']} - Participants: {', '.join(p.get('participants', []))}")
+            elif choice == "3":
+                _print_list(client, "publications", "Publications",
+                            lambda pub: f"{pub['title']} - Authors: {', '.join(pub.get('authors', []))} - Project: {pub.get('project')}")
+            elif choice == "4":
+                name = input("Researcher Name: ").strip()
+                dept = input("Department: ").strip()
+                interests = [i.strip() for i in input("Interests (comma separated): ").split(",") if i.strip()]
+                clusters = _ask_clusters()
+                if clusters is None:
+                    print("❌ Operation cancelled. Nothing was saved.")
+                    continue
+                result, seconds = client.call("add_researcher", name=name, department=dept, interests=interests,
+                                              clusters=clusters)
+                for rep in result["clusters"]:
+                    print(f"   {rep['cluster']}: {'✅' if rep['ok'] else '❌ ' + str(rep['error'])}")
+                print(f"✅ Researcher '{name}' added in {seconds:.6f} seconds")
+            elif choice == "5":
+                title = input("Project Title: ").strip()
+                desc = input("Project Description: ").strip()
+                participants = [p.strip() for p in input("Participants (comma separated): ").split(",") if p.strip()]
+                pubs = [p.strip() for p in input("Publications (comma separated, optional): ").split(",") if p.strip()]
+                clusters = _ask_clusters()
+                if clusters is None:
+                    print("❌ Operation cancelled. Nothing was saved.")
+                    continue
+                result, seconds = client.call("add_project", title=title, description=desc,
+                                              participants=participants, publications=pubs, clusters=clusters)
+                for rep in result["clusters"]:
+                    print(f"   {rep['cluster']}: {'✅' if rep['ok'] else '❌ ' + str(rep['error'])}")
+                print(f"✅ Project '{title}' added in {seconds:.6f} seconds")
+            elif choice == "6":
+                result, seconds = client.call("analytics")
+                print(f"✅ Analytics ({result['engine']}, {result['source']}) in {seconds:.6f} seconds")
+                print("\n--- Top Researchers by Projects ---")
+                for r_data in result["rows"]:
+                    print(f"{r_data['name']}: {r_data['projects']} projects, {r_data['collaborators']} collaborators")
+            elif choice == "7":
+                name = input("Enter Researcher Name: ").strip()
+                result, seconds = client.call("lookup_researcher", name=name)
+                r_data = result["researcher"]
+                if not r_data:
+                    print(f"No researcher found with name '{name}'")
+                    _print_did_you_mean(result.get("did_you_mean"))
+                    continue
+                print(f"✅ Fetched ({result['source']}) in {seconds:.6f} seconds")
+                print(f"\nName: {r_data.get('name','')}, Department: {r_data.get('department','')}, "
+                      f"Interests: {', '.join(r_data.get('interests', []))}")
+                print("Projects:")
+                for t in result["projects"]:
+                    print(f" - {t}")
+            elif choice == "8":
+                title = input("Enter Project Title: ").strip()
+                result, seconds = client.call("lookup_project", title=title)
+                project = result["project"]
+                if not project:
+                    print(f"No project found with title '{title}'")
+                    _print_did_you_mean(result.get("did_you_mean"))
+                    continue
+                print(f"\nTitle: {project.get('title')}")
+                print("Participants:", ", ".join(project.get("participants", [])))
+                print("\nRelationships in this project:")
+                if result["relations"] is None:
+                    print(f" ⚠️ Neo4j unavailable: {result.get('relations_error')}")
+                elif result["relations"]:
+                    for rel_type, names in result["relations"].items():
+                        print(f" {rel_type}: {', '.join(names)}")
+                else:
+                    print(" No relationships found between participants.")
+            elif choice == "9":
+                name = input("Enter Researcher Name: ").strip()
+                result, seconds = client.call("suggest", name=name, limit=5)
+                if not result["stored"]:
+                    print(f"No suggestions stored for '{name}'")
+                    continue
+                print(f"✅ Suggestions in {seconds:.6f} seconds")
+                for s in result["suggestions"]:
+                    print(f"{s['name']} ({s['score']}): {s['common']} common collaborators")
+            elif choice == "11":
+                query = input('Query (e.g. interest:AI AND dept:"Computer Science"): ').strip()
+                page = 1
+                while True:
+                    result, seconds = client.call("search", query=query, page=page, page_size=50)
+                    if page == 1:
+                        print(f"✅ {result['total']} researchers match ({seconds:.6f} seconds)")
+                    for row in result["results"]:
+                        print(f"{row['name']} - {row['department']} - {', '.join(row['interests'])}")
+                    shown = result["offset"] + len(result["results"])
+                    if shown >= result["total"] or input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+                        break
+                    page += 1
+            elif choice == "12":
+                kind = FIND_KINDS.get(input("Find: 1. Researcher  2. Project  3. Publication: ").strip())
+                if kind is None:
+                    print("Invalid choice. Try again!")
+                    continue
+                text = input("Name / title (or its beginning): ").strip()
+                result, seconds = client.call("complete", kind=kind, text=text, limit=10)
+                print(f"✅ {len(result)} candidates in {seconds:.6f} seconds")
+                for s in result:
+                    print(f" - {s['name']} ({s['match']}, {s['score']})")
+            elif choice == "0":
+                print("Exiting...")
+                break
+            else:
+                print("Invalid choice. Try again!")
+        except ServiceError as e:
+            print(f"❌ {e}")
+
+# -----------------------------
+# Load generator
+# -----------------------------
+async def load_test(op, params, total, concurrency, connections=8, host=SERVICE_HOST, port=SERVICE_PORT):
+    clients = [await AsyncServiceClient.connect(host, port) for _ in range(connections)]
+    limiter = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with limiter:
+            start_time = time.perf_counter()
+            try:
+                await clients[i % len(clients)].call(op, **params)
+                latencies.append(time.perf_counter() - start_time)
+            except ServiceError:
+                errors += 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start_time
+    for client in clients:
+        await client.close()
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    print(f"✅ {total} x {op}, {concurrency} in flight: {total / elapsed:,.0f} req/s, "
+          f"p50 {pct(0.5):.2f} ms, p95 {pct(0.95):.2f} ms, p99 {pct(0.99):.2f} ms, {errors} errors")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Client for the research collaboration service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--load", type=int, help="send this many requests concurrently instead of the menu")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--op", default="ping")
+    parser.add_argument("--params", default="{}", help="JSON parameters for --op")
+    args = parser.parse_args()
+
+    if args.load:
+        asyncio.run(load_test(args.op, json.loads(args.params), args.load, args.concurrency,
+                              host=args.host, port=args.port))
+    else:
+        client = ServiceClient(args.host, args.port)
+        try:
+            remote_menu(client)
+        finally:
+            client.close()
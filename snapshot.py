@@ -0,0 +1,271 @@
+# snapshot.py
+# Columnar snapshot of the collaboration dataset for warm starts: one file,
+# opened with mmap, every column a numpy view on the mapped pages (nothing
+# is copied or parsed until it is used).
+#
+# Layout (little-endian):
+#   8 bytes   magic b"RCSNAP01"
+#   8 bytes   directory length (uint64)
+#   JSON      directory: counts, creation time, source marker, and per array {offset, dtype, shape}
+#   arrays    each starting on a 64-byte boundary
+# Arrays:
+#   strings.offsets / strings.data      interned string table (UTF-8), id -> bytes
+#   researchers.name / .department       string ids (department -1 = none), sorted by name
+#   researchers.interests(_indptr)       string ids per researcher (CSR)
+#   projects.title, projects.members(_indptr)            members as researcher rows
+#   publications.title / .project / .year                (project -1 = none, year 0 = none)
+#   publications.authors(_indptr)                        authors as researcher rows
+# Members / authors that are not in the researchers collection are dropped
+# (as the analytics engines do), duplicates are listed once. Membership
+# arrays are CSC: projects.members_indptr / .members is the researcher x
+# project incidence matrix as it is.
+# The source marker (document counts and the newest outbox event when the
+# snapshot was read) tells whether MongoDB has been written since: is_fresh().
+#
+#   python snapshot.py --write research.snap            from MongoDB (cluster 1)
+#   python snapshot.py --info research.snap
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+
+import numpy as np
+
+MAGIC = b"RCSNAP01"
+VERSION = 1
+ALIGN = 64
+
+# -----------------------------
+# Writing
+# -----------------------------
+class _Strings:
+    def __init__(self):
+        self.ids = {}
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+
+    def intern(self, value):
+        if value is None or value == "":
+            return -1
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.offsets) - 1
+            self.data += str(value).encode("utf-8")
+            self.offsets.append(len(self.data))
+        return i
+
+def _groups(docs, field, rows, strings, columns):
+    # -> (titles, indptr, members) with members as researcher rows, each listed once
+    titles, indptr, members = array("i"), array("q", [0]), array("i")
+    for doc in docs:
+        titles.append(strings.intern(doc["title"]))
+        seen = set()
+        for name in doc.get(field) or []:
+            row = rows.get(name)
+            if row is not None and row not in seen:
+                seen.add(row)
+                members.append(row)
+        indptr.append(len(members))
+        for column, key, convert in columns:
+            column.append(convert(doc.get(key)))
+    return titles, indptr, members
+
+def _index_dtype(n):
+    return np.int32 if n < 2 ** 31 else np.int64
+
+def source_marker(mongo_db):
+    # Changes with every write: app writes add an outbox event, bulk_import /
+    # datagen add documents (taken before the read, so a write during it counts as newer)
+    from outbox import OUTBOX
+    newest = mongo_db[OUTBOX].find_one({}, {"_id": 0, "created_at": 1}, sort=[("created_at", -1)])
+    marker = {kind: mongo_db[kind].estimated_document_count() for kind in ("researchers", "projects", "publications")}
+    marker["last_event"] = newest["created_at"].isoformat() if newest else None
+    return marker
+
+def write(path, researchers, projects, publications, source=None):
+    # researchers / projects / publications: iterables of dicts (MongoDB documents);
+    # source: source_marker() of the database they come from.
+    # The file is written next to `path` and renamed into place
+    strings = _Strings()
+    researchers = sorted(({"name": r["name"], "department": r.get("department"),
+                           "interests": r.get("interests") or []} for r in researchers),
+                         key=lambda r: r["name"])
+    rows = {}
+    names, departments, interests, interests_indptr = array("i"), array("i"), array("i"), array("q", [0])
+    for r in researchers:
+        if r["name"] in rows:
+            continue
+        rows[r["name"]] = len(names)
+        names.append(strings.intern(r["name"]))
+        departments.append(strings.intern(r["department"]))
+        for term in dict.fromkeys(r["interests"]):
+            interests.append(strings.intern(term))
+        interests_indptr.append(len(interests))
+    del researchers
+
+    project_titles, members_indptr, members = _groups(projects, "participants", rows, strings, [])
+    pub_projects, pub_years = array("i"), array("i")
+    pub_titles, authors_indptr, authors = _groups(
+        publications, "authors", rows, strings,
+        [(pub_projects, "project", strings.intern), (pub_years, "year", lambda y: int(y or 0))])
+
+    arrays = {
+        "strings.offsets": np.frombuffer(strings.offsets, dtype=np.int64),
+        "strings.data": np.frombuffer(bytes(strings.data), dtype=np.uint8),
+        "researchers.name": np.frombuffer(names, dtype=np.int32),
+        "researchers.department": np.frombuffer(departments, dtype=np.int32),
+        "researchers.interests_indptr": np.frombuffer(interests_indptr, dtype=np.int64),
+        "researchers.interests": np.frombuffer(interests, dtype=np.int32),
+        "projects.title": np.frombuffer(project_titles, dtype=np.int32),
+        "publications.title": np.frombuffer(pub_titles, dtype=np.int32),
+        "publications.project": np.frombuffer(pub_projects, dtype=np.int32),
+        "publications.year": np.frombuffer(pub_years, dtype=np.int32),
+    }
+    # Membership indices in the dtype scipy keeps as is (indptr and indices alike)
+    for kind, indptr, idx in (("projects.members", members_indptr, members),
+                              ("publications.authors", authors_indptr, authors)):
+        dtype = _index_dtype(len(idx))
+        arrays[f"{kind}_indptr"] = np.frombuffer(indptr, dtype=np.int64).astype(dtype)
+        arrays[kind] = np.frombuffer(idx, dtype=np.int32).astype(dtype)
+
+    directory = {"version": VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "source": source,
+                 "counts": {"researchers": len(names), "projects": len(project_titles),
+                            "publications": len(pub_titles), "strings": len(strings.offsets) - 1},
+                 "arrays": {}}
+    # Offsets depend on the directory length: lay out once with a placeholder size, then fix it
+    header_size = ALIGN
+    while True:
+        offset, entries = header_size, {}
+        for name, values in arrays.items():
+            entries[name] = {"offset": offset, "dtype": values.dtype.str, "shape": list(values.shape)}
+            offset += -(-values.nbytes // ALIGN) * ALIGN
+        directory["arrays"] = entries
+        encoded = json.dumps(directory, separators=(",", ":")).encode("utf-8")
+        needed = -(-(len(MAGIC) + 8 + len(encoded)) // ALIGN) * ALIGN
+        if needed <= header_size:
+            break
+        header_size = needed
+
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+        for name, values in arrays.items():
+            f.write(b"\0" * (entries[name]["offset"] - f.tell()))
+            f.write(values.tobytes())
+    os.replace(temp, path)
+    return directory["counts"]
+
+def write_from_mongo(path, mongo_db):
+    source = source_marker(mongo_db)
+    return write(
+        path,
+        mongo_db["researchers"].find({}, {"_id": 0, "name": 1, "department": 1, "interests": 1}),
+        mongo_db["projects"].find({}, {"_id": 0, "title": 1, "participants": 1}),
+        mongo_db["publications"].find({}, {"_id": 0, "title": 1, "project": 1, "year": 1, "authors": 1}),
+        source,
+    )
+
+# -----------------------------
+# Reading
+# -----------------------------
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a snapshot file")
+        (size,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        start = len(MAGIC) + 8
+        directory = json.loads(self._map[start:start + size])
+        if directory["version"] != VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: snapshot version {directory['version']}, expected {VERSION}")
+        self.created = directory["created"]
+        self.source = directory.get("source")
+        self.counts = directory["counts"]
+        self.arrays = {}
+        for name, entry in directory["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"]))
+            self.arrays[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=entry["offset"])
+        self._offsets = self.arrays["strings.offsets"]
+        self._strings_at = directory["arrays"]["strings.data"]["offset"]
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def is_fresh(self, mongo_db):
+        # False when MongoDB was written after the snapshot (or it has no marker)
+        return self.source is not None and self.source == source_marker(mongo_db)
+
+    def string(self, i):
+        return self.strings([i])[0]
+
+    def strings(self, ids):
+        # Decoded straight from the mapped bytes; id -1 -> None
+        ids = np.asarray(ids, dtype=np.int64)
+        starts = (self._offsets[ids] + self._strings_at).tolist()
+        ends = (self._offsets[ids + 1] + self._strings_at).tolist()
+        data = self._map
+        return [data[a:b].decode("utf-8") if i >= 0 else None for i, a, b in zip(ids.tolist(), starts, ends)]
+
+    def researcher_names(self):
+        return self.strings(self["researchers.name"])
+
+    def project_titles(self):
+        return self.strings(self["projects.title"])
+
+    def publication_titles(self):
+        return self.strings(self["publications.title"])
+
+    def incidence(self, kind):
+        # Researcher x project ("projects") or researcher x publication ("publications"), CSC, no copy
+        from scipy import sparse
+        field = "members" if kind == "projects" else "authors"
+        indptr, indices = self[f"{kind}.{field}_indptr"], self[f"{kind}.{field}"]
+        data = np.ones(len(indices), dtype=np.int32)
+        return sparse.csc_matrix((data, indices, indptr), shape=(self.counts["researchers"], len(indptr) - 1),
+                                 copy=False)
+
+    def close(self):
+        self.arrays = {}
+        self._offsets = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Views handed out are still alive; the mapping goes with the last of them
+            pass
+
+def load(path):
+    return Snapshot(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar mmap snapshot of researchers, projects and publications")
+    parser.add_argument("path")
+    parser.add_argument("--write", action="store_true", help="write the snapshot from MongoDB (cluster 1)")
+    parser.add_argument("--info", action="store_true", help="print the snapshot's counts and arrays")
+    args = parser.parse_args()
+
+    if args.write:
+        import connections
+        start_time = time.perf_counter()
+        counts = write_from_mongo(args.path, connections.get_db(1))
+        print(f"✅ Snapshot written to {args.path} in {time.perf_counter() - start_time:.2f} seconds: "
+              + ", ".join(f"{n} {kind}" for kind, n in counts.items()))
+    if args.info or not args.write:
+        start_time = time.perf_counter()
+        snap = load(args.path)
+        print(f"✅ Opened in {(time.perf_counter() - start_time) * 1000:.3f} ms "
+              f"({os.path.getsize(args.path) / 1e6:.1f} MB, created {snap.created})")
+        for kind, n in snap.counts.items():
+            print(f"   {kind}: {n}")
+        print(f"   source: {snap.source}")
+        for name, values in snap.arrays.items():
+            print(f"   {name}: {values.dtype} x {len(values)}")
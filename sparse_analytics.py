@@ -0,0 +1,209 @@
+# sparse_analytics.py
+# In-process analytics over the researcher x project and researcher x
+# publication incidence matrices, built straight from the MongoDB
+# `participants` and `authors` fields.
+# Co-authorship and teammate counts are matrix products, so the same
+# leaderboards as neo4j_analytics.py are answered without a Neo4j round trip.
+# An engine is loaded once per process (neo4j_analytics.sparse_engine) and
+# kept current with add_researcher / add_group, like collab_path's graph.
+
+import bisect
+
+import numpy as np
+from scipy import sparse
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def incidence(groups, index, n_cols):
+    # groups: list of member-name lists, one per column
+    rows, cols = [], []
+    for j, members in enumerate(groups):
+        for name in members:
+            i = index.get(name)
+            if i is not None:
+                rows.append(i)
+                cols.append(j)
+    data = np.ones(len(rows), dtype=np.int32)
+    m = sparse.csr_matrix((data, (rows, cols)), shape=(len(index), n_cols))
+    # A name listed twice in the same project still counts once
+    m.data[:] = 1
+    return m
+
+def co_occurrence(m):
+    # (i, j) = number of columns shared by rows i and j, diagonal removed
+    c = (m @ m.T).tocsr()
+    c.setdiag(0)
+    c.eliminate_zeros()
+    return c
+
+def _insert_row(m, pos):
+    # New empty row at pos; rows from pos on move down one (new arrays: m may be a read-only snapshot view)
+    m = m.tocsc()
+    indices = m.indices + (m.indices >= pos).astype(m.indices.dtype)
+    return sparse.csc_matrix((m.data, indices, m.indptr), shape=(m.shape[0] + 1, m.shape[1]))
+
+def _set_column(m, j, rows):
+    # Column j's members replaced by rows (j == number of columns appends one)
+    m = m.tocsc()
+    counts = np.diff(m.indptr)
+    start, end = (m.indptr[j], m.indptr[j + 1]) if j < m.shape[1] else (m.nnz, m.nnz)
+    indices = np.concatenate([m.indices[:start], np.asarray(rows, dtype=m.indices.dtype), m.indices[end:]])
+    counts = np.concatenate([counts[:j], [len(rows)], counts[j + 1:]])
+    indptr = np.concatenate([[0], np.cumsum(counts)]).astype(m.indptr.dtype)
+    return sparse.csc_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                             shape=(m.shape[0], len(counts)))
+
+def top_k(values, k):
+    # Highest values first, ties broken by index (names are indexed alphabetically)
+    values = np.asarray(values).ravel()
+    if k <= 0 or len(values) == 0:
+        return np.array([], dtype=np.int64)
+    if k < len(values):
+        candidates = np.argpartition(-values, k - 1)[:k]
+        cutoff = values[candidates].min()
+        candidates = np.flatnonzero(values >= cutoff)
+    else:
+        candidates = np.arange(len(values))
+    order = np.lexsort((candidates, -values[candidates]))
+    return candidates[order][:k]
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+class SparseAnalytics:
+    def __init__(self, researchers, projects, publications):
+        projects = list(projects)
+        publications = list(publications)
+        if researchers is None:
+            # No researcher collection given: everyone mentioned is a researcher
+            names = {n for p in projects for n in p.get("participants", [])}
+            names |= {n for pub in publications for n in pub.get("authors", [])}
+        else:
+            names = {r["name"] for r in researchers}
+        self.names = sorted(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.project_titles = [p["title"] for p in projects]
+        self.project_index = {t: j for j, t in enumerate(self.project_titles)}
+        self.publication_index = {pub["title"]: j for j, pub in enumerate(publications)}
+
+        # P: researcher x project, A: researcher x publication
+        self.P = incidence([p.get("participants", []) for p in projects], self.index, len(projects))
+        self.A = incidence([pub.get("authors", []) for pub in publications], self.index, len(publications))
+        self.snapshot = None
+        self._teammates = None
+        self._co_authors = None
+
+    @classmethod
+    def from_mongo(cls, mongo_db):
+        return cls(
+            mongo_db["researchers"].find({}, {"_id": 0, "name": 1}),
+            mongo_db["projects"].find({}, {"_id": 0, "title": 1, "participants": 1}),
+            mongo_db["publications"].find({}, {"_id": 0, "title": 1, "authors": 1}),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        # snapshot.Snapshot: researchers are stored sorted by name and the membership
+        # arrays already are the incidence matrices (CSC views on the mapped file)
+        self = cls.__new__(cls)
+        self.names = snap.researcher_names()
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.project_titles = snap.project_titles()
+        self.project_index = {t: j for j, t in enumerate(self.project_titles)}
+        self.publication_index = {t: j for j, t in enumerate(snap.publication_titles())}
+        self.P = snap.incidence("projects")
+        self.A = snap.incidence("publications")
+        self.snapshot = snap
+        self._teammates = None
+        self._co_authors = None
+        return self
+
+    def close(self):
+        # Unmaps the snapshot the engine was loaded from (the engine is not used after this)
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    # -----------------------------
+    # Writes (main_demo_fixed add_researcher / add_project)
+    # -----------------------------
+    def add_researcher(self, name):
+        if name in self.index:
+            return
+        # Names stay alphabetical: ties in the reports are broken by index
+        pos = bisect.bisect_left(self.names, name)
+        self.names.insert(pos, name)
+        self.index = {n: i for i, n in enumerate(self.names)}
+        self.P = _insert_row(self.P, pos)
+        self.A = _insert_row(self.A, pos)
+        self._teammates = None
+        self._co_authors = None
+
+    def add_group(self, kind, title, members):
+        # kind: "project" (members replaced, as the upsert does) or "publication"
+        # (an existing title is kept, as $setOnInsert does); non-researchers are ignored
+        rows = sorted({self.index[n] for n in members if n in self.index})
+        if kind == "project":
+            j = self.project_index.get(title)
+            if j is None:
+                j = self.project_index[title] = len(self.project_titles)
+                self.project_titles.append(title)
+            self.P = _set_column(self.P, j, rows)
+            self._teammates = None
+        else:
+            if title in self.publication_index:
+                return
+            self.publication_index[title] = self.A.shape[1]
+            self.A = _set_column(self.A, self.A.shape[1], rows)
+            self._co_authors = None
+
+    @property
+    def teammates(self):
+        if self._teammates is None:
+            self._teammates = co_occurrence(self.P)
+        return self._teammates
+
+    @property
+    def co_authors(self):
+        if self._co_authors is None:
+            self._co_authors = co_occurrence(self.A)
+        return self._co_authors
+
+    # -----------------------------
+    # Reports (same shapes as neo4j_analytics.Neo4jAnalytics)
+    # -----------------------------
+    def top_authors(self, limit=5):
+        counts = np.asarray(self.A.sum(axis=1)).ravel()
+        return [{"name": self.names[i], "publications": int(counts[i])}
+                for i in top_k(counts, limit) if counts[i] > 0]
+
+    def top_coauthor_pairs(self, limit=5):
+        # Indices sorted, so ties go by (researcher1, researcher2) like the other engines
+        upper = sparse.triu(self.co_authors, k=1).tocsr()
+        upper.sort_indices()
+        upper = upper.tocoo()
+        return [{"researcher1": self.names[upper.row[k]], "researcher2": self.names[upper.col[k]],
+                 "collaborations": int(upper.data[k])}
+                for k in top_k(upper.data, limit)]
+
+    def top_teammates(self, limit=5):
+        counts = np.diff(self.teammates.indptr)
+        return [{"name": self.names[i], "teammates": int(counts[i])}
+                for i in top_k(counts, limit) if counts[i] > 0]
+
+    def project_members(self, title):
+        j = self.project_index.get(title)
+        if j is None:
+            return []
+        return [self.names[i] for i in sorted(self.P[:, j].nonzero()[0])]
+
+    def top_researchers(self, limit=5):
+        # Projects per researcher plus distinct project collaborators (show_analytics)
+        projects = np.asarray(self.P.sum(axis=1)).ravel()
+        collaborators = np.diff(self.teammates.indptr)
+        ranked = np.where(collaborators > 0, projects, -1)
+        return [{"name": self.names[i], "projects": int(projects[i]), "collaborators": int(collaborators[i])}
+                for i in top_k(ranked, limit) if ranked[i] >= 0]
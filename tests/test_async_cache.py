@@ -0,0 +1,44 @@
+# service.AsyncCache and cache.ReadThroughCache share one lock per key: a miss
+# in the service waits for a script already loading it (fakeredis from requirements-bench.txt)
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import fakeredis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import ReadThroughCache
+from service import AsyncCache
+
+
+def test_service_waits_for_a_script_loading_the_key():
+    server = fakeredis.FakeServer()
+    script = ReadThroughCache(fakeredis.FakeRedis(server=server))
+    loads = []
+
+    def slow_load():
+        loads.append("script")
+        time.sleep(0.3)
+        return {"name": "Salma"}
+
+    async def service_load():
+        loads.append("service")
+        return {"name": "Salma"}
+
+    async def service_reads():
+        cache = AsyncCache(fakeredis.FakeAsyncRedis(server=server))
+        return await asyncio.gather(*(cache.get_or_load("researcher", "Salma", service_load) for _ in range(3)))
+
+    thread = threading.Thread(target=script.get_or_load, args=("researcher", "Salma", slow_load))
+    thread.start()
+    time.sleep(0.05)
+    results = asyncio.run(service_reads())
+    thread.join()
+
+    assert loads == ["script"]
+    assert [source for _, source in results] == ["waited"] * 3
+    assert not fakeredis.FakeRedis(server=server).exists(script.key("researcher", "Salma") + ":lock")
@@ -0,0 +1,50 @@
+# Incremental leaderboard updates (project upserts included) must give the same
+# reports as a rebuild and as the sparse engine (fakeredis from requirements-bench.txt)
+
+import os
+import sys
+
+import fakeredis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen
+import leaderboards
+from sparse_analytics import SparseAnalytics
+
+
+def _reports(engine):
+    return {name: getattr(engine, name)(20) for name in ("top_authors", "top_teammates", "top_researchers")}
+
+def test_incremental_matches_rebuild_and_sparse():
+    spec = datagen.DatasetSpec(researchers=200, projects=80, seed=3)
+    researchers = list(datagen.generate_researchers(spec))
+    projects = list(datagen.generate_projects(spec))
+    publications = list(datagen.generate_publications(spec))
+    names = [r["name"] for r in researchers]
+    projects.append({"title": "Outsiders", "participants": [names[0], "Not A Researcher"]})
+    publications.append({"title": "Outsider paper", "project": "Outsiders", "authors": ["Not A Researcher"]})
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    for name in names:
+        leaderboards.record_researcher(client, name)
+    for p in projects:
+        leaderboards.record_project(client, p["title"], p["participants"])
+    # add_project upserts: the second write replaces the participants
+    for i, p in enumerate(projects[:20]):
+        p["participants"] = p["participants"][1:] + names[i:i + 2]
+        leaderboards.record_project(client, p["title"], p["participants"])
+    for pub in publications:
+        leaderboards.record_publication(client, pub["title"], pub["authors"])
+
+    expected = _reports(SparseAnalytics(researchers, projects, publications))
+    assert _reports(leaderboards.LeaderboardAnalytics(client)) == expected
+
+    rebuilt = fakeredis.FakeRedis(decode_responses=True)
+    leaderboards.rebuild(rebuilt, researchers, projects, publications)
+    assert _reports(leaderboards.LeaderboardAnalytics(rebuilt)) == expected
+
+def test_ties_listed_by_name():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    client.zadd(leaderboards.PROJECTS, {"Salma": 3, "Hajar": 3, "Omar": 5, "Zaid": 0})
+    assert leaderboards.top(client, leaderboards.PROJECTS, 3) == [("Omar", 5), ("Hajar", 3), ("Salma", 3)]
@@ -0,0 +1,39 @@
+# Keyset listings over documents whose sort key is null or missing
+# (python -m pytest tests; mongomock from requirements-bench.txt)
+
+import os
+import sys
+
+import mongomock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import listing
+
+
+def _researchers(docs):
+    col = mongomock.MongoClient()["research_db"]["researchers"]
+    col.insert_many(docs)
+    return col
+
+def test_null_key_on_page_boundary_does_not_restart():
+    # batch_size=2: the first page ends on the second document without a name
+    col = _researchers([{"department": "A"}, {"name": None, "department": "B"},
+                        {"name": "Hajar"}, {"name": "Salma"}, {"department": "C"}])
+    docs = list(listing.keyset_stream(col, "name", ["name", "department"], batch_size=2))
+    assert len(docs) == 5
+    assert len({d["_id"] for d in docs}) == 5
+    assert [d.get("name") for d in docs[3:]] == ["Hajar", "Salma"]
+
+def test_merged_stream_orders_null_keys_first_and_keeps_them():
+    one = _researchers([{"name": "Hajar"}, {"department": "A"}])
+    two = _researchers([{"name": "Hajar"}, {"name": None}, {"name": "Adam"}])
+    docs = list(listing.merged_stream([("Cluster 1", one), ("Cluster 2", two)], "researchers", batch_size=1))
+    assert [d.get("name") for d in docs] == [None, None, "Adam", "Hajar"]
+
+def test_page_keeps_null_keys_on_the_first_page():
+    col = _researchers([{"department": "A"}, {"department": "B"}, {"name": "Adam"}, {"name": "Hajar"}])
+    rows, after = listing.page([("Cluster 1", col)], "researchers", size=1)
+    assert [r.get("name") for r in rows] == [None, None, "Adam"] and after == "Adam"
+    rows, after = listing.page([("Cluster 1", col)], "researchers", after=after, size=1)
+    assert [r["name"] for r in rows] == ["Hajar"] and after is None
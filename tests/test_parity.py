@@ -0,0 +1,40 @@
+# The MongoDB and sparse engines must give the same reports (mongo_analytics.parity)
+# on a generated dataset with one-person projects and names outside `researchers`.
+# Neo4jAnalytics runs the same check against a live graph:
+#   python mongo_analytics.py --compare neo4j,mongo,sparse --parity
+
+import os
+import sys
+
+import mongomock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datagen
+from mongo_analytics import MongoAnalytics, parity
+from sparse_analytics import SparseAnalytics
+
+
+def _dataset():
+    spec = datagen.DatasetSpec(researchers=300, projects=60, seed=7)
+    db = mongomock.MongoClient()["research_db"]
+    researchers = list(datagen.generate_researchers(spec))
+    solo = researchers[0]["name"]
+    db["researchers"].insert_many(researchers)
+    db["projects"].insert_many(list(datagen.generate_projects(spec)) + [
+        # Enough one-person projects to put `solo` first by projects
+        *({"title": f"Solo {i}", "participants": [solo]} for i in range(40)),
+        {"title": "Solo pair", "participants": [solo, researchers[1]["name"]]},
+        {"title": "Outsiders", "participants": [solo, "Not A Researcher"]},
+    ])
+    db["publications"].insert_many(list(datagen.generate_publications(spec)) + [
+        {"title": "Solo paper", "project": "Solo 0", "authors": [solo]},
+    ])
+    return db, solo
+
+def test_mongo_and_sparse_agree_with_solo_projects():
+    db, solo = _dataset()
+    engines = {"mongo": MongoAnalytics(db), "sparse": SparseAnalytics.from_mongo(db)}
+    assert parity(engines, limit=20) == {}
+    top = engines["sparse"].top_researchers(1)[0]
+    assert top["name"] == solo and top["projects"] >= 42